@@ -0,0 +1,232 @@
+"""
+Benchmark suite
+
+Times the hot paths of the api with no hub: json decode of hub responses, the
+full read_hub_data model build, collection lookups and schedule conversions for
+synthetic installations of several sizes, plus command round trips against a
+local mock hub.
+
+Results are written as json and can be compared with a saved baseline, failing
+if any benchmark got slower by more than a threshold.  Baselines depend on the
+machine they were run on, so only compare results from the same machine.
+
+    python benchmarks/bench.py run --output benchmarks/baseline.json
+    python benchmarks/bench.py run --output results.json --compare benchmarks/baseline.json
+    python benchmarks/bench.py compare benchmarks/baseline.json results.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import inspect
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from wiserHeatAPIv2 import __VERSION__  # noqa: E402
+from wiserHeatAPIv2.const import WISERHUBDOMAIN  # noqa: E402
+from wiserHeatAPIv2.replay import WiserReplay  # noqa: E402
+from wiserHeatAPIv2.rest_controller import _decode_hub_payload  # noqa: E402
+from wiserHeatAPIv2.synthetic import WiserSyntheticInstallation  # noqa: E402
+from wiserHeatAPIv2.wiserhub import WiserAPI  # noqa: E402
+
+DEFAULT_SCALES = [10, 100, 500]
+DEFAULT_THRESHOLD = 0.2
+ROOMS_PER_DEVICE = 4
+REPEAT = 5
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, scaled: bool = True):
+    """
+    Register a benchmark.  The function takes the number of rooms and returns the callable to time,
+    or is a generator yielding it and cleaning up after the yield
+    """
+
+    def register(function):
+        BENCHMARKS[name] = (function, scaled)
+        return function
+
+    return register
+
+
+def installation(rooms: int) -> WiserSyntheticInstallation:
+    """Get a synthetic installation of rooms rooms, with one device of each product type for every ROOMS_PER_DEVICE rooms"""
+    return WiserSyntheticInstallation(rooms, max(1, rooms // ROOMS_PER_DEVICE))
+
+
+def replay_api(rooms: int) -> WiserAPI:
+    return WiserAPI.from_files(WiserReplay([installation(rooms).recording], auto_step=False))
+
+
+@benchmark("decode")
+def bench_decode(rooms: int):
+    payload = installation(rooms).recording[WISERHUBDOMAIN]
+    return lambda: _decode_hub_payload(payload)
+
+
+@benchmark("build")
+def bench_build(rooms: int):
+    api = replay_api(rooms)
+    data = installation(rooms).data
+    sections = [data["Domain"], data["Network"], data["Schedule"], data["OpenTherm"]]
+    return lambda: api._build(*sections)
+
+
+@benchmark("read_hub_data")
+def bench_read_hub_data(rooms: int):
+    return replay_api(rooms).read_hub_data
+
+
+@benchmark("lookup_rooms")
+def bench_lookup_rooms(rooms: int):
+    api = replay_api(rooms)
+    ids = [room.id for room in api.rooms.all]
+    names = [room.name for room in api.rooms.all]
+
+    def lookup():
+        for room_id, name in zip(ids, names):
+            api.rooms.get_by_id(room_id)
+            api.rooms.get_by_name(name)
+
+    return lookup
+
+
+@benchmark("lookup_devices")
+def bench_lookup_devices(rooms: int):
+    api = replay_api(rooms)
+    devices = [(device.id, device.node_id, device.room_id) for device in api.devices.all]
+
+    def lookup():
+        for device_id, node_id, room_id in devices:
+            api.devices.get_by_id(device_id)
+            api.devices.get_by_node_id(node_id)
+            api.devices.get_by_room_id(room_id)
+
+    return lookup
+
+
+@benchmark("schedule_conversion")
+def bench_schedule_conversion(rooms: int):
+    api = replay_api(rooms)
+    schedules = api.schedules.all
+
+    def convert():
+        for schedule in schedules:
+            schedule._convert_to_wiser_schedule(schedule._convert_from_wiser_schedule(schedule._schedule_data))
+
+    return convert
+
+
+@benchmark("command_roundtrip", scaled=False)
+def bench_command_roundtrip(rooms: int):
+    from wiserHeatAPIv2.mock_hub import WiserMockHub
+
+    with WiserMockHub(installation(10).data) as hub:
+        api = WiserAPI(hub.address, hub.secret)
+        room = api.rooms.get_by_id(1)
+        try:
+            yield lambda: room.set_target_temperature(21)
+        finally:
+            api._wiser_rest_controller._requests_session.close()
+
+
+def time_callable(function) -> dict:
+    """Time function, returning per call times in microseconds"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [total / number * 1e6 for total in timer.repeat(repeat=REPEAT, number=number)]
+    return {"min_us": round(min(times), 3), "median_us": round(statistics.median(times), 3), "number": number, "repeat": REPEAT}
+
+
+def run(scales: list, selected: list = None) -> dict:
+    results = {}
+    for name, (function, scaled) in BENCHMARKS.items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        for rooms in scales if scaled else [None]:
+            key = f"{name}[rooms={rooms}]" if scaled else name
+            setup = function(rooms)
+            if inspect.isgenerator(setup):
+                with contextlib.closing(setup):
+                    results[key] = time_callable(next(setup))
+            else:
+                results[key] = time_callable(setup)
+            print(f"{key:40} {results[key]['min_us']:12.1f}us", flush=True)
+    return {
+        "meta": {
+            "api_version": __VERSION__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Compare minimum times of benchmarks in both result sets
+    return: list of names of benchmarks slower than baseline by more than threshold
+    """
+    regressions = []
+    print(f"{'benchmark':40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:40} {'-':>12} {result['min_us']:12.1f} {'new':>8}")
+            continue
+        before = baseline["results"][name]["min_us"]
+        change = result["min_us"] / before - 1 if before else 0
+        flag = " REGRESSION" if change > threshold else ""
+        print(f"{name:40} {before:12.1f} {result['min_us']:12.1f} {change:+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    if baseline["meta"].get("platform") != current["meta"].get("platform"):
+        print("Warning: baseline was run on a different platform")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Wiser api benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", description="Run benchmarks")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Numbers of rooms to benchmark")
+    run_parser.add_argument("--filter", nargs="+", help="Only run benchmarks with names containing these")
+    run_parser.add_argument("--output", help="File to save results to")
+    run_parser.add_argument("--compare", help="Baseline results file to compare with")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, 0.2 is 20%%")
+
+    compare_parser = subparsers.add_parser("compare", description="Compare benchmark results")
+    compare_parser.add_argument("baseline", help="Baseline results file")
+    compare_parser.add_argument("current", help="Results file to compare")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, 0.2 is 20%%")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        current = run(args.scales, args.filter)
+        if args.output:
+            pathlib.Path(args.output).write_text(json.dumps(current, indent=2))
+        if not args.compare:
+            return 0
+        baseline = json.loads(pathlib.Path(args.compare).read_text())
+    else:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        current = json.loads(pathlib.Path(args.current).read_text())
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmarks slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""
+Command load test
+
+Drives many concurrent callers sending commands through one api to a local mock
+hub serving a synthetic installation, and reports latency percentiles,
+throughput, retries and errors for each combination of rest settings:
+
+    callers     number of threads sending commands at the same time
+    pool size   maximum connections to the hub, callers wait for a free one
+    connection  close (a new connection per request, as the api does) or keep-alive
+    pacing      minimum seconds between requests to the hub, across all callers
+    batch       commands each caller collects before sending, commands to the same
+                url in a batch are merged into one request
+
+The command mix is made by calling set_target_temperature, boost, smart plug
+turn_on/turn_off, light current_percentage and schedule set_schedule on a replay
+of the installation, so the requests are exactly those the api sends.  Timing
+covers sending only.  Latency is from the start of a caller's batch until the
+request carrying the command completes.  Retries are requests the hub received
+beyond those sent, errors are commands that raised.
+
+    python benchmarks/loadtest.py --callers 1 8 32 --pool-size 1 10 --connection close keep-alive
+    python benchmarks/loadtest.py --latency 0.02 --error-rate 0.02 --batch 1 4 --output loadtest.json
+"""
+import argparse
+import itertools
+import json
+import pathlib
+import platform
+import random
+import sys
+import threading
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from wiserHeatAPIv2 import __VERSION__  # noqa: E402
+from wiserHeatAPIv2.const import REST_BACKOFF_FACTOR, REST_RETRIES  # noqa: E402
+from wiserHeatAPIv2.mock_hub import WiserMockHub, WiserMockHubFaults  # noqa: E402
+from wiserHeatAPIv2.replay import WiserReplay  # noqa: E402
+from wiserHeatAPIv2.rest_controller import WiserRestActionEnum  # noqa: E402
+from wiserHeatAPIv2.synthetic import WiserSyntheticInstallation  # noqa: E402
+from wiserHeatAPIv2.wiserhub import WiserAPI  # noqa: E402
+
+# Command: relative frequency
+DEFAULT_MIX = {
+    "set_target_temperature": 40,
+    "boost": 15,
+    "smartplug": 20,
+    "light": 15,
+    "schedule": 10,
+}
+
+
+# Command: objects it is sent to
+TARGETS = {
+    "set_target_temperature": lambda api: api.rooms.all,
+    "boost": lambda api: api.rooms.all,
+    "smartplug": lambda api: api.devices.smartplugs.all,
+    "light": lambda api: api.devices.lights.dimmable_lights,
+    "schedule": lambda api: api.schedules.heating_schedules,
+}
+
+
+def _set_target_temperature(room, rng):
+    room.set_target_temperature(rng.randrange(30, 50) / 2)
+
+
+def _boost(room, rng):
+    room.boost(rng.choice([0.5, 1, 2]), rng.choice([30, 60]))
+
+
+def _smartplug(plug, rng):
+    plug.turn_on() if rng.random() < 0.5 else plug.turn_off()
+
+
+def _light(light, rng):
+    light.current_percentage = rng.randrange(0, 101, 10)
+
+
+def _schedule(schedule, rng):
+    schedule.set_schedule(schedule.schedule_data)
+
+
+COMMANDS = {
+    "set_target_temperature": _set_target_temperature,
+    "boost": _boost,
+    "smartplug": _smartplug,
+    "light": _light,
+    "schedule": _schedule,
+}
+
+
+def generate_commands(installation: WiserSyntheticInstallation, mix: dict, count: int, seed: int) -> list:
+    """
+    Record the requests made by count commands chosen from mix.  Commands with nothing
+    to send to in the installation are left out of the mix
+    return: list of (command name, method, path, data) tuples
+    """
+    api = WiserAPI.from_files(WiserReplay([installation.recording], auto_step=False))
+    replay = api._wiser_rest_controller.replay
+    rng = random.Random(seed)
+    targets = {name: TARGETS[name](api) for name in mix}
+    names = [name for name in mix if targets[name] and mix[name] > 0]
+    if not names:
+        raise ValueError(f"No commands in mix {sorted(mix)} have anything to send to in the installation")
+    commands = []
+    for name in rng.choices(names, weights=[mix[name] for name in names], k=count):
+        sent = len(replay.commands)
+        COMMANDS[name](rng.choice(targets[name]), rng)
+        for method, url, data in replay.commands[sent:]:
+            commands.append((name, method, url.replace("http://replay/", "", 1), data))
+    return commands
+
+
+def batches(commands: list, size: int) -> list:
+    """
+    Split commands into batches, merging commands to the same url within a batch
+    return: list of lists of (request, command names) tuples, request being (method, path, data)
+    """
+    result = []
+    for start in range(0, len(commands), size):
+        merged = {}
+        for name, method, path, data in commands[start:start + size]:
+            if (method, path) in merged:
+                merged[(method, path)][0][2].update(data)
+                merged[(method, path)][1].append(name)
+            else:
+                merged[(method, path)] = ((method, path, dict(data)), [name])
+        result.append(list(merged.values()))
+    return result
+
+
+class _Pacer(object):
+    """Spaces requests from all callers at least interval seconds apart"""
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def configure(api: WiserAPI, pool_size: int, connection: str, retries: int, backoff_factor: float) -> None:
+    """Replace the connection settings of the api rest session"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = api._wiser_rest_controller._requests_session
+    session.mount(
+        "http://",
+        HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=[413, 429, 500, 502, 503, 504],
+                # urllib3 only retries idempotent methods by default, commands are PATCH and DELETE
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"PATCH", "POST"},
+            ),
+        ),
+    )
+    if connection == "keep-alive":
+        session.headers.pop("Connection", None)
+    else:
+        session.headers["Connection"] = "close"
+
+
+def percentile(values: list, percent: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(percent / 100 * len(values) + 0.5)) - 1))]
+
+
+def run_config(installation: WiserSyntheticInstallation, faults: WiserMockHubFaults, commands: list, config: dict) -> dict:
+    """Run one load test and return its results"""
+    with WiserMockHub(installation.data, faults=faults) as hub:
+        api = WiserAPI(hub.address, hub.secret)
+        configure(api, config["pool_size"], config["connection"], config["max_retries"], config["backoff_factor"])
+        controller = api._wiser_rest_controller
+        base_url = f"http://{hub.address}/"
+        pacer = _Pacer(config["pacing"])
+        callers = config["callers"]
+        caller_batches = [batches(commands[index::callers], config["batch"]) for index in range(callers)]
+        requests_before = hub.stats["requests"]
+        latencies = []
+        errors = {}
+        sent = [0]
+        lock = threading.Lock()
+        barrier = threading.Barrier(callers + 1)
+
+        def caller(batch_list):
+            barrier.wait()
+            for batch in batch_list:
+                started = time.monotonic()
+                for (method, path, data), names in batch:
+                    pacer.wait()
+                    error = None
+                    try:
+                        controller._do_hub_action(WiserRestActionEnum(method), base_url + path, data)
+                    except Exception as ex:
+                        error = type(ex).__name__
+                    elapsed = time.monotonic() - started
+                    with lock:
+                        sent[0] += 1
+                        latencies.extend([elapsed] * len(names))
+                        if error:
+                            errors[error] = errors.get(error, 0) + len(names)
+
+        threads = [threading.Thread(target=caller, args=(batch_list,), daemon=True) for batch_list in caller_batches]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.monotonic()
+        for thread in threads:
+            thread.join()
+        duration = time.monotonic() - started
+        hub_requests = hub.stats["requests"] - requests_before
+
+    latencies.sort()
+    error_count = sum(errors.values())
+    return dict(
+        config,
+        commands=len(latencies),
+        requests=sent[0],
+        duration=round(duration, 3),
+        throughput=round(len(latencies) / duration, 1) if duration else 0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 99) * 1000, 2),
+        retries=hub_requests - sent[0],
+        error_rate=round(error_count / len(latencies), 4) if latencies else 0,
+        errors=errors,
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Wiser api command load test")
+    parser.add_argument("--rooms", type=int, default=20, help="Rooms in the synthetic installation")
+    parser.add_argument("--devices", type=int, default=5, help="Devices of each type in the synthetic installation")
+    parser.add_argument("--commands", type=int, default=400, help="Commands to send in each run")
+    parser.add_argument("--mix", type=json.loads, default=DEFAULT_MIX, help=f"Json of command: weight, default {json.dumps(DEFAULT_MIX)}")
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 8, 32], help="Concurrent callers")
+    parser.add_argument("--pool-size", type=int, nargs="+", default=[1, 10], help="Maximum connections to the hub")
+    parser.add_argument("--connection", nargs="+", default=["close"], choices=["close", "keep-alive"])
+    parser.add_argument("--pacing", type=float, nargs="+", default=[0.0], help="Minimum seconds between requests")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1], help="Commands per batch")
+    parser.add_argument("--retries", type=int, default=REST_RETRIES)
+    parser.add_argument("--backoff-factor", type=float, default=REST_BACKOFF_FACTOR)
+    parser.add_argument("--latency", type=float, default=0.005, help="Hub response latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests the hub answers with an error")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[503])
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of connections the hub drops")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="File to save results to")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.mix) - set(COMMANDS)
+    if unknown:
+        parser.error(f"Unknown commands in mix {sorted(unknown)}, choose from {sorted(COMMANDS)}")
+
+    installation = WiserSyntheticInstallation(args.rooms, args.devices, args.seed)
+    try:
+        commands = generate_commands(installation, args.mix, args.commands, args.seed)
+    except ValueError as ex:
+        parser.error(str(ex))
+    header = f"{'callers':>7} {'pool':>4} {'connection':>10} {'pacing':>6} {'batch':>5} {'cmd/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} {'retries':>7} {'errors':>7}"
+    print(header)
+    results = []
+    for callers, pool_size, connection, pacing, batch in itertools.product(
+        args.callers, args.pool_size, args.connection, args.pacing, args.batch
+    ):
+        faults = WiserMockHubFaults(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            error_statuses=tuple(args.error_statuses),
+            drop_rate=args.drop_rate,
+            seed=args.seed,
+        )
+        config = {
+            "callers": callers,
+            "pool_size": pool_size,
+            "connection": connection,
+            "pacing": pacing,
+            "batch": batch,
+            "max_retries": args.retries,
+            "backoff_factor": args.backoff_factor,
+        }
+        result = run_config(installation, faults, commands, config)
+        results.append(result)
+        print(
+            f"{callers:7} {pool_size:4} {connection:>10} {pacing:6} {batch:5} {result['throughput']:8.1f} "
+            f"{result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} {result['retries']:7} {result['error_rate']:7.2%}",
+            flush=True,
+        )
+        if result["errors"]:
+            print(f"{'':7} errors: {result['errors']}")
+
+    if args.output:
+        pathlib.Path(args.output).write_text(
+            json.dumps(
+                {
+                    "meta": {
+                        "api_version": __VERSION__,
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "timestamp": time.time(),
+                        "arguments": vars(args),
+                    },
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
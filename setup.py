@@ -21,6 +21,10 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     install_requires=["ruamel.yaml==0.16.12", "zeroconf", "requests"],
+    extras_require={
+        "parquet": ["pyarrow"],
+        "numpy": ["numpy"],
+    },
     python_requires='>=3.9',
     entry_points = {
         'console_scripts': ['wiser = wiserHeatAPIv2.cli:main'],
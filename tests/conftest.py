@@ -0,0 +1,31 @@
+import json
+import pathlib
+
+import pytest
+
+from wiserHeatAPIv2.const import WISERHUBDOMAIN, WISERHUBNETWORK, WISERHUBOPENTHERM, WISERHUBSCHEDULES
+from wiserHeatAPIv2.rest_controller import _WiserRestController
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+FIXTURE_FILES = {
+    WISERHUBDOMAIN: "domain.json",
+    WISERHUBNETWORK: "network.json",
+    WISERHUBSCHEDULES: "schedule.json",
+    WISERHUBOPENTHERM: "opentherm.json",
+}
+
+
+def load_fixture(url: str) -> dict:
+    return json.loads((FIXTURES / FIXTURE_FILES[url]).read_text())
+
+
+@pytest.fixture
+def fixture_api(monkeypatch) -> WiserAPI:
+    """WiserAPI populated from the json files in tests/fixtures instead of a hub"""
+    monkeypatch.setattr(
+        _WiserRestController,
+        "_get_hub_data",
+        lambda self, url, raise_for_endpoint_error=True: load_fixture(url),
+    )
+    return WiserAPI("fixture", "fixture")
@@ -0,0 +1,42 @@
+import pytest
+
+from wiserHeatAPIv2.battery_forecast import WiserBatteryForecaster
+
+DAY = 86400
+
+
+def _drain(forecaster, device_id, product_type, start_voltage, drain_per_day, days):
+    for day in range(days + 1):
+        forecaster.add_sample(device_id, product_type, day * DAY, round(start_voltage - drain_per_day * day, 1))
+
+
+def test_forecast_and_ranking():
+    forecaster = WiserBatteryForecaster()
+    # iTRV losing 0.1V every 10 days from 2.9V reaches 2.4V in 50 days
+    _drain(forecaster, 1, "iTRV", 2.9, 0.01, 20)
+    # RoomStat draining much slower
+    _drain(forecaster, 2, "RoomStat", 2.7, 0.002, 20)
+    forecaster.add_sample(3, "iTRV", 0, 2.8)
+
+    forecast = forecaster.forecast(1)
+    assert forecast.drain_per_day == pytest.approx(0.01, rel=0.2)
+    assert forecast.days_remaining == pytest.approx(30, abs=5)
+    assert [forecast.device_id for forecast in forecaster.ranked()] == [1, 2, 3]
+    assert forecaster.forecast(3).days_remaining is None
+    assert forecaster.ranked(limit=1)[0] is forecaster.forecasts[1]
+
+
+def test_battery_replacement_restarts_history():
+    forecaster = WiserBatteryForecaster()
+    _drain(forecaster, 1, "iTRV", 2.6, 0.01, 10)
+    forecaster.add_sample(1, "iTRV", 11 * DAY, 3.0)
+    forecast = forecaster.forecast(1)
+    assert forecast.voltage == 3.0
+    assert forecast.days_remaining is None
+
+
+def test_record_from_api(fixture_api):
+    forecaster = WiserBatteryForecaster()
+    forecaster.record(fixture_api, timestamp=0)
+    assert sorted(forecaster.forecasts) == [1, 3]
+    assert forecaster.forecast(3).room_id == 1
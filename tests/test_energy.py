@@ -0,0 +1,58 @@
+import pytest
+
+from wiserHeatAPIv2.energy import WiserEnergyIntegrator
+
+# 2024-01-01 00:00 UTC
+START = 1704067200
+
+
+def test_counter_with_reset():
+    energy = WiserEnergyIntegrator()
+    energy.add_sample(1, START, counter=10000, room_id=1)
+    assert energy.add_sample(1, START + 600, counter=10500, room_id=1) == 0.5
+    # Counter reset to zero and counted 200Wh since
+    assert energy.add_sample(1, START + 1200, counter=200, room_id=1) == 0.2
+    assert energy.total(1) == pytest.approx(0.7)
+
+
+def test_power_fallback_and_gaps():
+    energy = WiserEnergyIntegrator(max_power_gap=900)
+    energy.add_sample(1, START, power=1000)
+    assert energy.add_sample(1, START + 900, power=2000) == pytest.approx(0.375)
+    # Gap too long to integrate power over
+    assert energy.add_sample(1, START + 5000, power=2000) == 0
+    assert energy.add_sample(1, START + 5010, counter=-1, power=None) == 0
+
+
+def test_rollups_spread_over_buckets():
+    energy = WiserEnergyIntegrator()
+    # 3kWh over 22:30 to 01:30, spread evenly across 4 hours and 2 days
+    energy.add_sample(1, START - 5400, counter=0, room_id=1)
+    energy.add_sample(1, START + 5400, counter=3000, room_id=1)
+    energy.add_sample(2, START, counter=0, room_id=2)
+    energy.add_sample(2, START + 60, counter=100, room_id=2)
+
+    assert list(energy.hourly(1).values()) == pytest.approx([0.5, 1, 1, 0.5])
+    assert energy.daily(room_id=1) == pytest.approx({START - 86400: 1.5, START: 1.5})
+    assert energy.daily() == pytest.approx({START - 86400: 1.5, START: 1.6})
+    assert energy.total(room_id=2) == pytest.approx(0.1)
+
+
+def test_record_from_api(fixture_api):
+    energy = WiserEnergyIntegrator()
+    energy.record(fixture_api, timestamp=START)
+    energy.record(fixture_api, timestamp=START + 60)
+    assert sorted(energy.device_ids) == [4, 5]
+    assert energy.total() == 0
+
+
+def test_record_actuator_without_counter(fixture_api):
+    actuator = fixture_api.devices.heating_actuators.all[0]
+    del actuator._device_type_data["CurrentSummationDelivered"]
+    energy = WiserEnergyIntegrator()
+    actuator._device_type_data["InstantaneousDemand"] = 1000
+    energy.record(fixture_api, timestamp=START)
+    actuator._device_type_data["InstantaneousDemand"] = 2000
+    energy.record(fixture_api, timestamp=START + 900)
+    # Falls back to integrating power
+    assert energy.total(actuator.id) == pytest.approx(0.375)
@@ -0,0 +1,61 @@
+import pytest
+
+from wiserHeatAPIv2.export import WiserColumnarExporter, WiserExportFormatEnum
+from wiserHeatAPIv2.history import WiserHistoryStore
+
+# 2024-01-01 23:00 UTC
+START = 1704150000
+
+
+def _rows(count: int, step: float = 600) -> list:
+    return [(START + index * step, 1, 20.5, 21.0, 50, 55, 2.9, -70) for index in range(count)]
+
+
+def test_npz_partitioned_by_day(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    with WiserColumnarExporter(tmp_path, WiserExportFormatEnum.npz, chunk_size=4) as exporter:
+        exporter.write_rows("hub1", _rows(10))
+    assert exporter.rows_written == 10
+    files = [path.relative_to(tmp_path).as_posix() for path in exporter.files]
+    assert files == [
+        "hub=hub1/date=2024-01-01/part-00000.npz",
+        "hub=hub1/date=2024-01-01/part-00001.npz",
+        "hub=hub1/date=2024-01-02/part-00000.npz",
+    ]
+    archive = numpy.load(exporter.files[1])
+    assert archive["temperature"].dtype == numpy.float32
+    assert archive["rssi"].tolist() == [-70] * 2
+
+
+def test_parquet_row_groups(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    with WiserColumnarExporter(tmp_path, chunk_size=2) as exporter:
+        exporter.write_rows("hub1", _rows(5, step=60))
+    table = parquet.read_table(exporter.files[0])
+    assert table.num_rows == 5
+    assert parquet.ParquetFile(exporter.files[0]).num_row_groups == 3
+    assert table.column("room_id").to_pylist() == [1] * 5
+
+
+def test_export_history(fixture_api, tmp_path):
+    numpy = pytest.importorskip("numpy")
+    store = WiserHistoryStore(str(tmp_path / "history.db"), retention_days=None)
+    store.record(fixture_api, timestamp=START)
+    store.flush()
+    with WiserColumnarExporter(tmp_path / "export", WiserExportFormatEnum.npz) as exporter:
+        exporter.export_history(store, "hub1")
+    archive = numpy.load(exporter.files[0])
+    assert archive["room_id"].tolist() == [1, 2]
+    # Lounge has an iTRV and a roomstat, the lowest battery voltage is used
+    assert archive["battery_voltage"][0] == pytest.approx(2.7)
+    assert archive["humidity"][0] == 52
+    assert numpy.isnan(archive["battery_voltage"][1])
+
+
+def test_missing_hub_name(fixture_api, tmp_path):
+    pytest.importorskip("numpy")
+    fixture_api.system.network._data.setdefault("NetworkInterface", {})["HostName"] = None
+    with WiserColumnarExporter(tmp_path, WiserExportFormatEnum.npz) as exporter:
+        exporter.write_rows(None, _rows(1))
+        exporter.record(fixture_api, timestamp=START)
+    assert sorted(path.parent.parent.name for path in exporter.files) == ["hub=fixture", "hub=unknown"]
@@ -0,0 +1,106 @@
+import json
+import threading
+
+import pytest
+
+from wiserHeatAPIv2.const import WISERHUBNETWORK
+from wiserHeatAPIv2.exceptions import WiserHubConnectionError
+from wiserHeatAPIv2.fleet import WiserFleet
+from wiserHeatAPIv2.rest_controller import _WiserRestController
+
+from conftest import load_fixture
+
+
+@pytest.fixture
+def fixture_hubs(monkeypatch):
+    """
+    Hubs named dead-* fail to connect, empty-* return no network data, cold-* report no temperature
+    for room 1 and the rest return the fixture data
+    """
+
+    def get_hub_data(self, url, raise_for_endpoint_error=True):
+        host = self._wiser_connection.host
+        if host.startswith("dead"):
+            raise WiserHubConnectionError(f"Connection timeout trying to communicate with Wiser Hub {host}")
+        data = load_fixture(url)
+        if host.startswith("empty") and url == WISERHUBNETWORK:
+            return {}
+        if host.startswith("cold") and "Room" in data:
+            data["Room"][0]["CalculatedTemperature"] = None
+        return data
+
+    monkeypatch.setattr(_WiserRestController, "_get_hub_data", get_hub_data)
+
+
+def test_refresh_aggregates_errors(fixture_hubs):
+    hubs = [{"name": f"hub{index}", "host": f"host{index}", "secret": "secret"} for index in range(20)]
+    hubs.append({"name": "dead", "host": "dead", "secret": "secret"})
+    with WiserFleet(hubs, max_workers=4) as fleet:
+        errors = fleet.refresh()
+        assert list(errors) == ["dead"]
+        assert "Connection timeout" in errors["dead"]
+        assert len(fleet.apis) == 20
+        assert not fleet.get_hub("dead").is_online
+        assert fleet.get_hub("hub0").is_online
+
+        fleet.refresh()
+        assert fleet.get_hub("dead").consecutive_failures == 2
+        assert fleet.errors == {"dead": fleet.get_hub("dead").last_error}
+
+
+def test_fleet_queries(fixture_hubs):
+    with WiserFleet([{"name": "a", "host": "a", "secret": "s"}, {"name": "b", "host": "b", "secret": "s"}]) as fleet:
+        assert fleet.rooms_below(30) == []
+        fleet.refresh()
+        below = fleet.rooms_below(19)
+        assert sorted((name, room.id) for name, room in below) == [("a", 1), ("b", 1)]
+        assert len(fleet.find_devices(lambda device: device.id == 1)) == 2
+
+
+def test_slow_hub_does_not_block_others(fixture_hubs, monkeypatch):
+    release = threading.Event()
+    original = _WiserRestController._get_hub_data
+
+    def get_hub_data(self, url, raise_for_endpoint_error=True):
+        if self._wiser_connection.host == "slow":
+            release.wait(5)
+        return original(self, url, raise_for_endpoint_error)
+
+    monkeypatch.setattr(_WiserRestController, "_get_hub_data", get_hub_data)
+    hubs = [{"name": name, "host": name, "secret": "s"} for name in ["slow", "fast1", "fast2"]]
+    with WiserFleet(hubs, max_workers=2) as fleet:
+        errors = fleet.refresh(timeout=0.5)
+        assert errors == {"slow": "Refresh timed out"}
+        assert sorted(fleet.apis) == ["fast1", "fast2"]
+        # Not refreshed again while the earlier refresh is still running
+        assert fleet.refresh(timeout=0.5) == {"slow": "Previous refresh still running"}
+        release.set()
+
+
+def test_from_file(tmp_path):
+    config = tmp_path / "hubs.json"
+    config.write_text(json.dumps({"hubs": [{"name": "home", "host": "192.168.1.10", "secret": "s", "units": "imperial"}]}))
+    with WiserFleet.from_file(config) as fleet:
+        assert [hub.host for hub in fleet.hubs] == ["192.168.1.10"]
+        with pytest.raises(ValueError):
+            fleet.add_hub("home", "192.168.1.11", "s")
+
+    pytest.importorskip("ruamel.yaml")
+    config = tmp_path / "hubs.yaml"
+    config.write_text("- name: home\n  host: 192.168.1.10\n  secret: s\n- host: 192.168.1.11\n  secret: s\n")
+    with WiserFleet.from_file(config) as fleet:
+        assert [hub.name for hub in fleet.hubs] == ["home", "192.168.1.11"]
+
+
+def test_incomplete_hub_not_connected(fixture_hubs):
+    with WiserFleet([{"name": "empty", "host": "empty", "secret": "s"}]) as fleet:
+        assert fleet.refresh() == {"empty": "Hub returned no data"}
+        assert fleet.apis == {}
+        assert not fleet.get_hub("empty").is_online
+
+
+def test_rooms_below_skips_missing_temperatures(fixture_hubs):
+    with WiserFleet([{"name": "a", "host": "a", "secret": "s"}, {"name": "cold", "host": "cold", "secret": "s"}]) as fleet:
+        fleet.refresh()
+        assert fleet.get_hub("cold").api.rooms.get_by_id(1).current_temperature is None
+        assert sorted((name, room.id) for name, room in fleet.rooms_below(19)) == [("a", 1)]
@@ -0,0 +1,103 @@
+import sqlite3
+import time
+
+import pytest
+
+from wiserHeatAPIv2.history import WiserHistoryStore, _create_sql
+
+
+def test_batched_writes_and_query(fixture_api, tmp_path):
+    store = WiserHistoryStore(str(tmp_path / "history.db"), batch_size=3, retention_days=None)
+    for timestamp in (100, 200):
+        store.record(fixture_api, timestamp=timestamp)
+    assert store.room_history(1) == []
+    assert store.pending > 0
+
+    store.record(fixture_api, timestamp=300)
+    assert store.pending == 0
+    rows = store.room_history(1, start=150)
+    assert [row["timestamp"] for row in rows] == [200, 300]
+    assert rows[0]["current_temperature"] == 18.5
+    assert rows[0]["current_humidity"] == 52
+    assert store.device_history(3, end=100)[0]["battery_voltage"] == 2.7
+    assert store.hot_water_history(2)[0]["is_heating"] == 0
+    assert store.heating_channel_history(1)[0]["percentage_demand"] == 40
+    store.close()
+
+
+def test_retention(fixture_api, tmp_path):
+    with WiserHistoryStore(str(tmp_path / "history.db"), batch_size=1, retention_days=1) as store:
+        store.record(fixture_api, timestamp=time.time() - 2 * 86400)
+        store.record(fixture_api, timestamp=time.time())
+        store.apply_retention()
+        assert len(store.room_history(1)) == 1
+
+
+def test_attach(fixture_api, tmp_path):
+    store = WiserHistoryStore(str(tmp_path / "history.db"), batch_size=1)
+    store.attach(fixture_api)
+    fixture_api.read_hub_data()
+    store.close()
+    fixture_api.read_hub_data()
+    assert len(WiserHistoryStore(str(tmp_path / "history.db")).room_history(2)) == 1
+
+
+def test_failed_write_keeps_rows(fixture_api, tmp_path):
+    path = str(tmp_path / "history.db")
+    store = WiserHistoryStore(path, batch_size=1, retention_days=None)
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE room_history")
+    other.commit()
+    store.record(fixture_api, timestamp=100)
+    assert store.pending > 0
+
+    other.execute(_create_sql("room"))
+    other.commit()
+    other.close()
+    store.record(fixture_api, timestamp=200)
+    assert store.pending == 0
+    assert [row["timestamp"] for row in store.room_history(1)] == [100, 200]
+
+    store.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.room_history(1)
+
+
+def test_opens_database_without_device_room_id(fixture_api, tmp_path):
+    path = str(tmp_path / "history.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE device_history (timestamp REAL NOT NULL, device_id INTEGER NOT NULL, "
+        "battery_voltage REAL, controller_reception_rssi INTEGER, controller_reception_lqi INTEGER, "
+        "device_reception_rssi INTEGER, device_reception_lqi INTEGER, "
+        "PRIMARY KEY (device_id, timestamp)) WITHOUT ROWID"
+    )
+    connection.execute("INSERT INTO device_history (timestamp, device_id, battery_voltage) VALUES (50, 3, 2.9)")
+    connection.commit()
+    connection.close()
+
+    with WiserHistoryStore(path, batch_size=1, retention_days=None) as store:
+        store.record(fixture_api, timestamp=100)
+        rows = store.device_history(3)
+        assert [row["timestamp"] for row in rows] == [50, 100]
+        assert rows[0]["room_id"] is None and rows[0]["battery_voltage"] == 2.9
+        assert rows[1]["room_id"] is not None
+
+
+def test_failed_writes_keep_limited_rows(fixture_api, tmp_path):
+    path = str(tmp_path / "history.db")
+    store = WiserHistoryStore(path, batch_size=2, retention_days=None)
+    other = sqlite3.connect(path)
+    other.execute("DROP TABLE room_history")
+    other.commit()
+    for timestamp in range(100, 1100, 100):
+        store.record(fixture_api, timestamp=timestamp)
+    # Only the latest 4 batches of 2 refreshes are kept
+    assert sorted({row[0] for row in store._pending["room"]}) == list(range(300, 1100, 100))
+
+    other.execute(_create_sql("room"))
+    other.commit()
+    other.close()
+    store.flush()
+    assert [row["timestamp"] for row in store.room_history(1)] == list(range(300, 1100, 100))
+    store.close()
@@ -0,0 +1,53 @@
+"""
+Import time regression test
+
+Checks that importing the api does not pull in optional heavy dependencies
+(yaml, requests, zeroconf, cli) and that a cold import stays within budget.
+Override the budget with the WISER_IMPORT_BUDGET_MS environment variable.
+"""
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.environ.get("WISER_IMPORT_BUDGET_MS", 150))
+LAZY_MODULES = [
+    "ruamel.yaml",
+    "requests",
+    "urllib3",
+    "zeroconf",
+    "wiserHeatAPIv2.cli",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import wiserHeatAPIv2.wiserhub
+import wiserHeatAPIv2.discovery
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _cold_import() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        check=True,
+        cwd=pathlib.Path(__file__).parent.parent,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_heavy_dependencies_not_imported():
+    modules = _cold_import()["modules"]
+    loaded = [module for module in LAZY_MODULES if module in modules]
+    assert loaded == [], f"Modules imported eagerly: {loaded}"
+
+
+def test_cold_import_within_budget():
+    # Best of 3 to smooth out noise from a busy machine
+    elapsed = min(_cold_import()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_MS, f"Cold import took {elapsed:.1f}ms, budget is {IMPORT_BUDGET_MS}ms"
@@ -0,0 +1,118 @@
+import shutil
+import time
+
+import pytest
+
+from wiserHeatAPIv2.exceptions import WiserHubAuthenticationError, WiserHubRESTError
+from wiserHeatAPIv2.mock_hub import WiserMockHub, WiserMockHubFaults
+from wiserHeatAPIv2.schedule import WiserScheduleTypeEnum
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+from conftest import FIXTURES
+
+requests = pytest.importorskip("requests")
+
+
+@pytest.fixture
+def mock_hub():
+    with WiserMockHub.from_path(FIXTURES) as hub:
+        yield hub
+
+
+def test_serves_hub_data(mock_hub):
+    api = WiserAPI(mock_hub.address, mock_hub.secret)
+    replayed = WiserAPI.from_files(FIXTURES)
+    assert api.raw_hub_data == replayed.raw_hub_data
+    assert mock_hub.stats["requests"] == 4
+
+    with pytest.raises(WiserHubAuthenticationError):
+        WiserAPI(mock_hub.address, "wrong secret")
+
+
+def test_commands_change_state(mock_hub):
+    api = WiserAPI(mock_hub.address, mock_hub.secret)
+    room = api.rooms.get_by_id(1)
+    assert room.set_target_temperature(22.5)
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_target_temperature == 22.5
+    assert api.rooms.get_by_id(1).is_override
+
+    assert api.rooms.get_by_id(1).boost(2, 30)
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).is_boosted
+    assert api.rooms.get_by_id(1).current_target_temperature == 20.5
+
+    assert api.rooms.get_by_id(1).cancel_overrides()
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_target_temperature == 20.0
+
+    assert api.devices.smartplugs.get_by_id(4).turn_off()
+    api.read_hub_data()
+    assert not api.devices.smartplugs.get_by_id(4).is_on
+
+    api.schedules.get_by_id(WiserScheduleTypeEnum.heating, 2).name = "Evenings"
+    api.read_hub_data()
+    assert api.schedules.get_by_id(WiserScheduleTypeEnum.heating, 2).name == "Evenings"
+
+    assert api.schedules.get_by_id(WiserScheduleTypeEnum.heating, 2).delete_schedule()
+    api.read_hub_data()
+    assert api.schedules.get_by_id(WiserScheduleTypeEnum.heating, 2) is None
+
+    assert [method for method, path, data in mock_hub.commands] == ["PATCH"] * 5 + ["DELETE"]
+
+
+def test_junk_bytes_are_tolerated(mock_hub):
+    mock_hub.faults = WiserMockHubFaults(junk_rate=1, junk_bytes=20, seed=1)
+    api = WiserAPI(mock_hub.address, mock_hub.secret)
+    assert api.rooms.get_by_id(1).name == "Lounge"
+    assert mock_hub.stats["junk"] == 4
+
+
+def test_error_statuses_and_latency(mock_hub):
+    mock_hub.faults = WiserMockHubFaults(error_rate=1, error_statuses=(404,))
+    with pytest.raises(WiserHubRESTError):
+        WiserAPI(mock_hub.address, mock_hub.secret)
+
+    mock_hub.faults = WiserMockHubFaults(latency=0.1)
+    started = time.monotonic()
+    response = requests.get(f"http://{mock_hub.address}/data/v2/network/", headers={"SECRET": mock_hub.secret})
+    assert response.ok
+    assert time.monotonic() - started >= 0.1
+
+
+def test_dropped_connections(mock_hub):
+    mock_hub.faults = WiserMockHubFaults(drop_rate=1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        requests.get(f"http://{mock_hub.address}/data/v2/domain/", headers={"SECRET": mock_hub.secret})
+    assert mock_hub.stats["dropped"] == 1
+
+
+def test_error_bursts():
+    faults = WiserMockHubFaults(error_rate=0.1, error_burst=3, error_statuses=(500, 503), seed=3)
+    statuses = [faults._choose()[1] for _ in range(200)]
+    errors = [index for index, status in enumerate(statuses) if status]
+    assert errors
+    assert len(errors) % 3 == 0
+    # Errors come in runs of at least error_burst requests
+    runs = [index for index in errors if index - 1 not in errors]
+    assert all(all(statuses[start + offset] for offset in range(3)) for start in runs)
+
+
+def test_connection_reuse(mock_hub):
+    session = requests.Session()
+    url = f"http://{mock_hub.address}/data/v2/domain/Room/1"
+    headers = {"SECRET": mock_hub.secret}
+    # Keep-alive requests share a connection, closed ones must not be reused
+    for connection in ["keep-alive", "keep-alive", "close", "close", "keep-alive"]:
+        response = session.patch(url, json={"Name": connection}, headers=dict(headers, Connection=connection))
+        assert response.ok
+        assert (response.headers.get("Connection") == "close") == (connection == "close")
+    assert mock_hub.stats["commands"] == 5
+
+
+def test_from_path_expands_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    shutil.copytree(FIXTURES, tmp_path / "wiser_data")
+    with WiserMockHub.from_path("~/wiser_data") as hub:
+        api = WiserAPI(hub.address, hub.secret)
+        assert api.raw_hub_data == WiserAPI.from_files(FIXTURES).raw_hub_data
@@ -0,0 +1,78 @@
+import math
+import time
+
+from wiserHeatAPIv2.exceptions import WiserHubAuthenticationError, WiserHubConnectionError
+from wiserHeatAPIv2.opentherm_sampler import WiserOpenThermSampler
+
+
+def _opentherm_source(monkeypatch, api):
+    flow = iter(range(400, 10000, 10))
+    requested = []
+
+    def get_hub_data(url, raise_for_endpoint_error=True):
+        requested.append(url)
+        return {"operationalData": {"Ch1FlowTemperature": next(flow), "ChPressureBar": 15}}
+
+    monkeypatch.setattr(api._wiser_rest_controller, "_get_hub_data", get_hub_data)
+    return requested
+
+
+def test_rolling_statistics(fixture_api, monkeypatch):
+    requested = _opentherm_source(monkeypatch, fixture_api)
+    sampler = WiserOpenThermSampler(fixture_api, window=10)
+    for timestamp in range(20):
+        assert sampler.sample(timestamp)
+
+    assert set(requested) == {"http://{}/data/v2/opentherm/"}
+    stats = sampler.statistics("ch_flow_temperature")
+    # Only the last 10 samples, 50.0 to 59.0, are kept
+    assert stats["count"] == 10
+    assert (stats["min"], stats["max"], stats["p50"], stats["p90"]) == (50, 59, 54, 58)
+    assert stats["mean"] == 54.5
+    assert sampler.statistics("ch_pressure_bar", start=15)["count"] == 5
+    assert sampler.statistics("hw_temperature")["count"] == 0
+    assert math.isnan(sampler.series.latest("hw_temperature"))
+
+
+def test_errors_counted(fixture_api, monkeypatch):
+    def get_hub_data(url, raise_for_endpoint_error=True):
+        raise WiserHubConnectionError("timeout")
+
+    monkeypatch.setattr(fixture_api._wiser_rest_controller, "_get_hub_data", get_hub_data)
+    sampler = WiserOpenThermSampler(fixture_api)
+    assert sampler.sample() is False
+    assert sampler.errors == 1 and sampler.last_error == "timeout"
+
+
+def test_background_thread(fixture_api, monkeypatch):
+    _opentherm_source(monkeypatch, fixture_api)
+    sampler = WiserOpenThermSampler(fixture_api, interval=0.01)
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    assert not sampler.is_running
+    assert len(sampler.series) >= 3
+
+
+def test_unexpected_errors_counted(fixture_api, monkeypatch):
+    responses = iter([
+        WiserHubAuthenticationError("denied"),
+        ValueError("Expecting value"),
+        {"operationalData": {"Ch1FlowTemperature": 450}},
+    ])
+
+    def get_hub_data(url, raise_for_endpoint_error=True):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(fixture_api._wiser_rest_controller, "_get_hub_data", get_hub_data)
+    sampler = WiserOpenThermSampler(fixture_api)
+    assert sampler.sample() is False
+    assert sampler.sample() is False
+    assert sampler.errors == 2 and sampler.last_error == "Expecting value"
+    assert sampler.sample() is True
+    # A missing pressure reading is not 0 bar
+    assert math.isnan(sampler.series.latest("ch_pressure_bar"))
+    assert sampler.statistics("ch_pressure_bar")["count"] == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from wiserHeatAPIv2.exceptions import WiserHubConnectionError
+from wiserHeatAPIv2.fleet import WiserFleet
+from wiserHeatAPIv2.parallel import WiserProcessParser
+from wiserHeatAPIv2.rest_controller import _WiserRestController
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+from conftest import FIXTURE_FILES, FIXTURES
+
+
+@pytest.fixture
+def fixture_payloads(monkeypatch):
+    """Hubs named dead* fail to connect, the rest return the fixture data undecoded"""
+
+    def get_hub_payload(self, url, raise_for_endpoint_error=True):
+        if self._wiser_connection.host.startswith("dead"):
+            raise WiserHubConnectionError(f"Connection timeout trying to communicate with Wiser Hub {self._wiser_connection.host}")
+        return (FIXTURES / FIXTURE_FILES[url]).read_bytes()
+
+    monkeypatch.setattr(_WiserRestController, "_get_hub_payload", get_hub_payload)
+
+
+@pytest.fixture(scope="module")
+def parser():
+    with WiserProcessParser(max_processes=2) as parser:
+        yield parser
+
+
+def test_refresh_in_process(fixture_payloads, fixture_api, parser):
+    api = WiserAPI._without_data("fixture", "fixture")
+    refreshed = []
+    api.add_refresh_listener(refreshed.append)
+    assert parser.refresh(api)
+    assert refreshed == [api]
+
+    # Same model as building in process, bound to the api's own rest controller
+    assert [room.name for room in api.rooms.all] == [room.name for room in fixture_api.rooms.all]
+    assert api.rooms.get_by_id(1).current_temperature == fixture_api.rooms.get_by_id(1).current_temperature
+    assert api.system.name == fixture_api.system.name
+    assert api.devices.get_by_id(1)._wiser_rest_controller is api._wiser_rest_controller
+    assert api.hotwater._wiser_rest_controller is api._wiser_rest_controller
+
+
+def test_incomplete_data(monkeypatch, parser):
+    monkeypatch.setattr(_WiserRestController, "_get_hub_payload", lambda self, url, raise_for_endpoint_error=True: b"")
+    api = WiserAPI._without_data("fixture", "fixture")
+    assert not parser.refresh(api)
+    assert api.rooms is None
+
+
+def test_fleet_process_mode(fixture_payloads):
+    hubs = [{"name": f"hub{index}", "host": f"host{index}", "secret": "s"} for index in range(6)]
+    hubs.append({"name": "dead", "host": "dead", "secret": "s"})
+    with WiserFleet(hubs, max_workers=4, process_workers=2) as fleet:
+        errors = fleet.refresh()
+        assert list(errors) == ["dead"]
+        assert len(fleet.apis) == 6
+        assert "dead" not in fleet.apis
+        assert len(fleet.rooms_below(19)) == 6
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from wiserHeatAPIv2.exceptions import WiserHubConnectionError
+from wiserHeatAPIv2.poller import WiserPoller
+
+
+def test_refresh_records_health(fixture_api):
+    poller = WiserPoller(fixture_api, interval=10)
+    assert poller.last_success_age is None
+    assert poller.refresh()
+
+    health = poller.health
+    assert health["cycles"] == 1
+    assert health["consecutive_failures"] == 0
+    assert health["last_success_age"] < 1
+    assert health["last_duration"] is not None
+    assert len(poller.durations) == 1
+
+
+def test_failures_and_backoff(fixture_api, monkeypatch):
+    poller = WiserPoller(fixture_api, interval=10)
+    read_hub_data = fixture_api.read_hub_data
+
+    def fail():
+        raise WiserHubConnectionError("Connection timeout trying to communicate with Wiser Hub")
+
+    monkeypatch.setattr(fixture_api, "read_hub_data", fail)
+    assert not poller.refresh()
+    assert not poller.refresh()
+    assert poller.consecutive_failures == 2
+    assert poller.last_error.startswith("Connection timeout")
+    assert poller._interval() == 40
+    for _ in range(5):
+        poller.refresh()
+    assert poller._interval() == 80
+
+    monkeypatch.setattr(fixture_api, "read_hub_data", read_hub_data)
+    assert poller.refresh()
+    assert poller.consecutive_failures == 0
+    assert poller.failures == 7
+    assert poller._interval() == 10
+
+
+def test_refreshes_never_overlap(fixture_api, monkeypatch):
+    poller = WiserPoller(fixture_api, interval=10)
+    release = threading.Event()
+    monkeypatch.setattr(fixture_api, "read_hub_data", lambda: release.wait(5))
+
+    slow = threading.Thread(target=poller.refresh)
+    slow.start()
+    while not poller.is_refreshing:
+        time.sleep(0.001)
+    assert not poller.refresh()
+    assert poller.skipped_ticks == 1
+
+    release.set()
+    slow.join()
+    assert poller.cycles == 1
+
+
+def test_overrun_skips_ticks(fixture_api, monkeypatch):
+    calls = []
+
+    def slow_refresh():
+        calls.append(time.monotonic())
+        time.sleep(0.12)
+        return True
+
+    monkeypatch.setattr(fixture_api, "read_hub_data", slow_refresh)
+    poller = WiserPoller(fixture_api, interval=0.05)
+    poller.start()
+    time.sleep(0.5)
+    poller.stop()
+
+    assert not poller.is_running
+    assert poller.skipped_ticks >= len(calls) - 1 > 0
+    # Missed ticks are not queued, so refreshes stay on the 0.05s grid with no back to back polls
+    assert all(later - earlier >= 0.14 for earlier, later in zip(calls, calls[1:]))
+
+
+def test_poll_now(fixture_api):
+    poller = WiserPoller(fixture_api, interval=60)
+    poller.start()
+    while poller.cycles < 1:
+        time.sleep(0.001)
+    poller.poll_now()
+    deadline = time.monotonic() + 2
+    while poller.cycles < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    poller.stop()
+    assert poller.cycles == 2
+
+
+def test_unexpected_error_keeps_polling(fixture_api, monkeypatch):
+    calls = []
+
+    def garbled():
+        calls.append(time.monotonic())
+        raise ValueError("Expecting value: line 1 column 1 (char 0)")
+
+    monkeypatch.setattr(fixture_api, "read_hub_data", garbled)
+    poller = WiserPoller(fixture_api, interval=0.01)
+    poller.start()
+    deadline = time.monotonic() + 2
+    while poller.failures < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert poller.is_running
+    poller.stop()
+    assert poller.failures >= 2
+    assert poller.last_error.startswith("ValueError")
+
+
+def test_default_policy_follows_commands(fixture_api):
+    poller = WiserPoller(fixture_api)
+    poller.start()
+    fixture_api._wiser_rest_controller._notify_command_listeners(None, "Room/1")
+    assert poller._policy._last_command is not None
+    poller.stop()
+    assert fixture_api._wiser_rest_controller._command_listeners == []
+
+
+def test_stop_timeout_does_not_start_second_loop(fixture_api, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(fixture_api, "read_hub_data", lambda: release.wait(5))
+    poller = WiserPoller(fixture_api, interval=10)
+    poller.start()
+    while not poller.is_refreshing:
+        time.sleep(0.001)
+    poller.stop(timeout=0.01)
+    assert poller.is_running
+    with pytest.raises(RuntimeError):
+        poller.start()
+
+    release.set()
+    poller.stop()
+    assert not poller.is_running
+    poller.start()
+    assert poller.is_running
+    poller.stop()
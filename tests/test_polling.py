@@ -0,0 +1,50 @@
+from wiserHeatAPIv2.polling import WiserPollingPolicy
+
+
+class _OkResponse:
+    ok = True
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def _policy(**kwargs) -> WiserPollingPolicy:
+    return WiserPollingPolicy(
+        active_interval=10, command_interval=5, stable_interval=30, max_interval=100, jitter=0, **kwargs
+    )
+
+
+def _make_stable(api):
+    for room in api.rooms.all:
+        room._data["ControlOutputState"] = "Off"
+
+
+def test_active_and_stable_backoff(fixture_api):
+    policy = _policy()
+    assert policy.is_active(fixture_api)
+    assert policy.next_interval(fixture_api) == 10
+
+    _make_stable(fixture_api)
+    assert not policy.is_active(fixture_api)
+    assert [policy.next_interval(fixture_api) for _ in range(5)] == [30, 45, 67.5, 100, 100]
+    assert policy.next_interval() == 100
+
+
+def test_fast_after_command(fixture_api, monkeypatch):
+    policy = _policy()
+    policy.attach(fixture_api)
+    _make_stable(fixture_api)
+    policy.next_interval(fixture_api)
+    policy.next_interval(fixture_api)
+
+    monkeypatch.setattr(fixture_api._wiser_rest_controller._requests_session, "patch", _OkResponse)
+    fixture_api.rooms.all[0].set_target_temperature(21)
+    assert policy.next_interval(fixture_api) == 5
+    policy.detach()
+
+
+def test_jitter_bounds():
+    policy = WiserPollingPolicy(stable_interval=100, backoff_factor=1, jitter=0.1, seed=1)
+    intervals = [policy.next_interval() for _ in range(50)]
+    assert all(90 <= interval <= 110 for interval in intervals)
+    assert len(set(intervals)) > 1
@@ -0,0 +1,59 @@
+import math
+
+from wiserHeatAPIv2.recorder import WiserRecorder, _WiserRingBuffer
+
+
+def test_ring_buffer_wraps():
+    buffer = _WiserRingBuffer("h", 4)
+    for value in range(6):
+        buffer.append(value)
+    older, newer = buffer.segments()
+    assert isinstance(older, memoryview)
+    assert older.tolist() == [2, 3] and newer.tolist() == [4, 5]
+    assert buffer.to_list() == [2, 3, 4, 5]
+    assert buffer.latest() == 5 and len(buffer) == 4
+
+
+def test_records_on_refresh(fixture_api):
+    recorder = WiserRecorder(capacity=3)
+    recorder.attach(fixture_api)
+    for _ in range(4):
+        fixture_api.read_hub_data()
+
+    lounge = recorder.room(1)
+    assert len(lounge) == 3
+    assert lounge.latest("current_temperature") == 18.5
+    assert lounge.latest("is_heating") == 1
+    assert lounge.latest("percentage_demand") == 60
+    assert recorder.device(1).latest("controller_reception_rssi") == -70
+    assert math.isnan(recorder.device(4).latest("battery_voltage"))
+
+    recorder.detach()
+    fixture_api.read_hub_data()
+    assert len(lounge) == 3
+
+
+def test_window_by_time(fixture_api):
+    recorder = WiserRecorder(capacity=5)
+    for timestamp in range(10):
+        recorder.record(fixture_api, timestamp=timestamp)
+    series = recorder.room(2)
+    timestamps = series.timestamps(6, 8)
+    assert [value for segment in timestamps for value in segment] == [6, 7, 8]
+    window = series.window("current_target_temperature", 6, 8)
+    assert sum(len(segment) for segment in window) == 3
+    assert all(len(segment) == 0 for segment in series.timestamps(start=20))
+
+
+def test_failing_sample_listener(fixture_api):
+    recorder = WiserRecorder(capacity=5)
+    samples = []
+
+    def failing(*args):
+        raise ValueError("listener failed")
+
+    recorder.add_sample_listener(failing)
+    recorder.add_sample_listener(lambda *args: samples.append(args))
+    recorder.record(fixture_api, timestamp=1)
+    assert len(recorder.room(1)) == 1
+    assert samples and samples[0][:3] == ("room", 1, 1)
@@ -0,0 +1,91 @@
+import json
+import shutil
+
+import pytest
+
+from wiserHeatAPIv2.replay import WiserReplay
+from wiserHeatAPIv2.snapshot import save_snapshot
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+from conftest import FIXTURES
+
+
+def _recording(path, temperature):
+    shutil.copytree(FIXTURES, path)
+    domain = json.loads((path / "domain.json").read_text())
+    domain["Room"][0]["CalculatedTemperature"] = temperature
+    (path / "domain.json").write_text(json.dumps(domain))
+
+
+def test_from_files_matches_hub(fixture_api):
+    api = WiserAPI.from_files(FIXTURES)
+    assert api.raw_hub_data == fixture_api.raw_hub_data
+    assert [room.name for room in api.rooms.all] == [room.name for room in fixture_api.rooms.all]
+    assert api.system.name == fixture_api.system.name
+    assert api.devices.get_by_id(1).battery.voltage == fixture_api.devices.get_by_id(1).battery.voltage
+
+
+def test_playback_series(tmp_path):
+    for name, temperature in [("2024-01-01T10-00", 180), ("2024-01-01T10-10", 190), ("2024-01-01T10-20", 200)]:
+        _recording(tmp_path / name, temperature)
+
+    replay = WiserReplay.from_path(tmp_path)
+    api = WiserAPI.from_files(replay)
+    temperatures = [api.rooms.get_by_id(1).current_temperature]
+    while not replay.at_end:
+        api.read_hub_data()
+        temperatures.append(api.rooms.get_by_id(1).current_temperature)
+    assert temperatures == [18.0, 19.0, 20.0]
+    assert replay.name == "2024-01-01T10-20"
+
+    # Stays on the last recording
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_temperature == 20.0
+
+    replay.seek(0)
+    replay.auto_step = False
+    api.read_hub_data()
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_temperature == 18.0
+
+
+def test_playback_snapshots_in_time_order(fixture_api, tmp_path):
+    data = fixture_api.raw_hub_data
+    for name, timestamp, temperature in [("b.snapshot", 1000, 180), ("a.snapshot", 2000, 190)]:
+        data["Domain"]["Room"][0]["CalculatedTemperature"] = temperature
+        save_snapshot(tmp_path / name, "fixture", data, timestamp)
+
+    replay = WiserReplay.from_path(tmp_path)
+    assert replay.names == ["b.snapshot", "a.snapshot"]
+    api = WiserAPI.from_files(replay)
+    assert api.rooms.get_by_id(1).current_temperature == 18.0
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_temperature == 19.0
+
+
+def test_commands_are_recorded():
+    api = WiserAPI.from_files(FIXTURES)
+    sent = []
+    api.add_command_listener(lambda action, url: sent.append(action.value))
+    assert api.rooms.get_by_id(1).set_target_temperature(21)
+
+    replay = api._wiser_rest_controller.replay
+    assert replay.commands == [
+        ("PATCH", "http://replay/data/v2/domain/Room/1", {"RequestOverride": {"Type": "Manual", "SetPoint": 210}})
+    ]
+    assert sent == ["PATCH"]
+    # Data is not changed by commands
+    api.read_hub_data()
+    assert api.rooms.get_by_id(1).current_target_temperature == 20.0
+
+
+def test_missing_recordings(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        WiserReplay.from_path(tmp_path)
+
+
+def test_from_path_expands_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    _recording(tmp_path / "wiser_data", 180)
+    replay = WiserReplay.from_path("~/wiser_data")
+    assert replay.names == ["wiser_data"]
@@ -0,0 +1,88 @@
+import pytest
+
+from wiserHeatAPIv2.exceptions import WiserHubRESTError
+from wiserHeatAPIv2.request_stats import WiserRequestStats
+from wiserHeatAPIv2.rest_controller import WiserRequestEvent
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+from conftest import FIXTURES
+
+pytest.importorskip("requests")
+from wiserHeatAPIv2.mock_hub import WiserMockHub, WiserMockHubFaults  # noqa: E402
+
+
+@pytest.fixture
+def mock_hub():
+    with WiserMockHub.from_path(FIXTURES) as hub:
+        yield hub
+
+
+def _event(endpoint, duration, status=200, error=None, retries=0):
+    return WiserRequestEvent("GET", f"http://hub/data/v2/{endpoint}", status, 0, 100, duration, duration, retries, error)
+
+
+def test_request_events(mock_hub):
+    api = WiserAPI(mock_hub.address, mock_hub.secret)
+    events = []
+    api.add_request_listener(events.append)
+    api.read_hub_data()
+    assert [(event.method, event.endpoint, event.status) for event in events] == [
+        ("GET", "domain/", 200),
+        ("GET", "network/", 200),
+        ("GET", "schedules/", 200),
+        ("GET", "opentherm/", 200),
+    ]
+    assert all(event.bytes_received > 0 and event.retries == 0 and event.error is None for event in events)
+
+    events.clear()
+    mock_hub.faults = WiserMockHubFaults(error_rate=1, error_statuses=(404,))
+    with pytest.raises(WiserHubRESTError):
+        api.rooms.get_by_id(1).set_target_temperature(21)
+    (event,) = events
+    assert (event.method, event.endpoint, event.status, event.error) == ("PATCH", "domain/Room/{id}", 404, "WiserHubRESTError")
+    assert event.bytes_sent > 0
+    assert event.duration >= event.elapsed
+
+    # First request gets a 503, so the read is retried once
+    events.clear()
+    mock_hub.faults = WiserMockHubFaults(error_rate=0.5, error_statuses=(503,), seed=7)
+    api._wiser_rest_controller._get_hub_data("http://{}/data/v2/network/")
+    assert [(event.status, event.retries) for event in events] == [(200, 1)]
+
+    api.remove_request_listener(events.append)
+    api.read_hub_data()
+    assert len(events) == 1
+
+
+def test_request_stats(mock_hub):
+    api = WiserAPI(mock_hub.address, mock_hub.secret)
+    stats = WiserRequestStats()
+    stats.attach(api)
+    api.read_hub_data()
+    api.rooms.get_by_id(1).set_target_temperature(21)
+    assert stats.endpoints == ["GET domain/", "GET network/", "GET opentherm/", "GET schedules/", "PATCH domain/Room/{id}"]
+    assert stats.summary("PATCH domain/Room/{id}")["count"] == 1
+    stats.detach()
+    api.read_hub_data()
+    assert stats.summary("GET domain/")["count"] == 1
+
+
+def test_histogram_and_errors():
+    stats = WiserRequestStats(buckets=[0.1, 1])
+    for duration in [0.05] * 8 + [0.5, 3]:
+        stats.record(_event("domain/", duration))
+    stats.record(_event("domain/", 0.2, status=None, error="WiserHubConnectionError", retries=3))
+
+    summary = stats.summary("GET domain/")
+    assert summary["count"] == 11
+    assert summary["histogram"] == [8, 2, 1]
+    assert summary["errors"] == 1
+    assert summary["error_rate"] == pytest.approx(1 / 11)
+    assert summary["error_classes"] == {"WiserHubConnectionError": 1}
+    assert summary["statuses"] == {200: 10}
+    assert summary["retries"] == 3
+    assert summary["p50"] == 0.1
+    assert stats.percentile("GET domain/", 90) == 1
+    # Slower than the last bucket bound is given as the max duration
+    assert summary["p99"] == 3
+    assert stats.summary("GET network/") is None
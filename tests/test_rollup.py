@@ -0,0 +1,68 @@
+from wiserHeatAPIv2.recorder import WiserRecorder
+from wiserHeatAPIv2.rollup import WiserRollupEngine
+
+# 2024-01-01 00:00 UTC
+START = 1704067200
+
+
+def test_aggregates_per_resolution():
+    engine = WiserRollupEngine()
+    for index in range(180):
+        engine.ingest("room", 1, START + index * 10, {"current_temperature": 18 + index % 6, "is_heating": None})
+
+    minutes = engine.query("room", 1, "current_temperature", START, START + 1800, step=60)
+    assert minutes["resolution"] == 60
+    assert len(minutes["buckets"]) == 30
+    assert minutes["buckets"][0] == (START, 6, 18, 23, 20.5)
+
+    hours = engine.query("room", 1, "current_temperature", START, START + 1800, step=3600)
+    assert hours["resolution"] == 3600
+    assert hours["buckets"] == [(START, 180, 18, 23, 20.5)]
+    assert engine.query("room", 1, "is_heating", START, START + 60)["buckets"] == []
+
+
+def test_coarsest_resolution_for_range():
+    engine = WiserRollupEngine()
+    assert engine.resolution_for(START, START + 3600) == 60
+    assert engine.resolution_for(START, START + 365 * 86400) == 86400
+    assert engine.resolution_for(START, START + 30 * 86400) == 3600
+    assert engine.resolution_for(START, START + 30 * 86400, step=1800) == 900
+
+
+def test_bucket_retention_and_range():
+    engine = WiserRollupEngine({60: 5})
+    for index in range(10):
+        engine.ingest("device", 1, START + index * 60, {"device_reception_rssi": -60 - index})
+    buckets = engine.query("device", 1, "device_reception_rssi", START, START + 3600)["buckets"]
+    assert [bucket[0] for bucket in buckets] == [START + index * 60 for index in range(5, 10)]
+    buckets = engine.query("device", 1, "device_reception_rssi", START + 390, START + 480)["buckets"]
+    assert [bucket[2] for bucket in buckets] == [-66, -67, -68]
+
+
+def test_attach_to_recorder(fixture_api):
+    recorder = WiserRecorder(capacity=10)
+    engine = WiserRollupEngine()
+    engine.attach(recorder)
+    recorder.record(fixture_api, timestamp=START)
+    recorder.record(fixture_api, timestamp=START + 10)
+    engine.detach()
+    recorder.record(fixture_api, timestamp=START + 20)
+    buckets = engine.query("room", 1, "current_temperature", START, START + 60)["buckets"]
+    assert buckets == [(START, 2, 18.5, 18.5, 18.5)]
+
+
+def test_resolution_holds_old_ranges():
+    engine = WiserRollupEngine()
+    # 3 days of samples, 1 minute buckets only keep the last 2
+    for index in range(3 * 1440):
+        engine.ingest("room", 1, START + index * 60, {"current_temperature": 20})
+    first_day = engine.query("room", 1, "current_temperature", START + 3600, START + 7200, step=60)
+    assert first_day["resolution"] == 900
+    assert [bucket[0] for bucket in first_day["buckets"]] == [START + 3600 + index * 900 for index in range(5)]
+    last_day = engine.query("room", 1, "current_temperature", START + 2 * 86400, START + 2 * 86400 + 3600, step=60)
+    assert last_day["resolution"] == 60 and len(last_day["buckets"]) == 61
+
+    assert engine.resolution_for(START, START + 3600, step=60, now=START + 7 * 86400) == 900
+    assert engine.resolution_for(START, START + 86400, now=START + 400 * 86400) == 86400
+    # Older than every retention, so the longest
+    assert engine.resolution_for(START, START + 3600, step=60, now=START + 20 * 365 * 86400) == 86400
@@ -0,0 +1,44 @@
+from wiserHeatAPIv2.helpers.schedule_validation import _WiserScheduleValidator as sv
+from wiserHeatAPIv2.schedule import _WiserHeatingSchedule, _WiserLevelSchedule, _WiserOnOffSchedule
+
+WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def test_valid_schedules():
+    heating = {day: {"Time": [630, 800, 1700, 2230], "DegreesC": [200, 160, 210, -200]} for day in WEEK}
+    onoff = {day: [-2400, 630, -800, 1700] for day in WEEK}
+    level = {day: {"Time": [3000, 700, 4000], "Level": [100, 50, 0]} for day in WEEK}
+    assert sv.validate("Heating", heating) == []
+    assert sv.validate("OnOff", onoff) == []
+    assert sv.validate("Level", level) == []
+
+
+def test_all_errors_returned():
+    errors = sv.validate_heating_day("Monday", {"Time": [700, 700, 600, 2460], "DegreesC": [200, 350, 40, 200]})
+    assert len(errors) == 5
+
+
+def test_yaml_conversion_keeps_invalid_values():
+    heating = _WiserHeatingSchedule(None, "Heating", {"id": 1, "Name": "Test"}, {}, {})
+    schedule = heating._convert_to_wiser_schedule({"Weekdays": [{"Time": "06:30", "Temp": "warm"}]})
+    assert len(heating.validate_schedule(schedule)) == 5
+
+    onoff = _WiserOnOffSchedule(None, "OnOff", {"id": 1, "Name": "Test"}, {}, {})
+    schedule = onoff._convert_to_wiser_schedule({"Monday": [{"Time": "07:00", "State": "Maybe"}]})
+    assert onoff.validate_schedule(schedule) != []
+
+    level = _WiserLevelSchedule(None, "Level", {"id": 1, "Name": "Test", "Type": "Lighting"}, {}, {})
+    schedule = level._convert_to_wiser_schedule({"Monday": [{"Time": "Sunrize", "Level": 50}]})
+    assert level.validate_schedule(schedule) != []
+
+
+def test_invalid_schedule_not_sent():
+    heating = _WiserHeatingSchedule(None, "Heating", {"id": 1, "Name": "Test"}, {}, {})
+    # No rest controller, so this would raise if it tried to send to the hub
+    assert heating.set_schedule({"Monday": {"Time": [700, 600], "DegreesC": [200, 200]}}) is False
+
+
+def test_yaml_conversion_rounds_temperatures():
+    heating = _WiserHeatingSchedule(None, "Heating", {"id": 1, "Name": "Test"}, {}, {})
+    schedule = heating._convert_to_wiser_schedule({"Monday": [{"Time": "06:30", "Temp": 21.3}, {"Time": "22:00", "Temp": "16.1"}]})
+    assert schedule["Monday"]["DegreesC"] == [213, 161]
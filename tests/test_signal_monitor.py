@@ -0,0 +1,33 @@
+from wiserHeatAPIv2.signal_monitor import WiserSignalMonitor
+
+
+def test_sharp_drop_flagged_after_warmup():
+    monitor = WiserSignalMonitor(warmup=5)
+    for index in range(30):
+        assert monitor.update(1, {"device_reception_rssi": -60 - index % 3, "device_reception_lqi": None}, index) == []
+    assert monitor.degraded == {}
+
+    assert monitor.update(1, {"device_reception_rssi": -85}, 30) == ["device_reception_rssi"]
+    assert monitor.degraded == {1: ["device_reception_rssi"]}
+    # Still degraded, but only reported when it first happens
+    assert monitor.update(1, {"device_reception_rssi": -86}, 31) == []
+
+    for index in range(32, 40):
+        monitor.update(1, {"device_reception_rssi": -61}, index)
+    assert monitor.degraded == {}
+    assert "device_reception_lqi" not in monitor.trends(1)
+
+
+def test_no_flag_during_warmup():
+    monitor = WiserSignalMonitor(warmup=5)
+    monitor.update(1, {"device_reception_rssi": -60}, 0)
+    assert monitor.update(1, {"device_reception_rssi": -90}, 1) == []
+
+
+def test_record_from_api(fixture_api):
+    monitor = WiserSignalMonitor()
+    monitor.attach(fixture_api)
+    fixture_api.read_hub_data()
+    fixture_api.read_hub_data()
+    trend = monitor.trend(1, "controller_reception_lqi")
+    assert trend.samples == 2 and trend.mean == 140
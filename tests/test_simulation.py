@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from wiserHeatAPIv2.simulation import (
+    WiserHeatingSimulator,
+    WiserSimulationOriginEnum,
+    WiserSimulationScenario,
+    _WiserSimulationRoom,
+    compile_schedule,
+)
+
+WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SCHEDULE = {day: {"Time": [630, 830, 1700, 2230], "DegreesC": [200, 160, 210, -200]} for day in WEEK}
+# Monday 00:00
+START = datetime(2024, 1, 1)
+
+
+def _simulator(**kwargs) -> WiserHeatingSimulator:
+    rooms = [
+        _WiserSimulationRoom(1, "Lounge", compile_schedule(SCHEDULE)),
+        _WiserSimulationRoom(2, "Office", compile_schedule(SCHEDULE), away_mode_suppressed=True),
+    ]
+    return WiserHeatingSimulator(rooms, START, away_mode_target_temperature=12, **kwargs)
+
+
+def test_schedule_only():
+    result = _simulator().simulate(days=1)
+    assert result.setpoint_at(1, 0) == -20
+    assert result.setpoint_at(1, 7 * 60) == 20
+    assert result.setpoint_at(1, 12 * 60) == 16
+
+
+def test_overrides_and_away():
+    scenario = (
+        WiserSimulationScenario()
+        .boost(1, 2, 60, start=7 * 60)
+        .set_target_temperature(1, 25, start=9 * 60)
+        .away(start=1440)
+    )
+    result = _simulator().simulate(scenario, days=2)
+    assert result.setpoint_at(1, 7 * 60 + 30) == 22
+    # Override lasts until next schedule change at 17:00
+    assert result.setpoint_at(1, 16 * 60) == 25
+    assert result.setpoint_at(1, 17 * 60) == 21
+    assert result.setpoint_at(1, 1440 + 7 * 60) == 12
+    # Away mode suppressed
+    assert result.setpoint_at(2, 1440 + 7 * 60) == 20
+
+
+def test_comfort_mode_preheats():
+    result = _simulator(comfort_mode_enabled=True, comfort_lead_minutes=45).simulate(days=1)
+    assert result.setpoint_at(1, 6 * 60) == 20
+    assert result.segments(1)[1][3] == WiserSimulationOriginEnum.comfort
@@ -0,0 +1,90 @@
+import threading
+
+from wiserHeatAPIv2 import snapshot as snapshot_module
+from wiserHeatAPIv2.rest_controller import _WiserRestController
+from wiserHeatAPIv2.snapshot import load_snapshot, save_snapshot
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+from conftest import load_fixture
+
+
+def test_round_trip(fixture_api, tmp_path):
+    path = tmp_path / "hub.snapshot"
+    assert fixture_api.save_snapshot(path)
+    snapshot = load_snapshot(path, "fixture")
+    assert snapshot.host == "fixture"
+    assert snapshot.age < 60
+    assert snapshot.data == fixture_api.raw_hub_data
+    assert path.stat().st_size < len(str(fixture_api.raw_hub_data))
+
+
+def test_rejects_incompatible_files(fixture_api, tmp_path, monkeypatch):
+    path = tmp_path / "hub.snapshot"
+    fixture_api.save_snapshot(path)
+    assert load_snapshot(path, "other-hub") is None
+    assert load_snapshot(tmp_path / "missing.snapshot") is None
+
+    schema_version = snapshot_module.SNAPSHOT_SCHEMA_VERSION
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SCHEMA_VERSION", schema_version + 1)
+    assert load_snapshot(path) is None
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SCHEMA_VERSION", schema_version)
+    assert load_snapshot(path) is not None
+
+    content = bytearray(path.read_bytes())
+    content[-1] ^= 0xFF
+    path.write_bytes(bytes(content))
+    assert load_snapshot(path) is None
+
+    path.write_bytes(b"not a snapshot at all")
+    assert load_snapshot(path) is None
+
+    save_snapshot(path, "fixture", {"Domain": [], "Network": {}})
+    assert load_snapshot(path) is None
+
+
+def test_warm_start(fixture_api, tmp_path, monkeypatch):
+    path = tmp_path / "hub.snapshot"
+    fixture_api.save_snapshot(path)
+
+    release = threading.Event()
+
+    def slow_hub(self, url, raise_for_endpoint_error=True):
+        release.wait(5)
+        data = load_fixture(url)
+        if "Room" in data:
+            data["Room"][0]["CalculatedTemperature"] = 210
+        return data
+
+    monkeypatch.setattr(_WiserRestController, "_get_hub_data", slow_hub)
+    api = WiserAPI("fixture", "fixture", snapshot_file=path)
+    assert api.is_stale
+    assert api.rooms.get_by_id(1).current_temperature == 18.5
+    assert not api.wait_until_fresh(0.01)
+
+    release.set()
+    assert api.wait_until_fresh(5)
+    assert not api.is_stale
+    assert api.rooms.get_by_id(1).current_temperature == 21.0
+    assert load_snapshot(path).data["Domain"]["Room"][0]["CalculatedTemperature"] == 210
+
+
+def test_cold_start_saves_snapshot(fixture_api, tmp_path):
+    path = tmp_path / "hub.snapshot"
+    api = WiserAPI("fixture", "fixture", snapshot_file=path)
+    assert not api.is_stale
+    assert api.wait_until_fresh()
+    assert load_snapshot(path, "fixture").data == api.raw_hub_data
+
+
+def test_warm_start_unexpected_error(fixture_api, tmp_path, monkeypatch, caplog):
+    path = tmp_path / "hub.snapshot"
+    fixture_api.save_snapshot(path)
+
+    def garbled_hub(self, url, raise_for_endpoint_error=True):
+        raise ValueError("Expecting value")
+
+    monkeypatch.setattr(_WiserRestController, "_get_hub_data", garbled_hub)
+    api = WiserAPI("fixture", "fixture", snapshot_file=path)
+    assert not api.wait_until_fresh(5)
+    assert api.is_stale and api.rooms.get_by_id(1).current_temperature == 18.5
+    assert "Expecting value" in caplog.text
@@ -0,0 +1,39 @@
+from datetime import date
+
+from wiserHeatAPIv2.helpers.special_times import _WiserSunTimes
+
+LONDON = (51.5074, -0.1278)
+
+
+def _minutes(time: str) -> int:
+    return int(time[:2]) * 60 + int(time[3:])
+
+
+def test_london_sun_times():
+    sun = _WiserSunTimes(*LONDON)
+    # Midsummer (BST) and midwinter (GMT) reference times
+    for day, sunrise, sunset in [(date(2024, 6, 21), "04:43", "21:21"), (date(2024, 12, 21), "08:04", "15:53")]:
+        times = sun.times(day)
+        assert abs(_minutes(times[0]) - _minutes(sunrise)) <= 2
+        assert abs(_minutes(times[1]) - _minutes(sunset)) <= 2
+
+
+def test_month_and_polar():
+    assert len(_WiserSunTimes(*LONDON).month(2024, 2)) == 29
+    assert _WiserSunTimes(78.2, 15.6).times(date(2024, 6, 21)) == (None, None)
+
+
+def test_resolve_special_times():
+    sun = _WiserSunTimes(*LONDON)
+    day = date(2024, 6, 21)
+    assert sun.resolve(3000, day) == sun.sunrise(day)
+    assert sun.resolve("Sunset", day) == sun.sunset(day)
+
+
+def test_schedules_follow_timezone_change(fixture_api, monkeypatch):
+    system = fixture_api.system
+    monkeypatch.setattr(system, "_send_command", lambda data: True)
+    schedule = fixture_api.schedules.all[0]
+    before = schedule._sun_times
+    system.timezone_offset = system.timezone_offset + 60
+    assert schedule._sun_times is system.sun_times and schedule._sun_times is not before
@@ -0,0 +1,73 @@
+import pytest
+
+from wiserHeatAPIv2.const import SYNTHETIC_PRODUCT_TYPES
+from wiserHeatAPIv2.replay import WiserReplay
+from wiserHeatAPIv2.schedule import WiserScheduleTypeEnum
+from wiserHeatAPIv2.synthetic import WiserSyntheticInstallation
+from wiserHeatAPIv2.wiserhub import WiserAPI
+
+
+def _api(installation):
+    return WiserAPI.from_files(WiserReplay([installation.recording]))
+
+
+def test_ids_and_links_are_consistent():
+    installation = WiserSyntheticInstallation(rooms=7, devices=3)
+    domain = installation.data["Domain"]
+    devices = domain["Device"]
+    assert len(devices) == 1 + 3 * len(SYNTHETIC_PRODUCT_TYPES)
+    assert len({device["id"] for device in devices}) == len(devices)
+    assert len({device["NodeId"] for device in devices}) == len(devices)
+
+    # Every parent is the controller or a mains powered device
+    node_types = {device["NodeId"]: device["ProductType"] for device in devices}
+    for device in devices[1:]:
+        assert node_types[device["ParentNodeId"]] not in ["iTRV", "RoomStat"]
+
+    # Every referenced device and schedule exists
+    device_ids = {device["id"] for device in devices}
+    schedule_ids = {
+        schedule_type: {schedule["id"] for schedule in schedules}
+        for schedule_type, schedules in installation.data["Schedule"].items()
+    }
+    for room in domain["Room"]:
+        assert room["ScheduleId"] in schedule_ids["Heating"]
+        for device_id in room.get("SmartValveIds", []) + room.get("HeatingActuatorIds", []):
+            assert device_id in device_ids
+    for plug in domain["SmartPlug"]:
+        assert plug["ScheduleId"] in schedule_ids["OnOff"]
+    for item in domain["Light"] + domain["Shutter"]:
+        assert item["DeviceId"] in device_ids
+        assert item["ScheduleId"] in schedule_ids["Level"]
+
+
+def test_builds_api():
+    installation = WiserSyntheticInstallation(rooms=20, devices={"iTRV": 40, "RoomStat": 20, "DimmableLight": 5, "Shutter": 2})
+    api = _api(installation)
+    assert len(api.rooms.all) == 20
+    assert api.devices.count == 67
+    assert len(api.devices.smartvalves.all) == 40
+    assert all(len(room.smartvalve_ids) == 2 and room.roomstat_id for room in api.rooms.all)
+    assert api.devices.get_by_room_id(1) == api.rooms.get_by_id(1).devices
+    assert api.devices.lights.all[0].schedule.schedule_type == "Lighting"
+    assert api.devices.shutters.all[0].schedule.schedule_type == "Shutters"
+    assert api.schedules.get_by_id(WiserScheduleTypeEnum.heating, api.rooms.get_by_id(3).schedule_id).name == "Room 3"
+    assert api.zigbee_topology().orphans == []
+
+
+def test_deterministic_and_saved(tmp_path):
+    assert WiserSyntheticInstallation(5, 2, seed=1).data == WiserSyntheticInstallation(5, 2, seed=1).data
+    assert WiserSyntheticInstallation(5, 2, seed=1).data != WiserSyntheticInstallation(5, 2, seed=2).data
+
+    installation = WiserSyntheticInstallation(5, 2)
+    installation.save(tmp_path)
+    assert WiserAPI.from_files(tmp_path).raw_hub_data == _api(installation).raw_hub_data
+
+    with pytest.raises(ValueError):
+        WiserSyntheticInstallation(5, {"Boiler": 1})
+
+
+def test_save_expands_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    WiserSyntheticInstallation(2, 1).save("~/wiser_synthetic")
+    assert (tmp_path / "wiser_synthetic" / "domain.json").is_file()
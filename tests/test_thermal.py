@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+from wiserHeatAPIv2.recorder import WiserRecorder
+from wiserHeatAPIv2.thermal import WiserThermalEstimator
+
+
+def test_heating_and_cooling_fit():
+    estimator = WiserThermalEstimator()
+    timestamp, temperature = 0, 15.0
+    # Heat at 2 degrees per hour for 2 hours, sampled every 5 minutes
+    for _ in range(24):
+        estimator.add_sample(1, timestamp, temperature, True)
+        timestamp += 300
+        temperature += 2 * 300 / 3600
+    # Newton cooling towards 10 degrees with a 5 hour time constant
+    for _ in range(60):
+        estimator.add_sample(1, timestamp, temperature, False)
+        timestamp += 300
+        temperature = 10 + (temperature - 10) * math.exp(-300 / (5 * 3600))
+
+    estimate = estimator.estimate(1)
+    assert estimate.heating_rate == pytest.approx(2, abs=0.01)
+    assert estimate.cooling_rate > 0
+    assert estimate.time_constant == pytest.approx(5, rel=0.05)
+
+
+def test_gaps_and_missing_values_ignored():
+    estimator = WiserThermalEstimator(max_gap=600)
+    estimator.add_sample(1, 0, 20, True)
+    estimator.add_sample(1, 3600, 25, True)
+    estimator.add_sample(1, 3900, math.nan, True)
+    estimator.add_sample(1, 4200, 25, True)
+    assert estimator.estimate(1).heating_samples == 0
+    assert estimator.estimate(1).heating_rate is None
+
+
+def test_incremental_update_from_recorder(fixture_api):
+    recorder = WiserRecorder(capacity=100)
+    estimator = WiserThermalEstimator()
+    for timestamp in range(0, 3000, 300):
+        recorder.record(fixture_api, timestamp=timestamp)
+    estimator.update_from_recorder(recorder)
+    assert estimator.estimate(1).heating_samples == 9
+    recorder.record(fixture_api, timestamp=3000)
+    estimator.update_from_recorder(recorder)
+    estimator.update_from_recorder(recorder)
+    assert estimator.estimate(1).heating_samples == 10
+    assert estimator.estimate(1).heating_rate == 0
+    assert estimator.estimate(2).cooling_samples == 10
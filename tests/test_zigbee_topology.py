@@ -0,0 +1,32 @@
+from wiserHeatAPIv2.helpers.zigbee import _WiserZigbeeTopology
+
+
+def test_topology_from_api(fixture_api):
+    topology = fixture_api.zigbee_topology()
+    assert topology is fixture_api.zigbee_topology()
+    assert topology.controller.node_id == 0
+    assert topology.controller.child_count == 3
+    assert topology.max_depth == 2
+
+    trv = topology.get_by_device_id(1)
+    assert trv.depth == 2
+    assert trv.path == [4721, 27014, 0]
+    # Weakest of the iTRV link (150) and the smart plug link (160)
+    assert trv.path_lqi == 150
+    assert [node.device_id for node in topology.routers] == [4]
+    assert topology.weakest_paths(limit=1) == [trv]
+    assert topology.orphans == []
+
+    fixture_api.read_hub_data()
+    assert fixture_api.zigbee_topology() is not topology
+
+
+def test_orphans_and_cycles():
+    topology = _WiserZigbeeTopology([
+        {"id": 0, "NodeId": 0, "ProductType": "Controller"},
+        {"id": 1, "NodeId": 10, "ParentNodeId": 99, "ProductType": "iTRV"},
+        {"id": 2, "NodeId": 20, "ParentNodeId": 30, "ProductType": "SmartPlug"},
+        {"id": 3, "NodeId": 30, "ParentNodeId": 20, "ProductType": "SmartPlug"},
+    ])
+    assert sorted(node.device_id for node in topology.orphans) == [1, 2, 3]
+    assert topology.max_depth == 0
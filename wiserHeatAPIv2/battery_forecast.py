@@ -0,0 +1,229 @@
+"""
+Battery drain forecasting
+
+Tracks battery voltage of iTRVs and RoomStats over time and forecasts the days
+until each battery reaches the minimum voltage of its device type.  Each device
+keeps running least-squares sums of voltage against time, and forecasts for all
+devices are calculated together and cached until new samples arrive.
+"""
+import time
+from datetime import datetime, timedelta
+
+from .const import (
+    BATTERY_FORECAST_MIN_DAYS,
+    BATTERY_REPLACED_VOLTAGE_RISE,
+    ROOMSTAT_MIN_BATTERY_LEVEL,
+    TRV_MIN_BATTERY_LEVEL,
+)
+from .helpers.statistics import _WiserLeastSquares
+
+# Product type: voltage at which the battery needs replacing
+BATTERY_MIN_VOLTAGES = {
+    "iTRV": TRV_MIN_BATTERY_LEVEL,
+    "RoomStat": ROOMSTAT_MIN_BATTERY_LEVEL,
+}
+
+
+class _WiserBatteryForecast(object):
+    """Battery forecast for a device"""
+
+    def __init__(
+        self,
+        device_id: int,
+        product_type: str,
+        room_id: int,
+        voltage: float,
+        minimum_voltage: float,
+        drain_per_day: float,
+        days_remaining: float,
+        forecast_time: float,
+    ):
+        self._device_id = device_id
+        self._product_type = product_type
+        self._room_id = room_id
+        self._voltage = voltage
+        self._minimum_voltage = minimum_voltage
+        self._drain_per_day = drain_per_day
+        self._days_remaining = days_remaining
+        self._forecast_time = forecast_time
+
+    def __repr__(self) -> str:
+        return (
+            f"<_WiserBatteryForecast device_id={self._device_id} product_type={self._product_type} "
+            f"voltage={self._voltage} days_remaining={self._days_remaining}>"
+        )
+
+    @property
+    def device_id(self) -> int:
+        return self._device_id
+
+    @property
+    def product_type(self) -> str:
+        return self._product_type
+
+    @property
+    def room_id(self) -> int:
+        return self._room_id
+
+    @property
+    def voltage(self) -> float:
+        """Get latest battery voltage"""
+        return self._voltage
+
+    @property
+    def minimum_voltage(self) -> float:
+        """Get voltage at which the battery needs replacing"""
+        return self._minimum_voltage
+
+    @property
+    def drain_per_day(self) -> float:
+        """Get fitted voltage drop per day, or None if there is not enough history"""
+        return self._drain_per_day
+
+    @property
+    def days_remaining(self) -> float:
+        """Get forecast days until replacement, or None if it cannot be forecast yet"""
+        return self._days_remaining
+
+    @property
+    def replacement_date(self) -> datetime:
+        """Get forecast replacement date, or None if it cannot be forecast yet"""
+        if self._days_remaining is None:
+            return None
+        return datetime.fromtimestamp(self._forecast_time) + timedelta(days=self._days_remaining)
+
+
+class _WiserBatteryHistory(object):
+    """Running voltage fit for a device since its battery was last replaced"""
+
+    __slots__ = ("product_type", "room_id", "first_timestamp", "last_timestamp", "last_voltage", "fit")
+
+    def __init__(self, product_type: str, room_id: int, timestamp: float):
+        self.product_type = product_type
+        self.room_id = room_id
+        self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.last_voltage = None
+        self.fit = _WiserLeastSquares()
+
+
+class WiserBatteryForecaster(object):
+    """
+    Forecasts battery replacement for all battery powered devices.
+    A rise in voltage of BATTERY_REPLACED_VOLTAGE_RISE or more is treated as a
+    battery change and restarts the history for that device.
+    """
+
+    def __init__(self, min_history_days: float = BATTERY_FORECAST_MIN_DAYS):
+        self._min_history_days = min_history_days
+        self._devices = {}
+        self._forecasts = None
+        self._api = None
+
+    def add_sample(self, device_id: int, product_type: str, timestamp: float, voltage: float, room_id: int = None) -> None:
+        """
+        Add a battery voltage sample.  Samples for a device must be added in time order
+        param device_id: device id
+        param product_type: device product type, iTRV or RoomStat
+        param timestamp: unix timestamp
+        param voltage: battery voltage
+        param room_id: room id of device
+        """
+        if product_type not in BATTERY_MIN_VOLTAGES or not voltage:
+            return
+        history = self._devices.get(device_id)
+        if history is None or (
+            history.last_voltage is not None and voltage - history.last_voltage >= BATTERY_REPLACED_VOLTAGE_RISE
+        ):
+            history = self._devices[device_id] = _WiserBatteryHistory(product_type, room_id, timestamp)
+
+        history.fit.add((timestamp - history.first_timestamp) / 86400, voltage)
+        history.last_timestamp = timestamp
+        history.last_voltage = voltage
+        history.room_id = room_id
+        self._forecasts = None
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add a sample for each battery powered device of api
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for device in api.devices.all if api.devices else []:
+            battery = getattr(device, "battery", None)
+            if battery:
+                self.add_sample(
+                    device.id, device.product_type, timestamp, battery.voltage, getattr(device, "room_id", None)
+                )
+
+    def attach(self, api) -> None:
+        """
+        Add samples after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop adding samples from attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def _forecast(self, device_id: int, history: _WiserBatteryHistory) -> _WiserBatteryForecast:
+        minimum_voltage = BATTERY_MIN_VOLTAGES[history.product_type]
+        history_days = (history.last_timestamp - history.first_timestamp) / 86400
+        drain_per_day = None
+        days_remaining = None
+
+        if history.last_voltage <= minimum_voltage:
+            days_remaining = 0
+        elif history_days >= self._min_history_days:
+            slope = history.fit.slope
+            drain_per_day = round(-slope, 5) if slope is not None else 0
+            if slope is not None and slope < 0:
+                voltage = min(history.fit.predict(history_days), history.last_voltage)
+                days_remaining = round(max(0, (voltage - minimum_voltage) / -slope), 1)
+
+        return _WiserBatteryForecast(
+            device_id,
+            history.product_type,
+            history.room_id,
+            history.last_voltage,
+            minimum_voltage,
+            drain_per_day,
+            days_remaining,
+            history.last_timestamp,
+        )
+
+    @property
+    def forecasts(self) -> dict:
+        """Get forecasts for all battery devices keyed by device id, cached until new samples are added"""
+        if self._forecasts is None:
+            self._forecasts = {
+                device_id: self._forecast(device_id, history) for device_id, history in self._devices.items()
+            }
+        return self._forecasts
+
+    def forecast(self, device_id: int) -> _WiserBatteryForecast:
+        """Get forecast for device or None if it has no battery samples"""
+        return self.forecasts.get(device_id)
+
+    def ranked(self, limit: int = None) -> list:
+        """
+        Get forecasts with the soonest replacement first.
+        Devices that cannot be forecast yet are listed last, lowest voltage first
+        param limit: maximum number of forecasts to return
+        return: list of forecasts
+        """
+        ranked = sorted(
+            self.forecasts.values(),
+            key=lambda forecast: (
+                forecast.days_remaining is None,
+                forecast.days_remaining if forecast.days_remaining is not None else 0,
+                forecast.voltage - forecast.minimum_voltage,
+            ),
+        )
+        return ranked[:limit] if limit else ranked
@@ -11,11 +11,91 @@ TEMP_HW_ON = 110
 TEMP_HW_OFF = -20
 TEMP_OFF = -20
 
+# Schedule Constants
+SCHEDULE_LEVEL_MINIMUM = 0
+SCHEDULE_LEVEL_MAXIMUM = 100
+
+# Simulation Constants
+SIMULATION_COMFORT_LEAD_MINUTES = 60
+SIMULATION_ECO_LEAD_MINUTES = 30
+
+# Polling Constants
+POLLING_ACTIVE_INTERVAL = 10
+POLLING_COMMAND_INTERVAL = 5
+POLLING_COMMAND_WINDOW = 60
+POLLING_STABLE_INTERVAL = 30
+POLLING_MAX_INTERVAL = 300
+POLLING_BACKOFF_FACTOR = 1.5
+POLLING_JITTER = 0.1
+
+# Poller Constants
+POLLER_TIMING_HISTORY = 100
+POLLER_FAILURE_BACKOFF_LIMIT = 8
+
+# Fleet Constants
+FLEET_DEFAULT_MAX_WORKERS = 16
+
+# Snapshot Constants
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_SCHEMA_VERSION = 1
+SNAPSHOT_SAVE_INTERVAL = 300
+
+# Synthetic Installation Constants
+SYNTHETIC_PRODUCT_TYPES = ["iTRV", "RoomStat", "SmartPlug", "HeatingActuator", "UnderFloorHeating", "Shutter", "OnOffLight", "DimmableLight"]
+# Mains powered devices route for battery powered ones
+SYNTHETIC_ROUTER_TYPES = ["SmartPlug", "HeatingActuator", "UnderFloorHeating", "Shutter", "OnOffLight", "DimmableLight"]
+SYNTHETIC_ROUTER_CHILDREN = 6
+SYNTHETIC_UFH_RELAYS = 4
+
+# Recorder Constants
+# One day of samples at a 10 second refresh interval
+RECORDER_DEFAULT_CAPACITY = 8640
+
+# Rollup Constants
+# Bucket size in seconds: number of buckets kept
+ROLLUP_RESOLUTIONS = {60: 2880, 900: 2976, 3600: 8784, 86400: 3660}
+ROLLUP_DEFAULT_MAX_POINTS = 1000
+
+# History Constants
+HISTORY_DEFAULT_BATCH_SIZE = 30
+# Batches of rows kept while writes fail, older rows are dropped
+HISTORY_MAX_PENDING_BATCHES = 4
+HISTORY_DEFAULT_RETENTION_DAYS = 90
+HISTORY_RETENTION_INTERVAL = 3600
+
+# Export Constants
+EXPORT_DEFAULT_CHUNK_SIZE = 50000
+
+# Thermal Estimator Constants
+THERMAL_MAX_SAMPLE_GAP = 900
+THERMAL_MIN_SAMPLES = 10
+
+# Signal Monitor Constants
+SIGNAL_MONITOR_ALPHA = 0.05
+SIGNAL_MONITOR_THRESHOLD = 3
+SIGNAL_MONITOR_WARMUP = 20
+SIGNAL_MONITOR_MIN_DEVIATION = 2
+
+# Request Stats Constants
+# Upper bounds in seconds of request duration histogram buckets, slower requests are counted in a last bucket
+REQUEST_STATS_BUCKETS = [0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# OpenTherm Sampler Constants
+OPENTHERM_SAMPLER_DEFAULT_INTERVAL = 5
+OPENTHERM_SAMPLER_DEFAULT_WINDOW = 720
+
+# Energy Constants
+ENERGY_MAX_POWER_GAP = 900
+ENERGY_HOURLY_RETENTION = 744
+ENERGY_DAILY_RETENTION = 400
+
 # Battery Constants
 ROOMSTAT_MIN_BATTERY_LEVEL = 1.7
 ROOMSTAT_FULL_BATTERY_LEVEL = 2.7
 TRV_FULL_BATTERY_LEVEL = 3.0
 TRV_MIN_BATTERY_LEVEL = 2.4
+BATTERY_FORECAST_MIN_DAYS = 2
+BATTERY_REPLACED_VOLTAGE_RISE = 0.2
 
 # Other Constants
 REST_BACKOFF_FACTOR = 1
@@ -49,6 +129,7 @@ WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 WEEKENDS = ["Saturday", "Sunday"]
 SPECIAL_DAYS = [TEXT_WEEKDAYS, TEXT_WEEKENDS]
 SPECIAL_TIMES = {"Sunrise":3000, "Sunset": 4000}
+SUN_TIMES_CACHE_SIZE = 1000
 
 # Battery Level Enum
 TRV_BATTERY_LEVEL_MAPPING = { 3.0:100, 2.9:80, 2.8:60, 2.7:40, 2.6:30, 2.5:20, 2.4:10, 2.3:0 }
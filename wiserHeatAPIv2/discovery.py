@@ -1,8 +1,10 @@
 from . import _LOGGER
 
 from time import sleep
-from typing import cast
-from zeroconf import ServiceBrowser, ServiceStateChange, Zeroconf
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from zeroconf import ServiceStateChange, Zeroconf
 
 class _WiserDiscoveredHub(object):
 
@@ -35,15 +37,17 @@ class WiserDiscovery(object):
 
     def _zeroconf_on_service_state_change(
         self,
-        zeroconf: Zeroconf,
+        zeroconf: "Zeroconf",
         service_type: str,
         name: str,
-        state_change: ServiceStateChange,
+        state_change: "ServiceStateChange",
     ) -> None:
         """
         Look for Wiser Hub in discovered services and set IP and Name in
         global vars
         """
+        from zeroconf import ServiceStateChange
+
         if state_change is ServiceStateChange.Added:
             if "WiserHeat" in name:
                 info = zeroconf.get_service_info(service_type, name)
@@ -72,6 +76,8 @@ class WiserDiscovery(object):
         param (optional) max_search_time: max seconds to wait for responses before returning
         return: list of discovered hubs
         """
+        from zeroconf import ServiceBrowser, Zeroconf
+
         timeout = 0
 
         zeroconf = Zeroconf()
@@ -0,0 +1,197 @@
+"""
+Energy accounting
+
+Turns successive smart plug and heating actuator readings into kWh per device
+and per room, with hourly and daily rollups.  Energy comes from the delivered
+energy counter (Wh) where the device reports one, and otherwise from the
+instantaneous power (W) averaged over the interval.  Counter resets are
+detected and energy for intervals spanning several buckets is spread across
+them in proportion to time.
+"""
+import time
+
+from .const import (
+    ENERGY_DAILY_RETENTION,
+    ENERGY_HOURLY_RETENTION,
+    ENERGY_MAX_POWER_GAP,
+)
+
+HOUR = 3600
+DAY = 86400
+
+
+class _WiserEnergyDevice(object):
+    """Energy state for a device"""
+
+    __slots__ = ("room_id", "last_timestamp", "last_counter", "last_power", "total", "hourly", "daily")
+
+    def __init__(self, room_id: int):
+        self.room_id = room_id
+        self.last_timestamp = None
+        self.last_counter = None
+        self.last_power = None
+        self.total = 0.0
+        self.hourly = {}
+        self.daily = {}
+
+
+class WiserEnergyIntegrator(object):
+    """
+    Integrates energy use of smart plugs and heating actuators.
+    Bucket keys are unix timestamps of the start of each hour or day,
+    with days starting at midnight utc_offset seconds from UTC.
+    """
+
+    def __init__(
+        self,
+        utc_offset: int = 0,
+        max_power_gap: float = ENERGY_MAX_POWER_GAP,
+        hourly_retention: int = ENERGY_HOURLY_RETENTION,
+        daily_retention: int = ENERGY_DAILY_RETENTION,
+    ):
+        self._utc_offset = utc_offset
+        self._max_power_gap = max_power_gap
+        self._hourly_retention = hourly_retention
+        self._daily_retention = daily_retention
+        self._devices = {}
+        self._api = None
+
+    @property
+    def device_ids(self) -> list:
+        return list(self._devices)
+
+    @staticmethod
+    def _valid(value) -> bool:
+        return value is not None and value >= 0
+
+    @staticmethod
+    def _spread(buckets: dict, size: int, offset: int, start: float, end: float, energy: float, retention: int) -> None:
+        """Add energy used between start and end to buckets in proportion to time"""
+        bucket = (start + offset) // size * size - offset
+        while bucket < end:
+            overlap = min(end, bucket + size) - max(start, bucket)
+            buckets[bucket] = buckets.get(bucket, 0.0) + energy * overlap / (end - start)
+            bucket += size
+        # Buckets are added in time order, so the oldest are first
+        while len(buckets) > retention:
+            del buckets[next(iter(buckets))]
+
+    def add_sample(
+        self,
+        device_id: int,
+        timestamp: float,
+        counter: float = None,
+        power: float = None,
+        room_id: int = None,
+    ) -> float:
+        """
+        Add a device reading.  Readings for a device must be added in time order
+        param device_id: device id
+        param timestamp: unix timestamp of reading
+        param counter: delivered energy counter in Wh, or None/negative if not available
+        param power: instantaneous power in W, or None/negative if not available
+        param room_id: room id of device
+        return: kWh added for the interval since the previous reading
+        """
+        device = self._devices.get(device_id)
+        if device is None:
+            device = self._devices[device_id] = _WiserEnergyDevice(room_id)
+        device.room_id = room_id
+
+        energy = 0.0
+        if device.last_timestamp is not None and timestamp > device.last_timestamp:
+            elapsed = timestamp - device.last_timestamp
+            if self._valid(counter) and self._valid(device.last_counter):
+                # A lower counter means it was reset, so all of the new count is new energy
+                used = counter - device.last_counter if counter >= device.last_counter else counter
+                energy = used / 1000
+            elif self._valid(power) and self._valid(device.last_power) and elapsed <= self._max_power_gap:
+                energy = (power + device.last_power) / 2 * elapsed / HOUR / 1000
+
+            if energy:
+                device.total += energy
+                self._spread(device.hourly, HOUR, 0, device.last_timestamp, timestamp, energy, self._hourly_retention)
+                self._spread(
+                    device.daily, DAY, self._utc_offset, device.last_timestamp, timestamp, energy, self._daily_retention
+                )
+
+        device.last_timestamp = timestamp
+        device.last_counter = counter if self._valid(counter) else None
+        device.last_power = power if self._valid(power) else None
+        return energy
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add readings for all smart plugs and heating actuators of api
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of readings, defaults to now
+        """
+        if not api.devices:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        for device in api.devices.smartplugs.all + api.devices.heating_actuators.all:
+            # Read the hub values directly, device properties report missing values as 0 or -1
+            self.add_sample(
+                device.id,
+                timestamp,
+                device._device_type_data.get("CurrentSummationDelivered"),
+                device._device_type_data.get("InstantaneousDemand"),
+                device.room_id,
+            )
+
+    def attach(self, api) -> None:
+        """
+        Add readings after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop adding readings from attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def _select(self, device_id: int, room_id: int) -> list:
+        if device_id is not None:
+            return [self._devices[device_id]] if device_id in self._devices else []
+        if room_id is not None:
+            return [device for device in self._devices.values() if device.room_id == room_id]
+        return list(self._devices.values())
+
+    @staticmethod
+    def _combine(bucket_sets: list) -> dict:
+        combined = {}
+        for buckets in bucket_sets:
+            for bucket, energy in buckets.items():
+                combined[bucket] = combined.get(bucket, 0.0) + energy
+        return dict(sorted(combined.items()))
+
+    def total(self, device_id: int = None, room_id: int = None) -> float:
+        """
+        Get kWh used since readings started
+        param device_id: device to total, or None
+        param room_id: room to total if no device_id, or None for all devices
+        return: kWh
+        """
+        return sum(device.total for device in self._select(device_id, room_id))
+
+    def hourly(self, device_id: int = None, room_id: int = None) -> dict:
+        """
+        Get kWh used per hour
+        param device_id: device to total, or None
+        param room_id: room to total if no device_id, or None for all devices
+        return: dict of hour start timestamp: kWh
+        """
+        return self._combine([device.hourly for device in self._select(device_id, room_id)])
+
+    def daily(self, device_id: int = None, room_id: int = None) -> dict:
+        """
+        Get kWh used per day
+        param device_id: device to total, or None
+        param room_id: room to total if no device_id, or None for all devices
+        return: dict of day start timestamp: kWh
+        """
+        return self._combine([device.daily for device in self._select(device_id, room_id)])
@@ -0,0 +1,277 @@
+"""
+Columnar history export
+
+Writes room telemetry to columnar files partitioned by hub and day, as
+Parquet (requires pyarrow) or compressed NumPy archives (requires numpy).
+Rows are buffered in typed arrays and written in chunks, so exports of any
+length only hold one chunk per partition in memory.
+
+Files are written to directory/hub=<hub>/date=<YYYY-MM-DD>/part-<n>.<ext>
+"""
+import enum
+import math
+import pathlib
+import time
+from array import array
+from datetime import datetime, timezone
+
+from .const import EXPORT_DEFAULT_CHUNK_SIZE
+
+# Column name: array typecode.  Missing floats are NaN, missing rssi is 0
+EXPORT_COLUMNS = {
+    "timestamp": "d",
+    "room_id": "i",
+    "temperature": "f",
+    "setpoint": "f",
+    "demand": "b",
+    "humidity": "f",
+    "battery_voltage": "f",
+    "rssi": "h",
+}
+
+
+class WiserExportFormatEnum(enum.Enum):
+    parquet = "parquet"
+    npz = "npz"
+
+
+def _float(value) -> float:
+    return math.nan if value is None else value
+
+
+class _WiserParquetWriter(object):
+    """Writes each partition to one parquet file with a row group per chunk"""
+
+    extension = "parquet"
+
+    def __init__(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as ex:
+            raise ImportError(
+                "Parquet export requires pyarrow.  Install it with pip install wiserHeatAPIv2[parquet]"
+            ) from ex
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._types = {
+            "d": pyarrow.float64(),
+            "i": pyarrow.int32(),
+            "f": pyarrow.float32(),
+            "b": pyarrow.int8(),
+            "h": pyarrow.int16(),
+        }
+        self._schema = pyarrow.schema([(name, self._types[typecode]) for name, typecode in EXPORT_COLUMNS.items()])
+        self._writers = {}
+
+    def write(self, key: tuple, path: pathlib.Path, columns: dict) -> None:
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = self._writers[key] = self._pq.ParquetWriter(str(path), self._schema)
+        length = len(columns["timestamp"])
+        # Wrap the typed array buffers without copying
+        arrays = [
+            self._pa.Array.from_buffers(self._types[column.typecode], length, [None, self._pa.py_buffer(column)])
+            for column in columns.values()
+        ]
+        writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def is_open(self, key: tuple) -> bool:
+        return key in self._writers
+
+    def close(self, key: tuple = None) -> None:
+        for writer_key in [key] if key else list(self._writers):
+            writer = self._writers.pop(writer_key, None)
+            if writer:
+                writer.close()
+
+
+class _WiserNpzWriter(object):
+    """Writes each chunk to its own compressed numpy archive"""
+
+    extension = "npz"
+
+    def __init__(self):
+        try:
+            import numpy
+        except ImportError as ex:
+            raise ImportError(
+                "NumPy export requires numpy.  Install it with pip install wiserHeatAPIv2[numpy]"
+            ) from ex
+        self._np = numpy
+
+    def write(self, key: tuple, path: pathlib.Path, columns: dict) -> None:
+        self._np.savez_compressed(
+            path,
+            **{name: self._np.frombuffer(column, dtype=column.typecode) for name, column in columns.items()},
+        )
+
+    def is_open(self, key: tuple) -> bool:
+        return False
+
+    def close(self, key: tuple = None) -> None:
+        pass
+
+
+class WiserColumnarExporter(object):
+    """
+    Streams room telemetry to columnar files partitioned by hub and day.
+    Each row is one room at one refresh, with the lowest battery voltage and
+    device rssi of the devices in the room.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        export_format: WiserExportFormatEnum = WiserExportFormatEnum.parquet,
+        chunk_size: int = EXPORT_DEFAULT_CHUNK_SIZE,
+    ):
+        export_format = WiserExportFormatEnum(export_format)
+        self._directory = pathlib.Path(directory)
+        self._chunk_size = max(1, chunk_size)
+        self._writer = _WiserParquetWriter() if export_format == WiserExportFormatEnum.parquet else _WiserNpzWriter()
+        self._buffers = {}
+        self._paths = {}
+        self._files = []
+        self._api = None
+        self._rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def rows_written(self) -> int:
+        """Get number of rows written to files"""
+        return self._rows_written
+
+    @property
+    def files(self) -> list:
+        """Get paths of files written"""
+        return list(self._files)
+
+    @staticmethod
+    def _new_columns() -> dict:
+        return {name: array(typecode) for name, typecode in EXPORT_COLUMNS.items()}
+
+    def _partition_path(self, hub: str, day: str) -> pathlib.Path:
+        directory = self._directory / f"hub={hub}" / f"date={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        part = len(list(directory.glob(f"part-*.{self._writer.extension}")))
+        return directory / f"part-{part:05}.{self._writer.extension}"
+
+    def _write_chunk(self, key: tuple) -> None:
+        columns = self._buffers.pop(key)
+        if not len(columns["timestamp"]):
+            return
+        hub, day = key
+        for open_key in list(self._paths):
+            if open_key[0] == hub and open_key[1] < day:
+                self._writer.close(open_key)
+                del self._paths[open_key]
+        if not self._writer.is_open(key):
+            self._paths[key] = self._partition_path(hub, day)
+            self._files.append(self._paths[key])
+        self._writer.write(key, self._paths[key], columns)
+        self._rows_written += len(columns["timestamp"])
+
+    def write_rows(self, hub: str, rows) -> None:
+        """
+        Add rows, writing chunks as they fill
+        param hub: hub name used for partitioning, or None if not known
+        param rows: iterable of (timestamp, room_id, temperature, setpoint, demand, humidity, battery_voltage, rssi)
+        """
+        hub = hub.replace("/", "_") if hub else "unknown"
+        key = None
+        columns = None
+        for row in rows:
+            day = datetime.fromtimestamp(row[0], timezone.utc).date().isoformat()
+            if key is None or key[1] != day:
+                key = (hub, day)
+                columns = self._buffers.get(key)
+                if columns is None:
+                    # Rows are in time order, so buffers of earlier days are complete
+                    for buffered_key in sorted(self._buffers):
+                        if buffered_key[0] == hub and buffered_key[1] < day:
+                            self._write_chunk(buffered_key)
+                    columns = self._buffers[key] = self._new_columns()
+            timestamp, room_id, temperature, setpoint, demand, humidity, battery_voltage, rssi = row
+            columns["timestamp"].append(timestamp)
+            columns["room_id"].append(room_id)
+            columns["temperature"].append(_float(temperature))
+            columns["setpoint"].append(_float(setpoint))
+            columns["demand"].append(demand or 0)
+            columns["humidity"].append(_float(humidity))
+            columns["battery_voltage"].append(_float(battery_voltage))
+            columns["rssi"].append(rssi or 0)
+            if len(columns["timestamp"]) >= self._chunk_size:
+                self._write_chunk(key)
+                key = None
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add a row for each room of api
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = []
+        for room in api.rooms.all if api.rooms else []:
+            voltages = [
+                device.battery.voltage
+                for device in room.devices
+                if getattr(device, "battery", None) and device.battery.voltage
+            ]
+            rssis = [device.signal.device_reception_rssi for device in room.devices if device.signal.device_reception_rssi]
+            rows.append((
+                timestamp,
+                room.id,
+                room.current_temperature,
+                room.current_target_temperature,
+                room.percentage_demand,
+                room.current_humidity,
+                min(voltages, default=None),
+                min(rssis, default=None),
+            ))
+        # Hub data without a network hostname is partitioned by the host the api connects to
+        self.write_rows(api.system.name or api._wiser_api_connection.host, rows)
+
+    def attach(self, api) -> None:
+        """
+        Export after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop exporting refreshes of attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def export_history(self, store, hub: str, start: float = None, end: float = None) -> None:
+        """
+        Export rows from a history store
+        param store: WiserHistoryStore
+        param hub: hub name used for partitioning
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        """
+        for rows in store.iter_room_rows(start, end, self._chunk_size):
+            self.write_rows(hub, rows)
+
+    def flush(self) -> None:
+        """Write all buffered rows"""
+        for key in sorted(self._buffers):
+            self._write_chunk(key)
+
+    def close(self) -> None:
+        """Write buffered rows and close all files"""
+        self.detach()
+        self.flush()
+        self._writer.close()
+        self._paths = {}
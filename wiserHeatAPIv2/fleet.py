@@ -0,0 +1,251 @@
+"""
+Fleet manager
+
+Owns a WiserAPI for each of many hubs and refreshes them concurrently through
+a bounded pool of worker threads, so refreshing hundreds of hubs takes about
+as long as the slowest few rather than the sum of them all.  Errors are kept
+per hub so one dead hub does not stop or delay the rest, and hubs that failed
+to connect are retried on the next refresh.
+"""
+import pathlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import _LOGGER
+from .const import FLEET_DEFAULT_MAX_WORKERS, WiserUnitsEnum
+from .wiserhub import WiserAPI
+
+
+class _WiserFleetHub(object):
+    """Connection details and refresh state of a hub in a fleet"""
+
+    def __init__(self, name: str, host: str, secret: str, units: WiserUnitsEnum):
+        self._name = name
+        self._host = host
+        self._secret = secret
+        self._units = units
+        self._api = None
+        self._future = None
+        self._last_error = None
+        self._last_success = None
+        self._last_duration = None
+        self._consecutive_failures = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def api(self) -> WiserAPI:
+        """Get api for hub, or None if it has never connected"""
+        return self._api
+
+    @property
+    def is_online(self) -> bool:
+        """Get if the last refresh of the hub succeeded"""
+        return self._api is not None and self._consecutive_failures == 0
+
+    @property
+    def last_error(self) -> str:
+        return self._last_error
+
+    @property
+    def last_success(self) -> float:
+        """Get unix timestamp of last successful refresh"""
+        return self._last_success
+
+    @property
+    def last_duration(self) -> float:
+        """Get seconds taken by the last refresh"""
+        return self._last_duration
+
+    @property
+    def consecutive_failures(self) -> int:
+        return self._consecutive_failures
+
+    def refresh(self, parser=None) -> bool:
+        started = time.monotonic()
+        try:
+            # A new api only joins the fleet once it has read complete hub data
+            api = self._api or WiserAPI._without_data(self._host, self._secret, self._units)
+            success = parser.refresh(api) if parser is not None else api.read_hub_data()
+            if success:
+                self._api = api
+            error = None if success else "Hub returned no data"
+        except Exception as ex:
+            success = False
+            error = f"{type(ex).__name__}: {ex}"
+        self._last_duration = time.monotonic() - started
+
+        if success:
+            self._last_success = time.time()
+            self._last_error = None
+            self._consecutive_failures = 0
+        else:
+            self._last_error = error
+            self._consecutive_failures += 1
+            _LOGGER.warning(f"Error refreshing hub {self._name}: {error}")
+        return success
+
+
+class WiserFleet(object):
+    """
+    Manages many hubs.  Hubs are refreshed by up to max_workers threads at once.
+    With process_workers, the threads only fetch hub data and the decode and model
+    build run in a pool of that many processes, see WiserProcessParser
+    """
+
+    def __init__(self, hubs: list = None, max_workers: int = FLEET_DEFAULT_MAX_WORKERS, process_workers: int = None):
+        """
+        param hubs: list of dicts with name, host, secret and optionally units (metric or imperial)
+        param max_workers: maximum number of hubs refreshed at the same time
+        param process_workers: number of processes to build hub models in, or None to build in the refresh threads
+        """
+        self._hubs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="WiserFleet")
+        self._parser = None
+        if process_workers:
+            from .parallel import WiserProcessParser
+            self._parser = WiserProcessParser(process_workers)
+        for hub in hubs or []:
+            self.add_hub(hub.get("name", hub.get("host")), hub["host"], hub["secret"], hub.get("units", "metric"))
+
+    @classmethod
+    def from_file(cls, config_file: str, max_workers: int = FLEET_DEFAULT_MAX_WORKERS, process_workers: int = None):
+        """
+        Create a fleet from a json or yaml file.  The file contains a list of hubs,
+        or a dict with a hubs list, where each hub has name, host, secret and optionally units
+        param config_file: path of .json, .yaml or .yml file
+        param max_workers: maximum number of hubs refreshed at the same time
+        param process_workers: number of processes to build hub models in, or None to build in the refresh threads
+        return: WiserFleet
+        """
+        path = pathlib.Path(config_file)
+        with open(path, "r") as file:
+            if path.suffix.lower() in [".yaml", ".yml"]:
+                from ruamel.yaml import YAML
+                config = YAML(typ="safe").load(file)
+            else:
+                import json
+                config = json.load(file)
+        if isinstance(config, dict):
+            config = config.get("hubs", [])
+        return cls(config, max_workers, process_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_hub(self, name: str, host: str, secret: str, units: str = "metric") -> _WiserFleetHub:
+        """
+        Add a hub to the fleet.  The hub is connected on the next refresh
+        param name: unique name of hub
+        param host: hub ip address or hostname
+        param secret: hub secret
+        param units: metric or imperial
+        return: fleet hub
+        """
+        with self._lock:
+            if name in self._hubs:
+                raise ValueError(f"Hub {name} is already in the fleet")
+            hub = self._hubs[name] = _WiserFleetHub(name, host, secret, WiserUnitsEnum(units))
+        return hub
+
+    def remove_hub(self, name: str) -> None:
+        with self._lock:
+            self._hubs.pop(name, None)
+
+    @property
+    def hubs(self) -> list:
+        """Get all hubs in the fleet"""
+        with self._lock:
+            return list(self._hubs.values())
+
+    @property
+    def apis(self) -> dict:
+        """Get dict of hub name: WiserAPI for hubs that have connected"""
+        return {hub.name: hub.api for hub in self.hubs if hub.api is not None}
+
+    @property
+    def errors(self) -> dict:
+        """Get dict of hub name: last error for hubs whose last refresh failed"""
+        return {hub.name: hub.last_error for hub in self.hubs if hub.last_error is not None}
+
+    def get_hub(self, name: str) -> _WiserFleetHub:
+        with self._lock:
+            return self._hubs.get(name)
+
+    def refresh(self, timeout: float = None) -> dict:
+        """
+        Refresh all hubs concurrently.  A hub still refreshing from an earlier call,
+        for example after a timeout, is not refreshed again until it finishes
+        param timeout: seconds to wait for all hubs, or None to wait until all finish
+        return: dict of hub name: error for hubs that failed, timed out or were still refreshing
+        """
+        futures = {}
+        errors = {}
+        for hub in self.hubs:
+            if hub._future is not None and not hub._future.done():
+                errors[hub.name] = "Previous refresh still running"
+                continue
+            hub._future = futures[hub.name] = self._executor.submit(hub.refresh, self._parser)
+
+        wait(futures.values(), timeout=timeout)
+        for name, future in futures.items():
+            if not future.done():
+                errors[name] = "Refresh timed out"
+            elif not future.result():
+                errors[name] = self._hubs[name].last_error if name in self._hubs else None
+        return errors
+
+    def find_rooms(self, condition) -> list:
+        """
+        Get rooms across all connected hubs that match a condition
+        param condition: callable taking a room and returning True to include it
+        return: list of (hub name, room) tuples
+        """
+        return [
+            (name, room)
+            for name, api in self.apis.items()
+            if api.rooms
+            for room in api.rooms.all
+            if condition(room)
+        ]
+
+    def rooms_below(self, temperature: float) -> list:
+        """
+        Get rooms across all connected hubs with a current temperature below temperature
+        param temperature: temperature in hub units
+        return: list of (hub name, room) tuples
+        """
+        return self.find_rooms(
+            lambda room: room.current_temperature is not None and room.current_temperature < temperature
+        )
+
+    def find_devices(self, condition) -> list:
+        """
+        Get devices across all connected hubs that match a condition
+        param condition: callable taking a device and returning True to include it
+        return: list of (hub name, device) tuples
+        """
+        return [
+            (name, device)
+            for name, api in self.apis.items()
+            if api.devices
+            for device in api.devices.all
+            if condition(device)
+        ]
+
+    def close(self, wait_for_refresh: bool = True) -> None:
+        """Stop the worker threads and processes"""
+        self._executor.shutdown(wait=wait_for_refresh, cancel_futures=True)
+        if self._parser is not None:
+            self._parser.close()
@@ -0,0 +1,193 @@
+from ..const import (
+    SCHEDULE_LEVEL_MAXIMUM,
+    SCHEDULE_LEVEL_MINIMUM,
+    SPECIAL_TIMES,
+    TEMP_MAXIMUM,
+    TEMP_MINIMUM,
+    TEMP_OFF,
+    TEXT_DEGREESC,
+    TEXT_HEATING,
+    TEXT_LEVEL,
+    TEXT_ONOFF,
+    TEXT_TIME,
+    WEEKDAYS,
+    WEEKENDS,
+)
+
+# Limits in wiser hub units (temps are in tenths of a degree)
+_WISER_TEMP_MINIMUM = TEMP_MINIMUM * 10
+_WISER_TEMP_MAXIMUM = TEMP_MAXIMUM * 10
+_WISER_TEMP_OFF = TEMP_OFF * 10
+_SPECIAL_TIME_VALUES = frozenset(SPECIAL_TIMES.values())
+_DAYS = frozenset(WEEKDAYS + WEEKENDS)
+
+
+class _WiserScheduleValidator(object):
+    """
+    Validates schedules in wiser hub format against hub limits before they are sent.
+    All validate methods return a list of error strings, which is empty if the schedule is valid.
+    """
+
+    @staticmethod
+    def _to_int(value) -> int:
+        """Return value as int if it is an int or a string of digits, otherwise None"""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and value.lstrip("-").isdigit():
+            return int(value)
+        return None
+
+    @staticmethod
+    def _is_valid_time(time: int) -> bool:
+        return time is not None and 0 <= time <= 2359 and time % 100 < 60
+
+    @staticmethod
+    def _check_order(day: str, times: list, errors: list) -> None:
+        """Add errors for times (list of (index, time)) that are duplicated or out of order"""
+        for (_, previous), (index, time) in zip(times, times[1:]):
+            if time == previous:
+                errors.append(f"{day}: entry {index + 1} time {time:04} is a duplicate")
+            elif time < previous:
+                errors.append(f"{day}: entry {index + 1} time {time:04} is before previous time {previous:04}")
+
+    @staticmethod
+    def _check_lists(day: str, day_schedule, value_key: str, errors: list) -> bool:
+        if not isinstance(day_schedule, dict):
+            errors.append(f"{day}: should contain {TEXT_TIME} and {value_key} lists")
+            return False
+        times = day_schedule.get(TEXT_TIME)
+        values = day_schedule.get(value_key)
+        if not isinstance(times, list) or not isinstance(values, list):
+            errors.append(f"{day}: should contain {TEXT_TIME} and {value_key} lists")
+            return False
+        if len(times) != len(values):
+            errors.append(f"{day}: has {len(times)} times but {len(values)} {value_key.lower()} values")
+            return False
+        return True
+
+    @staticmethod
+    def validate_heating_day(day: str, day_schedule: dict) -> list:
+        """
+        Validate a heating schedule day
+        param day: name of day
+        param day_schedule: dict of Time and DegreesC lists
+        return: list of errors
+        """
+        sv = _WiserScheduleValidator
+        errors = []
+        if not sv._check_lists(day, day_schedule, TEXT_DEGREESC, errors):
+            return errors
+
+        valid_times = []
+        for index, (time, temp) in enumerate(zip(day_schedule[TEXT_TIME], day_schedule[TEXT_DEGREESC])):
+            int_time = sv._to_int(time)
+            if sv._is_valid_time(int_time):
+                valid_times.append((index, int_time))
+            else:
+                errors.append(f"{day}: entry {index + 1} time {time!r} is not a valid time")
+
+            int_temp = sv._to_int(temp)
+            if int_temp is None:
+                errors.append(f"{day}: entry {index + 1} temperature {temp!r} is not a valid temperature")
+            elif int_temp != _WISER_TEMP_OFF and not _WISER_TEMP_MINIMUM <= int_temp <= _WISER_TEMP_MAXIMUM:
+                errors.append(
+                    f"{day}: entry {index + 1} temperature {int_temp / 10} is outside the range "
+                    f"{TEMP_MINIMUM}-{TEMP_MAXIMUM}C"
+                )
+
+        sv._check_order(day, valid_times, errors)
+        return errors
+
+    @staticmethod
+    def validate_onoff_day(day: str, day_schedule: list) -> list:
+        """
+        Validate an on/off schedule day
+        param day: name of day
+        param day_schedule: list of times, negative values are off times
+        return: list of errors
+        """
+        sv = _WiserScheduleValidator
+        errors = []
+        if not isinstance(day_schedule, list):
+            return [f"{day}: should be a list of times"]
+
+        valid_times = []
+        for index, entry in enumerate(day_schedule):
+            if isinstance(entry, bool) or not isinstance(entry, int):
+                errors.append(f"{day}: entry {index + 1} {entry!r} is not a valid on/off entry")
+                continue
+            # Midnight is sent as 2400 so it can carry a sign
+            time = abs(entry) % 2400
+            if entry == 0 or not sv._is_valid_time(time):
+                errors.append(f"{day}: entry {index + 1} time {entry!r} is not a valid time")
+            else:
+                valid_times.append((index, time))
+
+        sv._check_order(day, valid_times, errors)
+        return errors
+
+    @staticmethod
+    def validate_level_day(day: str, day_schedule: dict) -> list:
+        """
+        Validate a level (lighting/shutter) schedule day
+        param day: name of day
+        param day_schedule: dict of Time and Level lists
+        return: list of errors
+        """
+        sv = _WiserScheduleValidator
+        errors = []
+        if not sv._check_lists(day, day_schedule, TEXT_LEVEL, errors):
+            return errors
+
+        valid_times = []
+        special_times = set()
+        for index, (time, level) in enumerate(zip(day_schedule[TEXT_TIME], day_schedule[TEXT_LEVEL])):
+            int_time = sv._to_int(time)
+            if int_time in _SPECIAL_TIME_VALUES:
+                if int_time in special_times:
+                    errors.append(f"{day}: entry {index + 1} special time {int_time} is a duplicate")
+                special_times.add(int_time)
+            elif sv._is_valid_time(int_time):
+                valid_times.append((index, int_time))
+            else:
+                errors.append(
+                    f"{day}: entry {index + 1} time {time!r} is not a valid time or one of {list(SPECIAL_TIMES)}"
+                )
+
+            int_level = sv._to_int(level)
+            if int_level is None or not SCHEDULE_LEVEL_MINIMUM <= int_level <= SCHEDULE_LEVEL_MAXIMUM:
+                errors.append(
+                    f"{day}: entry {index + 1} level {level!r} is not in the range "
+                    f"{SCHEDULE_LEVEL_MINIMUM}-{SCHEDULE_LEVEL_MAXIMUM}"
+                )
+
+        sv._check_order(day, valid_times, errors)
+        return errors
+
+    @staticmethod
+    def validate(schedule_type: str, schedule_data: dict) -> list:
+        """
+        Validate a schedule in wiser hub format
+        param schedule_type: Heating, OnOff or Level
+        param schedule_data: dict of day schedules keyed by day name
+        return: list of errors, empty if schedule is valid
+        """
+        if not isinstance(schedule_data, dict) or not schedule_data:
+            return ["Schedule data is empty or could not be converted"]
+
+        if schedule_type == TEXT_HEATING:
+            validate_day = _WiserScheduleValidator.validate_heating_day
+        elif schedule_type == TEXT_ONOFF:
+            validate_day = _WiserScheduleValidator.validate_onoff_day
+        elif schedule_type == TEXT_LEVEL:
+            validate_day = _WiserScheduleValidator.validate_level_day
+        else:
+            return [f"{schedule_type} is not a schedule type that can be validated"]
+
+        errors = []
+        for day, day_schedule in schedule_data.items():
+            if day.title() in _DAYS:
+                errors.extend(validate_day(day, day_schedule))
+        return errors
@@ -1,6 +1,8 @@
 
-from datetime import datetime
-from wiserHeatAPIv2.const import WEEKDAYS, WEEKENDS
+import calendar
+import math
+from datetime import date, datetime, timedelta
+from wiserHeatAPIv2.const import SPECIAL_TIMES, SUN_TIMES_CACHE_SIZE, WEEKDAYS, WEEKENDS
 
 def _format_output(suntimes):
     output = {}
@@ -23,3 +25,147 @@ def sunrise_times(times):
 
 def sunset_times(times):
     return _format_output(times)
+
+
+# Sun position constants for sunrise equation
+_J2000 = datetime(2000, 1, 1, 12)
+_J2000_ORDINAL = date(2000, 1, 1).toordinal()
+_EARTH_TILT = math.radians(23.4397)
+_SUN_ALTITUDE = math.radians(-0.833)
+
+
+class _WiserSunTimes(object):
+    """
+    Calculates sunrise and sunset times locally for the hub location for any date.
+    Results are cached per day.  Times are returned as HH:MM strings to match
+    the hub provided sunrise_times/sunset_times, or None if the sun does not rise or set.
+    The hub only reports a fixed offset and whether daylight saving is on, not its zone, so
+    daylight saving follows EU rules (last Sunday of March to last Sunday of October, 01:00 UTC).
+    Elsewhere times are an hour out for the weeks where local rules differ.
+    """
+
+    def __init__(self, latitude: float, longitude: float, timezone_offset: int = 0, daylight_saving: bool = True):
+        self._latitude = math.radians(latitude)
+        self._longitude = longitude
+        self._timezone_offset = timezone_offset or 0
+        self._daylight_saving = daylight_saving
+        self._cache = {}
+
+    @staticmethod
+    def _last_sunday(year: int, month: int) -> int:
+        last_day = calendar.monthrange(year, month)[1]
+        return last_day - (date(year, month, last_day).weekday() + 1) % 7
+
+    def _utc_offset(self, utc_time: datetime) -> timedelta:
+        """Get local offset from utc, applying EU daylight saving rules if enabled, whatever the hub zone"""
+        offset = self._timezone_offset
+        if self._daylight_saving:
+            year = utc_time.year
+            dst_start = datetime(year, 3, self._last_sunday(year, 3), 1)
+            dst_end = datetime(year, 10, self._last_sunday(year, 10), 1)
+            if dst_start <= utc_time < dst_end:
+                offset += 60
+        return timedelta(minutes=offset)
+
+    def _to_local_minutes(self, julian: float, day: date) -> int:
+        utc_time = _J2000 + timedelta(days=julian)
+        local_time = utc_time + self._utc_offset(utc_time)
+        return (local_time.date() - day).days * 1440 + local_time.hour * 60 + local_time.minute
+
+    def _calculate(self, day: date) -> tuple:
+        """Calculate sunrise and sunset in minutes from local midnight using the sunrise equation"""
+        mean_solar_time = day.toordinal() - _J2000_ORDINAL - self._longitude / 360
+        anomaly = math.radians((357.5291 + 0.98560028 * mean_solar_time) % 360)
+        centre = 1.9148 * math.sin(anomaly) + 0.02 * math.sin(2 * anomaly) + 0.0003 * math.sin(3 * anomaly)
+        ecliptic_longitude = math.radians((math.degrees(anomaly) + centre + 180 + 102.9372) % 360)
+        transit = mean_solar_time + 0.0053 * math.sin(anomaly) - 0.0069 * math.sin(2 * ecliptic_longitude)
+        declination = math.asin(math.sin(ecliptic_longitude) * math.sin(_EARTH_TILT))
+
+        cos_hour_angle = (
+            (math.sin(_SUN_ALTITUDE) - math.sin(self._latitude) * math.sin(declination))
+            / (math.cos(self._latitude) * math.cos(declination))
+        )
+        if not -1 <= cos_hour_angle <= 1:
+            # Polar day or night
+            return (None, None)
+
+        hour_angle = math.degrees(math.acos(cos_hour_angle)) / 360
+        return (
+            self._to_local_minutes(transit - hour_angle, day),
+            self._to_local_minutes(transit + hour_angle, day),
+        )
+
+    def minutes(self, day: date) -> tuple:
+        """
+        Get sunrise and sunset as minutes from local midnight
+        param day: date to get times for
+        return: tuple of (sunrise, sunset) minutes
+        """
+        key = day.toordinal()
+        result = self._cache.get(key)
+        if result is None:
+            if len(self._cache) >= SUN_TIMES_CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            result = self._cache[key] = self._calculate(day)
+        return result
+
+    def times(self, day: date) -> tuple:
+        """
+        Get sunrise and sunset times
+        param day: date to get times for
+        return: tuple of (sunrise, sunset) as HH:MM strings
+        """
+        return tuple(
+            f"{value // 60:02}:{value % 60:02}" if value is not None else None
+            for value in self.minutes(day)
+        )
+
+    def sunrise(self, day: date) -> str:
+        """Get sunrise time for date as HH:MM"""
+        return self.times(day)[0]
+
+    def sunset(self, day: date) -> str:
+        """Get sunset time for date as HH:MM"""
+        return self.times(day)[1]
+
+    def resolve(self, special_time, day: date) -> str:
+        """
+        Resolve a schedule special time to a time for date
+        param special_time: Sunrise/Sunset or hub value (3000/4000)
+        param day: date to resolve for
+        return: HH:MM string
+        """
+        if special_time in [SPECIAL_TIMES["Sunrise"], "Sunrise"]:
+            return self.sunrise(day)
+        if special_time in [SPECIAL_TIMES["Sunset"], "Sunset"]:
+            return self.sunset(day)
+        return None
+
+    def month(self, year: int, month: int) -> dict:
+        """
+        Get sunrise and sunset times for every day of a month
+        param year: year
+        param month: month number 1-12
+        return: dict of date: (sunrise, sunset)
+        """
+        days_in_month = calendar.monthrange(year, month)[1]
+        return {
+            day: self.times(day)
+            for day in (date(year, month, day_number) for day_number in range(1, days_in_month + 1))
+        }
+
+    def week(self, start: date = None) -> tuple:
+        """
+        Get sunrise and sunset times for 7 days from start keyed by day name,
+        in the same format as the hub provided sunrise_times/sunset_times
+        param start: first day, defaults to today
+        return: tuple of (sunrise dict, sunset dict)
+        """
+        start = start or date.today()
+        days = WEEKDAYS + WEEKENDS
+        sunrises = {}
+        sunsets = {}
+        for offset in range(7):
+            day = start + timedelta(days=offset)
+            sunrises[days[day.weekday()]], sunsets[days[day.weekday()]] = self.times(day)
+        return sunrises, sunsets
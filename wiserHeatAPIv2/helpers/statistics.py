@@ -0,0 +1,36 @@
+class _WiserLeastSquares(object):
+    """Running sums for a least-squares fit of y = a + b*x"""
+
+    __slots__ = ("n", "sum_x", "sum_y", "sum_xx", "sum_xy")
+
+    def __init__(self):
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_xy = 0.0
+
+    def add(self, x: float, y: float) -> None:
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+
+    @property
+    def mean_y(self) -> float:
+        return self.sum_y / self.n if self.n else None
+
+    @property
+    def slope(self) -> float:
+        denominator = self.n * self.sum_xx - self.sum_x * self.sum_x
+        if self.n < 2 or abs(denominator) < 1e-12:
+            return None
+        return (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+    def predict(self, x: float) -> float:
+        """Get fitted y at x, or the mean of y if there is no slope"""
+        slope = self.slope
+        if slope is None:
+            return self.mean_y
+        return (self.sum_y - slope * self.sum_x) / self.n + slope * x
@@ -36,4 +36,158 @@ class _WiserZigbee:
     @property
     def eui(self) -> str:
         """Get zigbee eui info"""
-        return self._data.get("ZigbeeEUI", TEXT_UNKNOWN)
\ No newline at end of file
+        return self._data.get("ZigbeeEUI", TEXT_UNKNOWN)
+
+class _WiserZigbeeNode(object):
+    """Node of the zigbee mesh with its position and link quality"""
+
+    def __init__(self, device_data: dict):
+        self._data = device_data
+        self.children = []
+        self.depth = None
+        self.path = None
+        self.path_lqi = None
+        self.path_rssi = None
+
+    def __repr__(self) -> str:
+        return f"<_WiserZigbeeNode node_id={self.node_id} device_id={self.device_id} depth={self.depth}>"
+
+    def _reception(self) -> dict:
+        # ReceptionOfDevice is the link to the parent node, controller children included, so is used first.
+        # ReceptionOfController is only used for devices that do not report it
+        return self._data.get("ReceptionOfDevice") or self._data.get("ReceptionOfController") or {}
+
+    @property
+    def device_id(self) -> int:
+        return self._data.get("id")
+
+    @property
+    def node_id(self) -> int:
+        return self._data.get("NodeId", 0)
+
+    @property
+    def parent_node_id(self) -> int:
+        return self._data.get("ParentNodeId", 0)
+
+    @property
+    def product_type(self) -> str:
+        return self._data.get("ProductType", TEXT_UNKNOWN)
+
+    @property
+    def child_count(self) -> int:
+        return len(self.children)
+
+    @property
+    def is_controller(self) -> bool:
+        return self.product_type == "Controller"
+
+    @property
+    def is_orphan(self) -> bool:
+        """Get if node has no route to the controller"""
+        return self.depth is None
+
+    @property
+    def link_lqi(self) -> int:
+        """Get lqi of link to parent node"""
+        return self._reception().get("Lqi")
+
+    @property
+    def link_rssi(self) -> int:
+        """Get rssi of link to parent node"""
+        return self._reception().get("Rssi")
+
+
+class _WiserZigbeeTopology(object):
+    """
+    Zigbee mesh topology built from hub device data.
+    Hop depth is the number of links to the controller and path lqi/rssi is
+    the weakest link on the route to the controller.
+    """
+
+    def __init__(self, device_data: list):
+        self._nodes = {}
+        self._nodes_by_device_id = {}
+        self._controller = None
+        for device in device_data or []:
+            node = _WiserZigbeeNode(device)
+            if node.is_controller:
+                self._controller = node
+            self._nodes[node.node_id] = node
+            self._nodes_by_device_id[node.device_id] = node
+        self._build()
+
+    @staticmethod
+    def _weakest(link, path):
+        if link is None:
+            return path
+        return link if path is None else min(link, path)
+
+    def _build(self):
+        root_id = self._controller.node_id if self._controller else 0
+        for node in self._nodes.values():
+            if node.node_id != root_id and node.parent_node_id in self._nodes:
+                self._nodes[node.parent_node_id].children.append(node.node_id)
+
+        root = self._nodes.get(root_id)
+        if root is None:
+            return
+        root.depth = 0
+        root.path = [root_id]
+        queue = [root]
+        # Breadth first from the controller, so nodes in cycles or with unknown parents are never reached
+        for node in queue:
+            for child_id in node.children:
+                child = self._nodes[child_id]
+                if child.depth is None:
+                    child.depth = node.depth + 1
+                    child.path = [child_id] + node.path
+                    child.path_lqi = self._weakest(child.link_lqi, node.path_lqi)
+                    child.path_rssi = self._weakest(child.link_rssi, node.path_rssi)
+                    queue.append(child)
+
+    @property
+    def controller(self) -> _WiserZigbeeNode:
+        return self._controller
+
+    @property
+    def nodes(self) -> list:
+        """Get all nodes"""
+        return list(self._nodes.values())
+
+    @property
+    def max_depth(self) -> int:
+        """Get hop depth of the deepest node"""
+        return max((node.depth for node in self._nodes.values() if node.depth is not None), default=0)
+
+    @property
+    def orphans(self) -> list:
+        """Get nodes without a route to the controller"""
+        return [node for node in self._nodes.values() if node.is_orphan]
+
+    @property
+    def routers(self) -> list:
+        """Get nodes, other than the controller, with child nodes routing through them"""
+        return [node for node in self._nodes.values() if node.children and not node.is_controller]
+
+    def get_by_node_id(self, node_id: int) -> _WiserZigbeeNode:
+        return self._nodes.get(node_id)
+
+    def get_by_device_id(self, device_id: int) -> _WiserZigbeeNode:
+        return self._nodes_by_device_id.get(device_id)
+
+    def children_of(self, node_id: int) -> list:
+        """Get nodes whose parent is node_id"""
+        node = self._nodes.get(node_id)
+        return [self._nodes[child_id] for child_id in node.children] if node else []
+
+    def weakest_paths(self, limit: int = None) -> list:
+        """
+        Get routed nodes ordered by weakest path lqi first
+        param limit: maximum number of nodes to return
+        return: list of nodes
+        """
+        ranked = sorted(
+            (node for node in self._nodes.values() if node.path_lqi is not None),
+            key=lambda node: node.path_lqi,
+        )
+        return ranked[:limit] if limit else ranked
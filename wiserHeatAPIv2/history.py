@@ -0,0 +1,340 @@
+"""
+SQLite history store
+
+Persists room, device, hot water and heating channel values after each hub
+refresh to a local SQLite database.  Rows are buffered and written in batched
+transactions, the database uses WAL mode so it can be read while being written,
+and rows older than the retention period are deleted.
+"""
+import sqlite3
+import threading
+import time
+
+from . import _LOGGER
+from .const import (
+    HISTORY_DEFAULT_BATCH_SIZE,
+    HISTORY_DEFAULT_RETENTION_DAYS,
+    HISTORY_MAX_PENDING_BATCHES,
+    HISTORY_RETENTION_INTERVAL,
+)
+
+# Table: (entity id column, value columns)
+HISTORY_TABLES = {
+    "room": (
+        "room_id",
+        {
+            "current_temperature": "REAL",
+            "current_target_temperature": "REAL",
+            "percentage_demand": "INTEGER",
+            "is_heating": "INTEGER",
+            "current_humidity": "INTEGER",
+        },
+    ),
+    "device": (
+        "device_id",
+        {
+            "room_id": "INTEGER",
+            "battery_voltage": "REAL",
+            "controller_reception_rssi": "INTEGER",
+            "controller_reception_lqi": "INTEGER",
+            "device_reception_rssi": "INTEGER",
+            "device_reception_lqi": "INTEGER",
+        },
+    ),
+    "hot_water": (
+        "hot_water_id",
+        {
+            "is_heating": "INTEGER",
+            "is_boosted": "INTEGER",
+            "is_override": "INTEGER",
+        },
+    ),
+    "heating_channel": (
+        "heating_channel_id",
+        {
+            "percentage_demand": "INTEGER",
+            "is_relay_on": "INTEGER",
+        },
+    ),
+}
+
+
+def _insert_sql(table: str) -> str:
+    id_column, columns = HISTORY_TABLES[table]
+    names = ["timestamp", id_column] + list(columns)
+    return f"INSERT OR REPLACE INTO {table}_history ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+
+
+def _create_sql(table: str) -> str:
+    id_column, columns = HISTORY_TABLES[table]
+    column_sql = ", ".join(f"{name} {column_type}" for name, column_type in columns.items())
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_history "
+        f"(timestamp REAL NOT NULL, {id_column} INTEGER NOT NULL, {column_sql}, "
+        f"PRIMARY KEY ({id_column}, timestamp)) WITHOUT ROWID"
+    )
+
+
+class WiserHistoryStore(object):
+    """
+    Stores per refresh history of a hub in a SQLite database.
+    Rows are held in memory until batch_size refreshes have been recorded or flush is called.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = HISTORY_DEFAULT_BATCH_SIZE,
+        retention_days: float = HISTORY_DEFAULT_RETENTION_DAYS,
+    ):
+        self._path = path
+        self._batch_size = max(1, batch_size)
+        self._retention_days = retention_days
+        self._pending = {table: [] for table in HISTORY_TABLES}
+        self._pending_refreshes = 0
+        self._last_retention = 0
+        self._lock = threading.Lock()
+        self._api = None
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            for table in HISTORY_TABLES:
+                self._connection.execute(_create_sql(table))
+                self._add_missing_columns(table)
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_history_timestamp ON {table}_history (timestamp)"
+                )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS device_history_room ON device_history (room_id, timestamp)"
+            )
+
+    def _add_missing_columns(self, table: str) -> None:
+        # Databases created by earlier versions lack columns added since
+        existing = {row[1] for row in self._connection.execute(f"PRAGMA table_info({table}_history)")}
+        for name, column_type in HISTORY_TABLES[table][1].items():
+            if name not in existing:
+                self._connection.execute(f"ALTER TABLE {table}_history ADD COLUMN {name} {column_type}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def path(self) -> str:
+        """Get database path"""
+        return self._path
+
+    @property
+    def pending(self) -> int:
+        """Get number of rows waiting to be written"""
+        return sum(len(rows) for rows in self._pending.values())
+
+    def attach(self, api) -> None:
+        """
+        Record after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop recording refreshes of attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add current values of api entities, writing to the database when a batch is full
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            rows = self._pending
+            for room in api.rooms.all if api.rooms else []:
+                rows["room"].append((
+                    timestamp,
+                    room.id,
+                    room.current_temperature,
+                    room.current_target_temperature,
+                    room.percentage_demand,
+                    room.is_heating,
+                    room.current_humidity,
+                ))
+
+            for device in api.devices.all if api.devices else []:
+                battery = getattr(device, "battery", None)
+                rows["device"].append((
+                    timestamp,
+                    device.id,
+                    getattr(device, "room_id", None),
+                    battery.voltage if battery and battery.voltage else None,
+                    device.signal.controller_reception_rssi,
+                    device.signal.controller_reception_lqi,
+                    device.signal.device_reception_rssi,
+                    device.signal.device_reception_lqi,
+                ))
+
+            if api.hotwater:
+                rows["hot_water"].append((
+                    timestamp,
+                    api.hotwater.id,
+                    api.hotwater.is_heating,
+                    api.hotwater.is_boosted,
+                    api.hotwater.is_override,
+                ))
+
+            for channel in api.heating_channels.all if api.heating_channels else []:
+                rows["heating_channel"].append((
+                    timestamp,
+                    channel.id,
+                    channel.percentage_demand,
+                    channel.heating_relay_status == "On",
+                ))
+
+            self._pending_refreshes += 1
+            if self._pending_refreshes >= self._batch_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            with self._connection:
+                for table, rows in self._pending.items():
+                    if rows:
+                        self._connection.executemany(_insert_sql(table), rows)
+        except sqlite3.Error as ex:
+            # Keep the rows to write with the next batch
+            _LOGGER.error(f"Error writing history to {self._path}: {ex}")
+            self._drop_oldest_pending()
+            return
+        self._pending = {table: [] for table in HISTORY_TABLES}
+        self._pending_refreshes = 0
+
+        if self._retention_days and time.time() - self._last_retention >= HISTORY_RETENTION_INTERVAL:
+            self._apply_retention()
+
+    def _drop_oldest_pending(self) -> None:
+        # Bound memory while the database cannot be written, eg locked or disk full
+        excess = self._pending_refreshes - self._batch_size * HISTORY_MAX_PENDING_BATCHES
+        if excess <= 0:
+            return
+        timestamps = sorted({row[0] for rows in self._pending.values() for row in rows})
+        if timestamps:
+            cutoff = timestamps[min(excess, len(timestamps)) - 1]
+            self._pending = {table: [row for row in rows if row[0] > cutoff] for table, rows in self._pending.items()}
+        self._pending_refreshes -= excess
+        _LOGGER.warning(f"History writes to {self._path} are failing, dropped the {excess} oldest unwritten refreshes")
+
+    def _apply_retention(self) -> None:
+        cutoff = time.time() - self._retention_days * 86400
+        try:
+            with self._connection:
+                for table in HISTORY_TABLES:
+                    self._connection.execute(f"DELETE FROM {table}_history WHERE timestamp < ?", (cutoff,))
+            self._last_retention = time.time()
+        except sqlite3.Error as ex:
+            _LOGGER.error(f"Error applying history retention to {self._path}: {ex}")
+
+    def flush(self) -> None:
+        """Write all pending rows to the database"""
+        with self._lock:
+            self._flush()
+
+    def apply_retention(self) -> None:
+        """Delete rows older than the retention period"""
+        with self._lock:
+            if self._retention_days:
+                self._apply_retention()
+
+    def close(self) -> None:
+        """Write pending rows and close the database"""
+        self.detach()
+        with self._lock:
+            if self._connection is not None:
+                self._flush()
+                self._connection.close()
+                self._connection = None
+
+    def _query(self, table: str, entity_id: int, start: float, end: float) -> list:
+        id_column, columns = HISTORY_TABLES[table]
+        sql = f"SELECT timestamp, {', '.join(columns)} FROM {table}_history WHERE {id_column} = ?"
+        params = [entity_id]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        with self._lock:
+            if self._connection is None:
+                raise sqlite3.ProgrammingError(f"History store {self._path} is closed")
+            cursor = self._connection.execute(sql + " ORDER BY timestamp", params)
+            names = [description[0] for description in cursor.description]
+            return [dict(zip(names, row)) for row in cursor]
+
+    def iter_room_rows(self, start: float = None, end: float = None, chunk_size: int = 10000):
+        """
+        Stream room rows joined with the lowest battery voltage and device rssi of the room devices
+        from the same refresh, in time order.  Uses a separate connection so writes are not blocked.
+        Call flush first to include pending rows
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        param chunk_size: rows per yielded list
+        return: generator of lists of (timestamp, room_id, current_temperature,
+        current_target_temperature, percentage_demand, current_humidity, battery_voltage, rssi)
+        """
+        sql = (
+            "SELECT r.timestamp, r.room_id, r.current_temperature, r.current_target_temperature, "
+            "r.percentage_demand, r.current_humidity, MIN(d.battery_voltage), MIN(d.device_reception_rssi) "
+            "FROM room_history r LEFT JOIN device_history d "
+            "ON d.room_id = r.room_id AND d.timestamp = r.timestamp WHERE 1"
+        )
+        params = []
+        if start is not None:
+            sql += " AND r.timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND r.timestamp <= ?"
+            params.append(end)
+        sql += " GROUP BY r.timestamp, r.room_id ORDER BY r.timestamp, r.room_id"
+
+        connection = sqlite3.connect(self._path)
+        try:
+            cursor = connection.execute(sql, params)
+            rows = cursor.fetchmany(chunk_size)
+            while rows:
+                yield rows
+                rows = cursor.fetchmany(chunk_size)
+        finally:
+            connection.close()
+
+    def room_history(self, room_id: int, start: float = None, end: float = None) -> list:
+        """
+        Get stored room values in a time range.  Call flush first to include pending rows
+        param room_id: room id
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        return: list of dicts of timestamp and values in time order
+        """
+        return self._query("room", room_id, start, end)
+
+    def device_history(self, device_id: int, start: float = None, end: float = None) -> list:
+        """Get stored device values in a time range.  See room_history"""
+        return self._query("device", device_id, start, end)
+
+    def hot_water_history(self, hot_water_id: int, start: float = None, end: float = None) -> list:
+        """Get stored hot water values in a time range.  See room_history"""
+        return self._query("hot_water", hot_water_id, start, end)
+
+    def heating_channel_history(self, heating_channel_id: int, start: float = None, end: float = None) -> list:
+        """Get stored heating channel values in a time range.  See room_history"""
+        return self._query("heating_channel", heating_channel_id, start, end)
@@ -0,0 +1,471 @@
+"""
+Mock hub server
+
+A local HTTP server that stands in for a Wiser hub, so changes to the rest
+layer can be measured and tested reproducibly without hardware.  It serves the
+domain, network, schedules and opentherm endpoints from recorded or generated
+hub data, and applies PATCH, POST and DELETE commands for rooms, devices,
+hot water, system and schedules to that data, so later reads see the change.
+
+Faults can be injected into responses: latency, non-ascii junk bytes like a
+real hub sometimes sends, bursts of error status codes and dropped connections.
+"""
+import copy
+import json
+import random
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import _LOGGER
+
+MOCK_HUB_ENDPOINTS = {
+    "domain": "Domain",
+    "network": "Network",
+    "schedules": "Schedule",
+    "opentherm": "OpenTherm",
+}
+# Schedule type: domain collections that schedules of that type can be assigned to
+MOCK_HUB_SCHEDULE_ASSIGNMENTS = {
+    "Heating": ["Room"],
+    "OnOff": ["SmartPlug", "HotWater"],
+    "Level": ["Light", "Shutter"],
+}
+# Override types that cancel an override
+_CANCEL_OVERRIDE_TYPES = ["None", "CancelUserOverrides"]
+_PATH = re.compile(r"^/data/v2/(?P<endpoint>[a-z]+)/(?:(?P<collection>[A-Za-z]+)(?:/(?P<item>[^/]+))?)?/?$")
+
+
+class WiserMockHubFaults(object):
+    """
+    Faults to inject into mock hub responses.  Rates are the chance per request, from 0 to 1
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        junk_rate: float = 0.0,
+        junk_bytes: int = 4,
+        error_rate: float = 0.0,
+        error_burst: int = 1,
+        error_statuses: tuple = (500,),
+        drop_rate: float = 0.0,
+        seed: int = None,
+    ):
+        """
+        param latency: seconds to wait before responding
+        param latency_jitter: up to this many seconds are randomly added to latency
+        param junk_rate: chance of inserting non-ascii bytes into a response body
+        param junk_bytes: number of junk bytes inserted
+        param error_rate: chance of a request starting a burst of error responses
+        param error_burst: number of requests in a row given an error response in each burst
+        param error_statuses: status codes to choose from for error responses
+        param drop_rate: chance of closing the connection without a response
+        param seed: random seed for repeatable faults
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.junk_rate = junk_rate
+        self.junk_bytes = junk_bytes
+        self.error_rate = error_rate
+        self.error_burst = error_burst
+        self.error_statuses = tuple(error_statuses)
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self._burst_remaining = 0
+        self._lock = threading.Lock()
+
+    def _choose(self) -> tuple:
+        """
+        Choose the faults for a request
+        return: tuple of delay seconds, error status or None, drop connection, add junk
+        """
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+            if self._random.random() < self.drop_rate:
+                return delay, None, True, False
+            if not self._burst_remaining and self._random.random() < self.error_rate:
+                self._burst_remaining = self.error_burst
+            if self._burst_remaining:
+                self._burst_remaining -= 1
+                return delay, self._random.choice(self.error_statuses), False, False
+            return delay, None, False, self._random.random() < self.junk_rate
+
+    def _add_junk(self, body: bytes) -> bytes:
+        with self._lock:
+            positions = sorted(self._random.randrange(len(body) + 1) for _ in range(self.junk_bytes))
+            junk = [self._random.randrange(0x80, 0x100) for _ in positions]
+        parts = bytearray()
+        last = 0
+        for position, byte in zip(positions, junk):
+            parts += body[last:position]
+            parts.append(byte)
+            last = position
+        parts += body[last:]
+        return bytes(parts)
+
+
+class _WiserMockHubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Allow many clients to connect at once without dropped connection attempts
+    request_queue_size = 128
+
+
+class _WiserMockHubHandler(BaseHTTPRequestHandler):
+    server_version = "WiserMockHub"
+    # Keep connections open for clients that do not ask to close them
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, so do not wait for acks between them
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        _LOGGER.debug(f"Mock hub {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        self.server.hub._handle(self, "GET")
+
+    def do_PATCH(self):
+        self.server.hub._handle(self, "PATCH")
+
+    def do_POST(self):
+        self.server.hub._handle(self, "POST")
+
+    def do_DELETE(self):
+        self.server.hub._handle(self, "DELETE")
+
+
+class WiserMockHub(object):
+    """
+    Local stand in for a Wiser hub.  Use address as the host of a WiserAPI
+    """
+
+    def __init__(
+        self,
+        data: dict,
+        secret: str = "mock",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        faults: WiserMockHubFaults = None,
+    ):
+        """
+        param data: hub data in the same form as WiserAPI.raw_hub_data
+        param secret: secret clients must send
+        param host: address to listen on
+        param port: port to listen on, or 0 for any free port
+        param faults: faults to inject, or None for none
+        """
+        self._data = {section: copy.deepcopy(data.get(section) or {}) for section in MOCK_HUB_ENDPOINTS.values()}
+        self._secret = secret
+        self._listen = (host, port)
+        self._faults = faults or WiserMockHubFaults()
+        self._lock = threading.Lock()
+        self._encoded = {}
+        self._server = None
+        self._thread = None
+        self._commands = []
+        self._stats = {"requests": 0, "commands": 0, "errors": 0, "dropped": 0, "junk": 0}
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs):
+        """
+        Create a mock hub serving a recording.  See replay.py for the layouts supported
+        param path: recording directory or snapshot file, ~ is expanded
+        return: WiserMockHub
+        """
+        from .replay import REPLAY_SNAPSHOT_SECTIONS, WiserReplay
+        from .rest_controller import _decode_hub_payload
+
+        replay = WiserReplay.from_path(path)
+        recording = replay._recordings[0]
+        data = {section: _decode_hub_payload(recording.get(endpoint)) for endpoint, section in REPLAY_SNAPSHOT_SECTIONS.items()}
+        return cls(data, **kwargs)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def address(self) -> str:
+        """Get host:port to connect to"""
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def secret(self) -> str:
+        return self._secret
+
+    @property
+    def faults(self) -> WiserMockHubFaults:
+        """Get or set faults injected into responses"""
+        return self._faults
+
+    @faults.setter
+    def faults(self, faults: WiserMockHubFaults):
+        self._faults = faults or WiserMockHubFaults()
+
+    @property
+    def data(self) -> dict:
+        """Get a copy of the current hub data"""
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    @property
+    def commands(self) -> list:
+        """Get commands received, as (method, path, data) tuples"""
+        with self._lock:
+            return list(self._commands)
+
+    @property
+    def stats(self) -> dict:
+        """Get counts of requests, commands and injected faults"""
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self):
+        """Start serving on a background thread"""
+        if self._server is None:
+            self._server = _WiserMockHubServer(self._listen, _WiserMockHubHandler)
+            self._server.hub = self
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="WiserMockHub", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        self._count("requests")
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        delay, error_status, drop, junk = self._faults._choose()
+        if self._inject_fault(handler, delay, error_status, drop):
+            return
+        if handler.headers.get("SECRET") != self._secret:
+            self._respond(handler, 401)
+            return
+
+        match = _PATH.match(handler.path)
+        if match is None or match.group("endpoint") not in MOCK_HUB_ENDPOINTS:
+            self._respond(handler, 404)
+        elif method == "GET":
+            self._get(handler, match, junk)
+        else:
+            self._command(handler, method, match, body)
+
+    def _inject_fault(self, handler: BaseHTTPRequestHandler, delay: float, error_status: int, drop: bool) -> bool:
+        """
+        Apply chosen latency, dropped connection or error response
+        return: True if the request has been dealt with
+        """
+        if delay:
+            time.sleep(delay)
+        if drop:
+            self._count("dropped")
+            handler.close_connection = True
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return True
+        if error_status:
+            self._count("errors")
+            self._respond(handler, error_status)
+            return True
+        return False
+
+    def _get(self, handler: BaseHTTPRequestHandler, match: re.Match, junk: bool) -> None:
+        if match.group("collection"):
+            self._respond(handler, 404)
+            return
+        content = self._encode(match.group("endpoint"))
+        if junk and content:
+            self._count("junk")
+            content = self._faults._add_junk(content)
+        self._respond(handler, 200, content)
+
+    def _command(self, handler: BaseHTTPRequestHandler, method: str, match: re.Match, body: bytes) -> None:
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            self._respond(handler, 400)
+            return
+        with self._lock:
+            self._stats["commands"] += 1
+            self._commands.append((method, handler.path, data))
+            if match.group("endpoint") == "schedules":
+                status = self._schedule_command(method, match.group("collection"), match.group("item"), data)
+            elif match.group("endpoint") == "domain" and method == "PATCH":
+                status = self._domain_command(match.group("collection"), match.group("item"), data)
+            else:
+                status = 404
+            if status == 200:
+                self._encoded.clear()
+        self._respond(handler, status)
+
+    def _encode(self, endpoint: str) -> bytes:
+        with self._lock:
+            if endpoint not in self._encoded:
+                data = self._data[MOCK_HUB_ENDPOINTS[endpoint]]
+                self._encoded[endpoint] = json.dumps(data).encode() if data else b""
+            return self._encoded[endpoint]
+
+    @staticmethod
+    def _respond(handler: BaseHTTPRequestHandler, status: int, content: bytes = b"") -> None:
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(content)))
+            if handler.close_connection:
+                # Tell clients that asked to close, so they do not reuse the connection
+                handler.send_header("Connection", "close")
+            handler.end_headers()
+            handler.wfile.write(content)
+        except OSError:
+            # Client went away
+            pass
+
+    def _find(self, collection: str, item_id) -> dict:
+        if collection == "System":
+            return self._data["Domain"].setdefault("System", {})
+        for entity in self._data["Domain"].get(collection) or []:
+            if str(entity.get("id")) == str(item_id):
+                return entity
+        return None
+
+    def _domain_command(self, collection: str, item: str, data: dict) -> int:
+        entity = self._find(collection, item)
+        if entity is None:
+            return 404
+        for key, value in data.items():
+            if key == "RequestOverride" and isinstance(value, dict):
+                self._request_override(collection, entity, value)
+            elif key == "RequestOutput":
+                entity["OutputState"] = value
+                entity["ManualState"] = value
+            elif key == "RequestAction" and isinstance(value, dict):
+                if "Percentage" in value:
+                    entity["TargetLift"] = value["Percentage"]
+                    entity["CurrentLift"] = value["Percentage"]
+            else:
+                entity[key] = value
+        return 200
+
+    def _request_override(self, collection: str, entity: dict, override: dict) -> None:
+        handlers = {
+            "System": self._system_override,
+            "Light": self._light_override,
+            "Room": self._room_override,
+            "HotWater": self._hot_water_override,
+        }
+        handlers.get(collection, self._entity_override)(entity, override)
+
+    def _system_override(self, entity: dict, override: dict) -> None:
+        override_type = override.get("Type")
+        if override_type == "CancelUserOverrides":
+            for room in self._data["Domain"].get("Room") or []:
+                self._clear_room_override(room)
+        elif isinstance(override_type, int):
+            entity["OverrideType"] = "Away" if override_type == 2 else "None"
+
+    @staticmethod
+    def _light_override(entity: dict, override: dict) -> None:
+        if "State" in override:
+            entity["CurrentState"] = override["State"]
+        if "Percentage" in override:
+            entity["CurrentPercentage"] = override["Percentage"]
+
+    @staticmethod
+    def _entity_override(entity: dict, override: dict) -> bool:
+        """
+        Set or cancel the override type and timeout of an entity
+        return: True if an override was set
+        """
+        if override.get("Type") in _CANCEL_OVERRIDE_TYPES:
+            for key in ["OverrideType", "OverrideTimeoutUnixTime", "OverrideWaterHeatingState"]:
+                entity.pop(key, None)
+            return False
+        if override.get("DurationMinutes"):
+            entity["OverrideTimeoutUnixTime"] = int(time.time() + override["DurationMinutes"] * 60)
+        else:
+            entity.pop("OverrideTimeoutUnixTime", None)
+        entity["OverrideType"] = override.get("Type")
+        return True
+
+    def _room_override(self, entity: dict, override: dict) -> None:
+        if override.get("Type") in _CANCEL_OVERRIDE_TYPES:
+            self._clear_room_override(entity)
+            return
+        self._entity_override(entity, override)
+        if override.get("Type") == "Boost":
+            setpoint = entity.get("CalculatedTemperature", 0) + override.get("IncreaseSetPointBy", 0)
+        else:
+            setpoint = override.get("SetPoint", entity.get("CurrentSetPoint"))
+        entity["OverrideSetpoint"] = setpoint
+        entity["CurrentSetPoint"] = setpoint
+        entity["DisplayedSetPoint"] = setpoint
+        entity["SetpointOrigin"] = "FromBoost" if override.get("Type") == "Boost" else "FromManualOverride"
+
+    def _hot_water_override(self, entity: dict, override: dict) -> None:
+        if self._entity_override(entity, override):
+            state = "On" if override.get("SetPoint", 0) > 0 else "Off"
+            entity["OverrideWaterHeatingState"] = state
+            entity["WaterHeatingState"] = state
+
+    @staticmethod
+    def _clear_room_override(room: dict) -> None:
+        for key in ["OverrideType", "OverrideSetpoint", "OverrideTimeoutUnixTime"]:
+            room.pop(key, None)
+        room["CurrentSetPoint"] = room.get("ScheduledSetPoint", room.get("CurrentSetPoint"))
+        room["DisplayedSetPoint"] = room["CurrentSetPoint"]
+        room["SetpointOrigin"] = "FromSchedule"
+
+    def _schedule_command(self, method: str, schedule_type: str, item: str, data: dict) -> int:
+        if schedule_type == "Assign" and method in ["PATCH", "POST"]:
+            return self._assign_schedule(data)
+
+        entries = self._data["Schedule"].get(schedule_type)
+        if entries is None or item is None:
+            return 404
+        for index, entry in enumerate(entries):
+            if str(entry.get("id")) == item:
+                if method == "DELETE":
+                    del entries[index]
+                elif method == "PATCH":
+                    entry.update(data)
+                else:
+                    return 405
+                return 200
+        return 404
+
+    def _assign_schedule(self, data: dict) -> int:
+        schedules = self._data["Schedule"]
+        for assigned_type, collections in MOCK_HUB_SCHEDULE_ASSIGNMENTS.items():
+            if not isinstance(data.get(assigned_type), dict):
+                continue
+            schedule = data[assigned_type]
+            existing = [entry for entry in schedules.setdefault(assigned_type, []) if entry.get("id") == schedule.get("id")]
+            if not existing:
+                schedules[assigned_type].append(dict(schedule, Type=assigned_type))
+            assignments = set(data.get("Assignments") or [])
+            for collection in collections:
+                for entity in self._data["Domain"].get(collection) or []:
+                    if entity.get("id") in assignments:
+                        entity["ScheduleId"] = schedule.get("id")
+            return 200
+        return 400
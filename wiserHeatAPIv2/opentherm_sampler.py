@@ -0,0 +1,173 @@
+"""
+OpenTherm sampler
+
+Polls only the hub opentherm endpoint at a fixed interval on a background
+thread, so boiler behaviour can be watched at high resolution without reading
+the full domain and schedule data.  The last window samples of each value are
+kept in fixed size ring buffers with rolling statistics calculated on request.
+"""
+import math
+import threading
+import time
+
+from . import _LOGGER
+from .const import (
+    OPENTHERM_SAMPLER_DEFAULT_INTERVAL,
+    OPENTHERM_SAMPLER_DEFAULT_WINDOW,
+    WISERHUBOPENTHERM,
+)
+from .exceptions import WiserHubConnectionError, WiserHubRESTError
+from .helpers.opentherm import _WiserOpenThermOperationalData
+from .recorder import _WiserRecorderSeries
+
+OPENTHERM_METRICS = {
+    "ch_flow_temperature": "f",
+    "ch_return_temperature": "f",
+    "hw_temperature": "f",
+    "ch_pressure_bar": "f",
+    "relative_modulation_level": "f",
+}
+
+
+def _percentile(values: list, percent: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[index]
+
+
+class WiserOpenThermSampler(object):
+    """
+    Samples hub opentherm operational data every interval seconds.
+    Missing values are recorded as NaN and excluded from statistics.
+    """
+
+    def __init__(
+        self,
+        api,
+        interval: float = OPENTHERM_SAMPLER_DEFAULT_INTERVAL,
+        window: int = OPENTHERM_SAMPLER_DEFAULT_WINDOW,
+    ):
+        self._rest_controller = api._wiser_rest_controller
+        self._interval = interval
+        self._series = _WiserRecorderSeries(OPENTHERM_METRICS, window)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._errors = 0
+        self._last_error = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def errors(self) -> int:
+        """Get number of failed polls"""
+        return self._errors
+
+    @property
+    def last_error(self) -> str:
+        return self._last_error
+
+    @property
+    def series(self) -> _WiserRecorderSeries:
+        """Get sampled values.  See WiserRecorder for reading windows"""
+        return self._series
+
+    def sample(self, timestamp: float = None) -> bool:
+        """
+        Poll the opentherm endpoint once and record the values
+        param timestamp: unix timestamp of sample, defaults to now
+        return: True if the poll succeeded
+        """
+        try:
+            values = self._read()
+        except (WiserHubConnectionError, WiserHubRESTError) as ex:
+            return self._failed(ex, _LOGGER.debug)
+        except Exception as ex:
+            # Any other error, such as an undecodable or unexpected response, must not stop sampling
+            return self._failed(ex, _LOGGER.error)
+
+        with self._lock:
+            self._series.append(time.time() if timestamp is None else timestamp, values)
+        return True
+
+    def _read(self) -> dict:
+        data = self._rest_controller._get_hub_data(WISERHUBOPENTHERM, False)
+        raw_data = (data or {}).get("operationalData", {})
+        operational_data = _WiserOpenThermOperationalData(raw_data)
+        values = {}
+        for metric in OPENTHERM_METRICS:
+            try:
+                value = getattr(operational_data, metric)
+            except TypeError:
+                value = None
+            values[metric] = math.nan if value is None else value
+        # ch_pressure_bar reads a missing value as 0 bar
+        if raw_data.get("ChPressureBar") is None:
+            values["ch_pressure_bar"] = math.nan
+        return values
+
+    def _failed(self, ex: Exception, log) -> bool:
+        self._errors += 1
+        self._last_error = str(ex)
+        log(f"Opentherm sample failed: {ex}")
+        return False
+
+    def _run(self) -> None:
+        next_sample = time.monotonic()
+        while not self._stop_event.is_set():
+            self.sample()
+            # Keep to a fixed rate, skipping samples if a poll overruns
+            next_sample += self._interval
+            now = time.monotonic()
+            if next_sample < now:
+                next_sample = now + self._interval - (now - next_sample) % self._interval
+            self._stop_event.wait(next_sample - now)
+
+    def start(self) -> None:
+        """Start sampling on a background thread"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="WiserOpenThermSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop sampling and wait for the thread to finish"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def statistics(self, metric: str, start: float = None, end: float = None) -> dict:
+        """
+        Get min, max, mean and percentiles of a sampled value
+        param metric: one of OPENTHERM_METRICS
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        return: dict of count, min, max, mean, p50, p90, p95 and p99, values are None if there are no samples
+        """
+        with self._lock:
+            values = sorted(
+                value
+                for segment in self._series.window(metric, start, end)
+                for value in segment
+                if not math.isnan(value)
+            )
+        if not values:
+            return {"count": 0, "min": None, "max": None, "mean": None, "p50": None, "p90": None, "p95": None, "p99": None}
+        return {
+            "count": len(values),
+            "min": values[0],
+            "max": values[-1],
+            "mean": round(sum(values) / len(values), 2),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+        }
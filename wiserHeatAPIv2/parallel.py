@@ -0,0 +1,100 @@
+"""
+Process pool parsing
+
+Decoding hub responses and building the room, device and schedule objects is
+pure python work that holds the GIL, so refreshing many hubs from threads is
+limited to one core.  The parser runs the decode and build in a pool of worker
+processes instead.  The calling thread only fetches the response bytes and
+unpickles the built model, so throughput scales with the number of cores.
+
+Model objects are built in the worker around a placeholder rest controller,
+which is swapped for the hub's own controller as the model is unpickled.
+"""
+import io
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+from .rest_controller import _decode_hub_payload
+from .wiserhub import WiserAPI
+
+_REST_CONTROLLER_ID = "rest_controller"
+
+
+class _WiserDeferredController(object):
+    """Stands in for the rest controller while a model is built in a worker process"""
+
+
+class _WiserModelPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _REST_CONTROLLER_ID if isinstance(obj, _WiserDeferredController) else None
+
+
+class _WiserModelUnpickler(pickle.Unpickler):
+    def __init__(self, file, rest_controller):
+        super().__init__(file)
+        self._rest_controller = rest_controller
+
+    def persistent_load(self, pid):
+        if pid == _REST_CONTROLLER_ID:
+            return self._rest_controller
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
+
+def _build_model(host: str, units, payloads: tuple) -> bytes:
+    """
+    Decode hub responses and build the model.  Runs in a worker process
+    param host: hub host, for logging
+    param units: WiserUnitsEnum of api
+    param payloads: domain, network, schedule and opentherm response bytes
+    return: pickled model attributes, or None if the hub data was incomplete
+    """
+    api = WiserAPI._without_data(host, None, units, _WiserDeferredController())
+    if not api._build(*[_decode_hub_payload(payload) for payload in payloads]):
+        return None
+    buffer = io.BytesIO()
+    _WiserModelPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(
+        {name: getattr(api, name) for name in WiserAPI._MODEL_ATTRIBUTES}
+    )
+    return buffer.getvalue()
+
+
+def _apply_model(api: WiserAPI, model: bytes) -> None:
+    """Replace the model of api with one built by _build_model"""
+    api._replace_model(_WiserModelUnpickler(io.BytesIO(model), api._wiser_rest_controller).load())
+    api._hub_data_read()
+
+
+class WiserProcessParser(object):
+    """
+    Refreshes WiserAPI instances with decode and model build in worker processes.
+    refresh can be called from many threads at once, for example by a WiserFleet
+    """
+
+    def __init__(self, max_processes: int = None):
+        """
+        param max_processes: number of worker processes, defaults to the number of cpus
+        """
+        self._executor = ProcessPoolExecutor(max_workers=max_processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def refresh(self, api: WiserAPI) -> bool:
+        """
+        Read hub data for api in the calling thread and build the model in a worker process
+        param api: WiserAPI instance
+        return: True if the hub returned complete data
+        """
+        payloads = api._fetch_hub_payloads()
+        model = self._executor.submit(_build_model, api._wiser_api_connection.host, api.units, payloads).result()
+        if model is None:
+            return False
+        _apply_model(api, model)
+        return True
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,197 @@
+"""
+Background hub poller
+
+Refreshes a WiserAPI on a dedicated thread.  Refreshes never overlap, and if a
+refresh overruns, the missed ticks are skipped rather than queued.  The time
+taken by each cycle, the age of the last successful refresh and the number of
+consecutive failures are kept for health reporting.
+"""
+import threading
+import time
+
+from . import _LOGGER
+from .const import POLLER_FAILURE_BACKOFF_LIMIT, POLLER_TIMING_HISTORY
+from .exceptions import WiserHubAuthenticationError, WiserHubConnectionError, WiserHubRESTError
+from .polling import WiserPollingPolicy
+from .recorder import _WiserRingBuffer
+
+
+class WiserPoller(object):
+    """
+    Polls a hub every interval seconds.  interval can be a number of seconds or a
+    WiserPollingPolicy to choose each interval from the current hub state, and
+    defaults to a WiserPollingPolicy with default settings, attached to api while polling
+    so commands sent through api speed up polling.
+    After consecutive failures the interval is doubled for each failure, up to
+    POLLER_FAILURE_BACKOFF_LIMIT times the normal interval.
+    """
+
+    def __init__(self, api, interval=None):
+        self._api = api
+        self._policy = WiserPollingPolicy() if interval is None else interval
+        self._owns_policy = interval is None
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+        self._durations = _WiserRingBuffer("d", POLLER_TIMING_HISTORY)
+        self._cycles = 0
+        self._failures = 0
+        self._consecutive_failures = 0
+        self._skipped_ticks = 0
+        self._last_success = None
+        self._last_error = None
+
+    def _interval(self) -> float:
+        if isinstance(self._policy, WiserPollingPolicy):
+            interval = self._policy.next_interval(self._api if self._last_success is not None else None)
+        else:
+            interval = float(self._policy)
+        if self._consecutive_failures:
+            interval *= min(2 ** self._consecutive_failures, POLLER_FAILURE_BACKOFF_LIMIT)
+        return interval
+
+    @property
+    def api(self):
+        return self._api
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_refreshing(self) -> bool:
+        return self._refresh_lock.locked()
+
+    @property
+    def cycles(self) -> int:
+        """Get number of refreshes attempted"""
+        return self._cycles
+
+    @property
+    def failures(self) -> int:
+        """Get number of failed refreshes"""
+        return self._failures
+
+    @property
+    def consecutive_failures(self) -> int:
+        """Get number of refreshes failed since the last success"""
+        return self._consecutive_failures
+
+    @property
+    def skipped_ticks(self) -> int:
+        """Get number of polls skipped because a refresh was still running"""
+        return self._skipped_ticks
+
+    @property
+    def last_error(self) -> str:
+        return self._last_error
+
+    @property
+    def last_success_age(self) -> float:
+        """Get seconds since the last successful refresh, or None if there has not been one"""
+        return time.monotonic() - self._last_success if self._last_success is not None else None
+
+    @property
+    def durations(self) -> list:
+        """Get durations in seconds of the most recent refreshes, oldest first"""
+        return self._durations.to_list()
+
+    @property
+    def health(self) -> dict:
+        """Get poller health and timing information"""
+        durations = self.durations
+        return {
+            "running": self.is_running,
+            "cycles": self._cycles,
+            "failures": self._failures,
+            "consecutive_failures": self._consecutive_failures,
+            "skipped_ticks": self._skipped_ticks,
+            "last_success_age": self.last_success_age,
+            "last_error": self._last_error,
+            "last_duration": durations[-1] if durations else None,
+            "mean_duration": sum(durations) / len(durations) if durations else None,
+            "max_duration": max(durations) if durations else None,
+        }
+
+    def refresh(self) -> bool:
+        """
+        Refresh the hub now unless a refresh is already running
+        return: True if the refresh succeeded, False if it failed or was skipped
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            self._skipped_ticks += 1
+            return False
+        try:
+            started = time.monotonic()
+            self._cycles += 1
+            try:
+                success = self._api.read_hub_data()
+                error = None if success else "Hub returned no data"
+            except (WiserHubAuthenticationError, WiserHubConnectionError, WiserHubRESTError) as ex:
+                success = False
+                error = str(ex)
+            except Exception as ex:
+                # Unexpected errors, such as an undecodable response, must not stop polling
+                success = False
+                error = f"{type(ex).__name__}: {ex}"
+            self._durations.append(time.monotonic() - started)
+
+            if success:
+                self._last_success = time.monotonic()
+                self._consecutive_failures = 0
+            else:
+                self._failures += 1
+                self._consecutive_failures += 1
+                self._last_error = error
+                _LOGGER.warning(f"Hub refresh failed ({self._consecutive_failures} in a row): {error}")
+            return success
+        finally:
+            self._refresh_lock.release()
+
+    def _run(self) -> None:
+        next_poll = time.monotonic()
+        while not self._stop_event.is_set():
+            self.refresh()
+            interval = self._interval()
+            next_poll += interval
+            now = time.monotonic()
+            if next_poll < now:
+                # Refresh overran, skip the missed ticks rather than polling back to back
+                missed = int((now - next_poll) // interval) + 1
+                self._skipped_ticks += missed
+                next_poll += missed * interval
+            if self._wake_event.wait(next_poll - now):
+                self._wake_event.clear()
+                next_poll = time.monotonic()
+
+    def start(self) -> None:
+        """Start polling on a background thread.  Raises RuntimeError if a stopped thread is still finishing"""
+        if self.is_running:
+            if self._stop_event.is_set():
+                raise RuntimeError("Poller is still stopping, wait for the current refresh to finish")
+            return
+        if self._owns_policy:
+            self._policy.attach(self._api)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="WiserPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stop polling and wait for the current refresh to finish
+        param timeout: seconds to wait, after which the thread finishes in the background
+        """
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+        if self._owns_policy:
+            self._policy.detach()
+
+    def poll_now(self) -> None:
+        """Wake the poller to refresh immediately, for example after sending a command"""
+        self._wake_event.set()
@@ -0,0 +1,108 @@
+"""
+Adaptive polling policy
+
+Chooses how long to wait before the next hub refresh from the current state of
+the system.  Polls are fast while anything is changing (boosts, rooms heating,
+hot water boost or shutters moving) and for a short time after a command is
+sent, and back off while the system is stable.  Intervals have random jitter so
+many hubs polled from one process do not synchronise.
+"""
+import random
+import time
+
+from .const import (
+    POLLING_ACTIVE_INTERVAL,
+    POLLING_BACKOFF_FACTOR,
+    POLLING_COMMAND_INTERVAL,
+    POLLING_COMMAND_WINDOW,
+    POLLING_JITTER,
+    POLLING_MAX_INTERVAL,
+    POLLING_STABLE_INTERVAL,
+)
+
+
+class WiserPollingPolicy(object):
+    """
+    Calculates the next poll interval in seconds.
+    While stable the interval grows by backoff_factor each poll, from stable_interval up to max_interval.
+    """
+
+    def __init__(
+        self,
+        active_interval: float = POLLING_ACTIVE_INTERVAL,
+        command_interval: float = POLLING_COMMAND_INTERVAL,
+        command_window: float = POLLING_COMMAND_WINDOW,
+        stable_interval: float = POLLING_STABLE_INTERVAL,
+        max_interval: float = POLLING_MAX_INTERVAL,
+        backoff_factor: float = POLLING_BACKOFF_FACTOR,
+        jitter: float = POLLING_JITTER,
+        seed: int = None,
+    ):
+        self._active_interval = active_interval
+        self._command_interval = command_interval
+        self._command_window = command_window
+        self._stable_interval = stable_interval
+        self._max_interval = max_interval
+        self._backoff_factor = backoff_factor
+        self._jitter = jitter
+        self._random = random.Random(seed)
+        self._stable_polls = 0
+        self._last_command = None
+        self._api = None
+
+    @staticmethod
+    def is_active(api) -> bool:
+        """
+        Get if anything on the hub is changing
+        param api: WiserAPI instance
+        return: True if any room is boosted or heating, hot water is boosted or a shutter is moving
+        """
+        for room in api.rooms.all if api.rooms else []:
+            if room.is_boosted or room.is_heating:
+                return True
+        if api.hotwater and api.hotwater.is_boosted:
+            return True
+        if api.devices:
+            for shutter in api.devices.shutters.all:
+                if shutter.is_opening or shutter.is_closing:
+                    return True
+        return False
+
+    def command_sent(self, *args) -> None:
+        """Poll faster for command_window seconds.  Can be used as an api command listener"""
+        self._last_command = time.monotonic()
+        self._stable_polls = 0
+
+    def attach(self, api) -> None:
+        """
+        Poll faster after commands sent through api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_command_listener(self.command_sent)
+
+    def detach(self) -> None:
+        if self._api is not None:
+            self._api.remove_command_listener(self.command_sent)
+            self._api = None
+
+    def _base_interval(self, api) -> float:
+        if self._last_command is not None and time.monotonic() - self._last_command < self._command_window:
+            return self._command_interval
+        if api is not None and self.is_active(api):
+            self._stable_polls = 0
+            return self._active_interval
+        interval = min(self._max_interval, self._stable_interval * self._backoff_factor ** self._stable_polls)
+        if interval < self._max_interval:
+            self._stable_polls += 1
+        return interval
+
+    def next_interval(self, api=None) -> float:
+        """
+        Get seconds to wait before the next poll.  Call once per poll
+        param api: WiserAPI instance with current data, or None if unknown
+        return: interval in seconds including jitter
+        """
+        interval = self._base_interval(api)
+        return interval * (1 + self._random.uniform(-self._jitter, self._jitter))
@@ -0,0 +1,265 @@
+"""
+Telemetry recorder
+
+Records room and device values after each hub refresh into fixed size typed
+ring buffers, so memory use stays constant however long the process runs.
+Sample windows are returned as memoryviews over the buffers without copying.
+"""
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from . import _LOGGER
+from .const import RECORDER_DEFAULT_CAPACITY
+
+# Metric name: array typecode.  Missing float values are recorded as NaN, missing ints as 0
+ROOM_METRICS = {
+    "current_temperature": "f",
+    "current_target_temperature": "f",
+    "percentage_demand": "b",
+    "is_heating": "b",
+}
+DEVICE_METRICS = {
+    "battery_voltage": "f",
+    "controller_reception_rssi": "h",
+    "device_reception_rssi": "h",
+}
+
+
+class _WiserRingBuffer(object):
+    """Fixed capacity circular buffer backed by a typed array"""
+
+    def __init__(self, typecode: str, capacity: int):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+        self._data = array(typecode, bytes(capacity * array(typecode).itemsize))
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def typecode(self) -> str:
+        return self._data.typecode
+
+    def append(self, value) -> None:
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+
+    def latest(self):
+        """Get most recently appended value or None if empty"""
+        return self._data[self._next - 1] if self._count else None
+
+    def segments(self) -> tuple:
+        """
+        Get the buffer contents in oldest to newest order without copying
+        return: tuple of (older, newer) memoryviews, either may be empty
+        """
+        view = memoryview(self._data)
+        if self._count < self._capacity:
+            return view[:0], view[:self._count]
+        return view[self._next:], view[:self._next]
+
+    def to_list(self) -> list:
+        """Get a copy of the buffer contents in oldest to newest order"""
+        older, newer = self.segments()
+        return older.tolist() + newer.tolist()
+
+
+class _WiserRecorderSeries(object):
+    """Ring buffers for the metrics of one room or device sharing a timestamp buffer"""
+
+    def __init__(self, metrics: dict, capacity: int):
+        self._timestamps = _WiserRingBuffer("d", capacity)
+        self._metrics = {name: _WiserRingBuffer(typecode, capacity) for name, typecode in metrics.items()}
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    @property
+    def latest_timestamp(self) -> float:
+        """Get timestamp of most recent sample or None if nothing recorded"""
+        return self._timestamps.latest()
+
+    @property
+    def metrics(self) -> list:
+        """Get names of recorded metrics"""
+        return list(self._metrics)
+
+    def append(self, timestamp: float, values: dict) -> None:
+        self._timestamps.append(timestamp)
+        for name, buffer in self._metrics.items():
+            buffer.append(values[name])
+
+    def latest(self, metric: str):
+        """Get most recent value of metric or None if nothing recorded"""
+        return self._metrics[metric].latest()
+
+    def _window_slices(self, start: float, end: float) -> list:
+        """Get index ranges within each segment for timestamps in start <= t <= end"""
+        slices = []
+        for segment in self._timestamps.segments():
+            first = bisect_left(segment, start) if start is not None else 0
+            last = bisect_right(segment, end) if end is not None else len(segment)
+            slices.append((first, max(first, last)))
+        return slices
+
+    def timestamps(self, start: float = None, end: float = None) -> tuple:
+        """
+        Get recorded timestamps in a time range without copying
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        return: tuple of (older, newer) memoryviews
+        """
+        return tuple(
+            segment[first:last]
+            for segment, (first, last) in zip(self._timestamps.segments(), self._window_slices(start, end))
+        )
+
+    def window(self, metric: str, start: float = None, end: float = None) -> tuple:
+        """
+        Get recorded values of metric in a time range without copying
+        param metric: metric name
+        param start: earliest unix timestamp, or None for oldest
+        param end: latest unix timestamp, or None for newest
+        return: tuple of (older, newer) memoryviews aligned with timestamps()
+        """
+        return tuple(
+            segment[first:last]
+            for segment, (first, last) in zip(self._metrics[metric].segments(), self._window_slices(start, end))
+        )
+
+    def to_dict(self) -> dict:
+        """Get a copy of all recorded values as lists keyed by metric, plus timestamps"""
+        output = {"timestamps": self._timestamps.to_list()}
+        output.update({name: buffer.to_list() for name, buffer in self._metrics.items()})
+        return output
+
+
+class WiserRecorder(object):
+    """
+    Records room and device telemetry after each hub refresh.
+    Each room and device keeps the last capacity samples.
+    """
+
+    def __init__(self, capacity: int = RECORDER_DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("Recorder capacity must be at least 1")
+        self._capacity = capacity
+        self._rooms = {}
+        self._devices = {}
+        self._sample_listeners = []
+        self._api = None
+
+    @property
+    def capacity(self) -> int:
+        """Get number of samples kept per room or device"""
+        return self._capacity
+
+    @property
+    def room_ids(self) -> list:
+        """Get ids of recorded rooms"""
+        return list(self._rooms)
+
+    @property
+    def device_ids(self) -> list:
+        """Get ids of recorded devices"""
+        return list(self._devices)
+
+    def room(self, room_id: int) -> _WiserRecorderSeries:
+        """Get recorded series for room id or None if not recorded"""
+        return self._rooms.get(room_id)
+
+    def device(self, device_id: int) -> _WiserRecorderSeries:
+        """Get recorded series for device id or None if not recorded"""
+        return self._devices.get(device_id)
+
+    def attach(self, api) -> None:
+        """
+        Record after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop recording refreshes of attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def add_sample_listener(self, listener) -> None:
+        """
+        Add a callback called for each recorded room or device sample
+        param listener: callable taking (entity type "room" or "device", entity id, timestamp, dict of values)
+        """
+        if listener not in self._sample_listeners:
+            self._sample_listeners.append(listener)
+
+    def remove_sample_listener(self, listener) -> None:
+        """
+        Remove a sample callback
+        param listener: callable previously added with add_sample_listener
+        """
+        if listener in self._sample_listeners:
+            self._sample_listeners.remove(listener)
+
+    @staticmethod
+    def _float(value) -> float:
+        return math.nan if value is None else value
+
+    def _append(self, entity_type: str, entity_id: int, timestamp: float, values: dict) -> None:
+        store, metrics = (self._rooms, ROOM_METRICS) if entity_type == "room" else (self._devices, DEVICE_METRICS)
+        series = store.get(entity_id)
+        if series is None:
+            series = store[entity_id] = _WiserRecorderSeries(metrics, self._capacity)
+        series.append(timestamp, values)
+        for listener in list(self._sample_listeners):
+            try:
+                listener(entity_type, entity_id, timestamp, values)
+            except Exception as ex:
+                _LOGGER.error(f"Error in sample listener {listener}: {ex}")
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Record current room and device values
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+
+        for room in api.rooms.all if api.rooms else []:
+            self._append(
+                "room",
+                room.id,
+                timestamp,
+                {
+                    "current_temperature": self._float(room.current_temperature),
+                    "current_target_temperature": self._float(room.current_target_temperature),
+                    "percentage_demand": room.percentage_demand or 0,
+                    "is_heating": room.is_heating,
+                },
+            )
+
+        for device in api.devices.all if api.devices else []:
+            battery = getattr(device, "battery", None)
+            self._append(
+                "device",
+                device.id,
+                timestamp,
+                {
+                    "battery_voltage": battery.voltage if battery and battery.voltage else math.nan,
+                    "controller_reception_rssi": device.signal.controller_reception_rssi or 0,
+                    "device_reception_rssi": device.signal.device_reception_rssi or 0,
+                },
+            )
@@ -0,0 +1,215 @@
+"""
+Offline replay
+
+Builds a WiserAPI from recorded hub data instead of a hub, for tests,
+benchmarks and reproducing issues without access to the hub.  A recording is a
+directory of domain.json, network.json, schedule.json and optionally
+opentherm.json, as written by the cli output command or output_raw_hub_data.
+A series of recordings for playback is a directory of recording directories,
+replayed in name order, or of snapshot files saved by WiserAPI.save_snapshot,
+replayed in the order they were saved.
+
+Commands sent through a replayed api are recorded but do not change the data.
+"""
+import json
+import pathlib
+
+from .const import WISERHUBDOMAIN, WISERHUBNETWORK, WISERHUBOPENTHERM, WISERHUBSCHEDULES
+from .rest_controller import WiserRestActionEnum, _decode_hub_payload, _WiserConnection, _WiserRestController
+
+# Endpoint: file names of a recording, in order of preference
+REPLAY_FILES = {
+    WISERHUBDOMAIN: ["domain.json"],
+    WISERHUBNETWORK: ["network.json"],
+    WISERHUBSCHEDULES: ["schedule.json", "schedules.json"],
+    WISERHUBOPENTHERM: ["opentherm.json"],
+}
+REPLAY_SNAPSHOT_SECTIONS = {
+    WISERHUBDOMAIN: "Domain",
+    WISERHUBNETWORK: "Network",
+    WISERHUBSCHEDULES: "Schedule",
+    WISERHUBOPENTHERM: "OpenTherm",
+}
+
+
+class WiserReplay(object):
+    """
+    Time ordered series of recorded hub data.
+    With auto_step, each hub data read after the first moves to the next recording,
+    so an api refreshed in a loop plays back the series and then stays on the last one
+    """
+
+    def __init__(self, recordings: list, names: list = None, auto_step: bool = True):
+        """
+        param recordings: list of dicts of endpoint: response bytes, oldest first
+        param names: name of each recording
+        param auto_step: move to the next recording on each hub data read
+        """
+        if not recordings:
+            raise ValueError("No recordings to replay")
+        self._recordings = recordings
+        self._names = names or [str(index) for index in range(len(recordings))]
+        self._auto_step = auto_step
+        self._position = 0
+        self._reads = 0
+        self._commands = []
+
+    @classmethod
+    def from_path(cls, path: str, auto_step: bool = True):
+        """
+        Load a recording or series of recordings
+        param path: recording directory, directory of recordings or snapshot files, or a snapshot file
+        param auto_step: move to the next recording on each hub data read
+        return: WiserReplay
+        """
+        from .snapshot import load_snapshot
+
+        path = pathlib.Path(path).expanduser()
+        if path.is_file():
+            snapshot = load_snapshot(path)
+            if snapshot is None:
+                raise ValueError(f"{path} is not a readable hub data snapshot")
+            return cls([cls._snapshot_recording(snapshot)], [path.name], auto_step)
+        if cls._is_recording(path):
+            return cls([cls._load_recording(path)], [path.name], auto_step)
+
+        directories = sorted(child for child in path.iterdir() if child.is_dir() and cls._is_recording(child))
+        if directories:
+            return cls(
+                [cls._load_recording(directory) for directory in directories],
+                [directory.name for directory in directories],
+                auto_step,
+            )
+
+        snapshots = [(load_snapshot(file), file.name) for file in sorted(path.glob("*.snapshot"))]
+        snapshots = sorted(
+            [(snapshot, name) for snapshot, name in snapshots if snapshot is not None],
+            key=lambda item: item[0].timestamp,
+        )
+        if snapshots:
+            return cls(
+                [cls._snapshot_recording(snapshot) for snapshot, _ in snapshots],
+                [name for _, name in snapshots],
+                auto_step,
+            )
+        raise FileNotFoundError(f"No hub data recordings found in {path}")
+
+    @staticmethod
+    def _is_recording(path: pathlib.Path) -> bool:
+        return (path / REPLAY_FILES[WISERHUBDOMAIN][0]).is_file()
+
+    @staticmethod
+    def _load_recording(path: pathlib.Path) -> dict:
+        recording = {}
+        for endpoint, file_names in REPLAY_FILES.items():
+            files = [path / file_name for file_name in file_names if (path / file_name).is_file()]
+            recording[endpoint] = files[0].read_bytes() if files else b""
+        return recording
+
+    @staticmethod
+    def _snapshot_recording(snapshot) -> dict:
+        return {
+            endpoint: json.dumps(snapshot.data[section]).encode() if snapshot.data[section] else b""
+            for endpoint, section in REPLAY_SNAPSHOT_SECTIONS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._recordings)
+
+    @property
+    def position(self) -> int:
+        """Get index of current recording"""
+        return self._position
+
+    @property
+    def name(self) -> str:
+        """Get name of current recording"""
+        return self._names[self._position]
+
+    @property
+    def names(self) -> list:
+        return list(self._names)
+
+    @property
+    def auto_step(self) -> bool:
+        """Get or set if each hub data read moves to the next recording"""
+        return self._auto_step
+
+    @auto_step.setter
+    def auto_step(self, auto_step: bool):
+        self._auto_step = auto_step
+
+    @property
+    def at_end(self) -> bool:
+        return self._position == len(self._recordings) - 1
+
+    @property
+    def commands(self) -> list:
+        """Get commands sent, as (method, url, data) tuples"""
+        return list(self._commands)
+
+    def step(self) -> bool:
+        """
+        Move to the next recording
+        return: False if already at the last recording
+        """
+        if self.at_end:
+            return False
+        self._position += 1
+        return True
+
+    def seek(self, position: int) -> None:
+        """Move to a recording by index"""
+        if not 0 <= position < len(self._recordings):
+            raise IndexError(f"Recording {position} out of range 0 to {len(self._recordings) - 1}")
+        self._position = position
+
+    def _payload(self, endpoint: str) -> bytes:
+        if endpoint == WISERHUBDOMAIN:
+            # Each hub data read starts with the domain endpoint
+            if self._auto_step and self._reads:
+                self.step()
+            self._reads += 1
+        return self._recordings[self._position].get(endpoint, b"")
+
+    def _record_command(self, action: WiserRestActionEnum, url: str, data: dict) -> None:
+        self._commands.append((action.value, url, data))
+
+
+class _WiserReplayController(_WiserRestController):
+    """Rest controller that reads hub data from a WiserReplay instead of the hub"""
+
+    def __init__(self, wiser_connection: _WiserConnection, replay: WiserReplay):
+        self._wiser_connection = wiser_connection
+        self._command_listeners = []
+        # Replayed reads and commands make no requests
+        self._request_listeners = []
+        self._replay = replay
+
+    @property
+    def replay(self) -> WiserReplay:
+        return self._replay
+
+    def _get_hub_data(self, url: str, raise_for_endpoint_error: bool = True):
+        return _decode_hub_payload(self._replay._payload(url))
+
+    def _get_hub_payload(self, url: str, raise_for_endpoint_error: bool = True) -> bytes:
+        return self._replay._payload(url)
+
+    def _do_hub_action(
+        self,
+        action: WiserRestActionEnum,
+        url: str,
+        data: dict = None,
+        raise_for_endpoint_error: bool = True,
+        decode: bool = True,
+    ):
+        if action == WiserRestActionEnum.GET:
+            payload = self._replay._payload(url)
+            return _decode_hub_payload(payload) if decode else payload
+        self._replay._record_command(action, url, data)
+        self._notify_command_listeners(action, url)
+        return True
+
+    def get_connection_pools(self):
+        return {}
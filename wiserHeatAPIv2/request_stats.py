@@ -0,0 +1,146 @@
+"""
+Request statistics
+
+Collects request events from an api into per endpoint counts, error rates,
+retries, bytes and duration histograms, for monitoring hub responsiveness.
+Memory use is fixed per endpoint, no events are kept.
+"""
+import bisect
+import threading
+
+from .const import REQUEST_STATS_BUCKETS
+from .rest_controller import WiserRequestEvent
+
+
+class _WiserEndpointStats(object):
+    """Statistics for requests with the same method and endpoint"""
+
+    __slots__ = ("count", "errors", "error_classes", "statuses", "retries", "bytes_sent", "bytes_received", "total_duration", "max_duration", "histogram")
+
+    def __init__(self, buckets: int):
+        self.count = 0
+        self.errors = 0
+        self.error_classes = {}
+        self.statuses = {}
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.histogram = [0] * (buckets + 1)
+
+
+class WiserRequestStats(object):
+    """
+    Per endpoint request statistics, keyed by method and endpoint, eg "PATCH domain/Room/{id}"
+    """
+
+    def __init__(self, buckets: list = None):
+        """
+        param buckets: ascending upper bounds in seconds of duration histogram buckets
+        """
+        self._buckets = sorted(buckets or REQUEST_STATS_BUCKETS)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._api = None
+
+    @property
+    def buckets(self) -> list:
+        return list(self._buckets)
+
+    def record(self, event: WiserRequestEvent) -> None:
+        """Add a request event"""
+        key = f"{event.method} {event.endpoint}"
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _WiserEndpointStats(len(self._buckets))
+            stats.count += 1
+            if event.error:
+                stats.errors += 1
+                stats.error_classes[event.error] = stats.error_classes.get(event.error, 0) + 1
+            if event.status is not None:
+                stats.statuses[event.status] = stats.statuses.get(event.status, 0) + 1
+            stats.retries += event.retries or 0
+            stats.bytes_sent += event.bytes_sent or 0
+            stats.bytes_received += event.bytes_received or 0
+            stats.total_duration += event.duration
+            stats.max_duration = max(stats.max_duration, event.duration)
+            stats.histogram[bisect.bisect_left(self._buckets, event.duration)] += 1
+
+    def attach(self, api) -> None:
+        """
+        Record every request made by api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_request_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop recording requests of attached api"""
+        if self._api is not None:
+            self._api.remove_request_listener(self.record)
+            self._api = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints = {}
+
+    @property
+    def endpoints(self) -> list:
+        """Get keys of endpoints with requests"""
+        with self._lock:
+            return sorted(self._endpoints)
+
+    def percentile(self, endpoint: str, percent: float) -> float:
+        """
+        Estimate a request duration percentile from the histogram
+        param endpoint: method and endpoint key
+        param percent: percentile from 0 to 100
+        return: upper bound of the bucket containing the percentile, max duration for the last bucket, or None if no requests
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None or not stats.count:
+                return None
+            rank = percent / 100 * stats.count
+            seen = 0
+            for index, count in enumerate(stats.histogram):
+                seen += count
+                if count and seen >= rank:
+                    return self._buckets[index] if index < len(self._buckets) else stats.max_duration
+            return stats.max_duration
+
+    def summary(self, endpoint: str) -> dict:
+        """
+        Get statistics for an endpoint
+        param endpoint: method and endpoint key
+        return: dict of count, errors, error_rate, error_classes, statuses, retries, bytes_sent, bytes_received,
+        mean_duration, max_duration, p50, p95, p99 and histogram, or None if no requests
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                return None
+            summary = {
+                "count": stats.count,
+                "errors": stats.errors,
+                "error_rate": stats.errors / stats.count,
+                "error_classes": dict(stats.error_classes),
+                "statuses": dict(stats.statuses),
+                "retries": stats.retries,
+                "bytes_sent": stats.bytes_sent,
+                "bytes_received": stats.bytes_received,
+                "mean_duration": stats.total_duration / stats.count,
+                "max_duration": stats.max_duration,
+                "histogram": list(stats.histogram),
+            }
+        for percent in [50, 95, 99]:
+            summary[f"p{percent}"] = self.percentile(endpoint, percent)
+        return summary
+
+    @property
+    def summaries(self) -> dict:
+        """Get summary of every endpoint keyed by method and endpoint"""
+        return {endpoint: self.summary(endpoint) for endpoint in self.endpoints}
@@ -18,12 +18,22 @@ from .exceptions import (
 
 import enum
 import json
-import logging
 import re
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-import urllib3
+import time
+
+_ENDPOINT_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def _decode_hub_payload(content: bytes) -> dict:
+    """
+    Decode a hub response, removing any non printable characters the hub includes
+    param content: response bytes
+    return: decoded json data, or empty dict if there is no content
+    """
+    if not content:
+        return {}
+    return json.loads(re.sub(rb'[^\x20-\x7F]+', b'', content))
+
 
 # Connection info class
 class _WiserConnection(object):
@@ -39,14 +49,73 @@ class WiserRestActionEnum(enum.Enum):
     PATCH = "PATCH"
     DELETE = "DELETE"
 
- 
+
+class WiserRequestEvent(object):
+    """
+    Details of one request to the hub, passed to request listeners.
+    Times are in seconds.  The requests library does not report dns lookup or connect times,
+    so elapsed is from sending the request to receiving the response headers of the last attempt
+    and duration is the total time including retries
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "endpoint",
+        "status",
+        "bytes_sent",
+        "bytes_received",
+        "elapsed",
+        "duration",
+        "retries",
+        "error",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        status: int,
+        bytes_sent: int,
+        bytes_received: int,
+        elapsed: float,
+        duration: float,
+        retries: int,
+        error: str,
+    ):
+        self.method = method
+        self.url = url
+        # Url path below /data/v2/ with ids replaced, eg domain/Room/{id}
+        self.endpoint = _ENDPOINT_ID.sub("/{id}", url.split("/data/v2/", 1)[-1])
+        # None if no response was received
+        self.status = status
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.elapsed = elapsed
+        self.duration = duration
+        # None if not known
+        self.retries = retries
+        # Class name of exception raised, or None if successful
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"WiserRequestEvent({self.method} {self.endpoint} status={self.status} duration={self.duration:.3f} retries={self.retries} error={self.error})"
+
+
 class _WiserRestController(object):
     """
     Class to handle getting data from and sending commands to a wiser hub
     """
     def __init__(self, wiser_connection:_WiserConnection):
         self._wiser_connection = wiser_connection
-        
+        self._command_listeners = []
+        self._request_listeners = []
+
+        # requests/urllib3 are only imported once a controller is needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
         # Settings for all API calls
         retries = Retry(
             total=REST_RETRIES, 
@@ -54,6 +123,7 @@ class _WiserRestController(object):
             status_forcelist=[413, 429, 500, 502, 503, 504]
         )
         adapter = HTTPAdapter(max_retries=retries)
+        self._requests_exceptions = requests.exceptions
         self._requests_session = requests.Session()
         self._requests_session.mount("http://", adapter)
         self._requests_session.headers.update(
@@ -64,66 +134,171 @@ class _WiserRestController(object):
             }
         )
 
-    def _do_hub_action(self, action: WiserRestActionEnum, url: str, data: dict = None, raise_for_endpoint_error: bool = True):
+    def _do_hub_action(
+        self,
+        action: WiserRestActionEnum,
+        url: str,
+        data: dict = None,
+        raise_for_endpoint_error: bool = True,
+        decode: bool = True,
+    ):
         """
         Send patch update to hub and raise errors if fails
         param url: url of hub rest api endpoint
         param patchData: json object containing command and values to set
+        param decode: decode GET responses, or return the response bytes if False
         return: boolean
         """
+        if not self._request_listeners:
+            return self._hub_request(action, url, data, raise_for_endpoint_error, decode)
 
+        responses = []
+        started = time.perf_counter()
         try:
-            if action == WiserRestActionEnum.GET:
-                response = self._requests_session.get(
-                    url.format(self._wiser_connection.host),
-                    timeout=REST_TIMEOUT,
-                )
-            elif action == WiserRestActionEnum.PATCH:
-                response = self._requests_session.patch(
-                    url=url,
-                    json=data,
-                    timeout=REST_TIMEOUT,
-                )
-            elif action == WiserRestActionEnum.POST:
-                response = self._requests_session.post(
-                    url=url,
-                    json=data,
-                    timeout=REST_TIMEOUT,
-                )
-            elif action == WiserRestActionEnum.DELETE:
-                response = self._requests_session.delete(
-                    url=url,
-                    json=data,
-                    timeout=REST_TIMEOUT,
-                )
-
-            if not response.ok:
-                self._process_nok_response(response, raise_for_endpoint_error)
-            else:
-                if action == WiserRestActionEnum.GET:
-                    if len(response.content) > 0:
-                        response = re.sub(rb'[^\x20-\x7F]+', b'', response.content)
-                        return json.loads(response)
-                else:
-                    return True
-            return {}
-
-        except requests.exceptions.ConnectTimeout as ex:
-            raise WiserHubConnectionError(
-                f"Connection timeout trying to communicate with Wiser Hub {self._wiser_connection.host}.  Error is {ex}"
-            )
-        except requests.exceptions.ReadTimeout as ex:
-            raise WiserHubConnectionError(
-                f"Read timeout error trying to communicate with Wiser Hub {self._wiser_connection.host}.  Error is {ex}"
-            )
-        except requests.exceptions.ChunkedEncodingError as ex:
-            raise WiserHubConnectionError(
-                f"Chunked Encoding error trying to communicate with Wiser Hub {self._wiser_connection.host}.  Error is {ex}"
-            )
-        except requests.exceptions.ConnectionError as ex:
-            raise WiserHubConnectionError(
-                f"Connection error trying to communicate with Wiser Hub {self._wiser_connection.host}.  Error is {ex}"
+            result = self._hub_request(action, url, data, raise_for_endpoint_error, decode, responses)
+        except Exception as ex:
+            self._notify_request_listeners(action, url, responses, started, ex)
+            raise
+        self._notify_request_listeners(action, url, responses, started)
+        return result
+
+    def _hub_request(
+        self,
+        action: WiserRestActionEnum,
+        url: str,
+        data: dict,
+        raise_for_endpoint_error: bool,
+        decode: bool,
+        responses: list = None,
+    ):
+        """
+        Make request to hub and raise errors if fails
+        param responses: list to add the response to, if given
+        """
+        exceptions = self._requests_exceptions
+        try:
+            response = self._send_request(action, url, data)
+            if responses is not None:
+                responses.append(response)
+            return self._process_response(action, url, response, raise_for_endpoint_error, decode)
+        except (exceptions.ConnectionError, exceptions.ReadTimeout, exceptions.ChunkedEncodingError) as ex:
+            raise self._connection_error(ex)
+
+    def _send_request(self, action: WiserRestActionEnum, url: str, data: dict):
+        """
+        Send request to hub with the session method for the action
+        return: requests response
+        """
+        if action == WiserRestActionEnum.GET:
+            return self._requests_session.get(
+                url.format(self._wiser_connection.host),
+                timeout=REST_TIMEOUT,
             )
+        send = getattr(self._requests_session, action.value.lower())
+        return send(
+            url=url,
+            json=data,
+            timeout=REST_TIMEOUT,
+        )
+
+    def _process_response(
+        self, action: WiserRestActionEnum, url: str, response, raise_for_endpoint_error: bool, decode: bool
+    ):
+        """
+        Return decoded data for GET or True for commands, and raise errors for failed responses
+        """
+        if not response.ok:
+            self._process_nok_response(response, raise_for_endpoint_error)
+        elif action != WiserRestActionEnum.GET:
+            self._notify_command_listeners(action, url)
+            return True
+        elif not decode:
+            return response.content
+        elif len(response.content) > 0:
+            return _decode_hub_payload(response.content)
+        return {} if decode else b""
+
+    def _connection_error(self, ex: Exception) -> WiserHubConnectionError:
+        """
+        Map a requests error to the WiserHubConnectionError raised for it
+        """
+        exceptions = self._requests_exceptions
+        if isinstance(ex, exceptions.ConnectTimeout):
+            reason = "Connection timeout"
+        elif isinstance(ex, exceptions.ReadTimeout):
+            reason = "Read timeout error"
+        elif isinstance(ex, exceptions.ChunkedEncodingError):
+            reason = "Chunked Encoding error"
+        else:
+            reason = "Connection error"
+        return WiserHubConnectionError(
+            f"{reason} trying to communicate with Wiser Hub {self._wiser_connection.host}.  Error is {ex}"
+        )
+
+    def _notify_command_listeners(self, action: WiserRestActionEnum, url: str):
+        for listener in list(self._command_listeners):
+            try:
+                listener(action, url)
+            except Exception as ex:
+                _LOGGER.error(f"Error in command listener {listener}: {ex}")
+
+    def add_command_listener(self, listener):
+        """
+        Add a callback to be called after each successful command sent to the hub
+        param listener: callable taking the WiserRestActionEnum action and url
+        """
+        if listener not in self._command_listeners:
+            self._command_listeners.append(listener)
+
+    def remove_command_listener(self, listener):
+        if listener in self._command_listeners:
+            self._command_listeners.remove(listener)
+
+    def _notify_request_listeners(
+        self, action: WiserRestActionEnum, url: str, responses: list, started: float, error: Exception = None
+    ):
+        duration = time.perf_counter() - started
+        url = url.format(self._wiser_connection.host)
+        response = responses[0] if responses else None
+        # Errors from requests are raised as wiser errors
+        cause = error.__context__ if error is not None and error.__context__ is not None else error
+        request = response.request if response is not None else getattr(cause, "request", None)
+        if response is not None:
+            retries = getattr(response.raw, "retries", None)
+            retries = len(retries.history) if retries is not None else 0
+        elif cause is not None and cause.args and type(cause.args[0]).__name__ == "MaxRetryError":
+            retries = self._requests_session.get_adapter(url).max_retries.total
+        else:
+            retries = None
+        event = WiserRequestEvent(
+            action.value,
+            url,
+            response.status_code if response is not None else None,
+            len(request.body or b"") if request is not None else None,
+            len(response.content) if response is not None else 0,
+            response.elapsed.total_seconds() if response is not None else None,
+            duration,
+            retries,
+            type(error).__name__ if error is not None else None,
+        )
+        for listener in list(self._request_listeners):
+            try:
+                listener(event)
+            except Exception as ex:
+                _LOGGER.error(f"Error in request listener {listener}: {ex}")
+
+    def add_request_listener(self, listener):
+        """
+        Add a callback to be called after each request to the hub, successful or not.
+        Requests are not timed when there are no request listeners
+        param listener: callable taking a WiserRequestEvent
+        """
+        if listener not in self._request_listeners:
+            self._request_listeners.append(listener)
+
+    def remove_request_listener(self, listener):
+        if listener in self._request_listeners:
+            self._request_listeners.remove(listener)
 
     def get_connection_pools(self):
         return self._requests_session.get_adapter(WISERHUBDOMAIN.format(self._wiser_connection.host)).poolmanager.pools
@@ -150,6 +325,10 @@ class _WiserRestController(object):
         """Get data from hub"""
         return self._do_hub_action(WiserRestActionEnum.GET ,url, raise_for_endpoint_error=raise_for_endpoint_error)
 
+    def _get_hub_payload(self, url: str, raise_for_endpoint_error: bool = True) -> bytes:
+        """Get undecoded response bytes from hub"""
+        return self._do_hub_action(WiserRestActionEnum.GET, url, raise_for_endpoint_error=raise_for_endpoint_error, decode=False)
+
     def _send_command(self, url: str, command_data: dict, method: WiserRestActionEnum = WiserRestActionEnum.PATCH):
         """
         Send control command to hub and raise errors if fails
@@ -0,0 +1,218 @@
+"""
+Multi-resolution rollups
+
+Keeps min, max, mean and count of recorded metrics in 1 minute, 15 minute,
+hourly and daily buckets, updated incrementally as samples are recorded.
+Each resolution keeps a fixed number of buckets, so memory is bounded while
+coarse resolutions cover years.  Queries use the coarsest resolution that
+gives the requested detail and still holds the start of the range, so long
+range queries only read a few buckets.
+"""
+import math
+from array import array
+from bisect import bisect_right
+
+from .const import ROLLUP_DEFAULT_MAX_POINTS, ROLLUP_RESOLUTIONS
+
+
+class _WiserRollupLevel(object):
+    """
+    Ring of aggregate buckets at one resolution.
+    Arrays grow as buckets are added until capacity, then the oldest buckets are overwritten.
+    """
+
+    __slots__ = ("size", "capacity", "next", "starts", "counts", "minimums", "maximums", "sums")
+
+    def __init__(self, size: int, capacity: int):
+        self.size = size
+        self.capacity = capacity
+        self.next = 0
+        self.starts = array("I")
+        self.counts = array("I")
+        self.minimums = array("f")
+        self.maximums = array("f")
+        self.sums = array("d")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> int:
+        """Get bucket start by position from oldest, so the ring can be searched with bisect"""
+        if len(self.starts) < self.capacity:
+            return self.starts[index]
+        return self.starts[(self.next + index) % self.capacity]
+
+    def _physical(self, index: int) -> int:
+        return index if len(self.starts) < self.capacity else (self.next + index) % self.capacity
+
+    def add(self, timestamp: float, value: float) -> None:
+        start = int(timestamp // self.size * self.size)
+        if self.starts:
+            latest = self.next - 1
+            if self.starts[latest] == start:
+                self.counts[latest] += 1
+                self.sums[latest] += value
+                if value < self.minimums[latest]:
+                    self.minimums[latest] = value
+                if value > self.maximums[latest]:
+                    self.maximums[latest] = value
+                return
+            if start < self.starts[latest]:
+                # Samples older than the current bucket cannot be added
+                return
+
+        if len(self.starts) < self.capacity:
+            self.starts.append(start)
+            self.counts.append(1)
+            self.minimums.append(value)
+            self.maximums.append(value)
+            self.sums.append(value)
+        else:
+            self.starts[self.next] = start
+            self.counts[self.next] = 1
+            self.minimums[self.next] = value
+            self.maximums[self.next] = value
+            self.sums[self.next] = value
+        self.next = (self.next + 1) % self.capacity
+
+    def oldest(self) -> int:
+        return self[0] if self.starts else None
+
+    def query(self, start: float, end: float) -> list:
+        first = bisect_right(self, start // self.size * self.size - 1) if start is not None else 0
+        last = bisect_right(self, end) if end is not None else len(self)
+        rows = []
+        for index in range(first, last):
+            position = self._physical(index)
+            count = self.counts[position]
+            rows.append((
+                self.starts[position],
+                count,
+                self.minimums[position],
+                self.maximums[position],
+                self.sums[position] / count,
+            ))
+        return rows
+
+
+class WiserRollupEngine(object):
+    """
+    Rolls up recorded room and device metrics.
+    resolutions is a dict of bucket size in seconds to number of buckets kept.
+    """
+
+    def __init__(self, resolutions: dict = None):
+        self._resolutions = dict(sorted((resolutions or ROLLUP_RESOLUTIONS).items()))
+        self._series = {}
+        self._recorder = None
+        self._latest = None
+
+    @property
+    def resolutions(self) -> list:
+        """Get bucket sizes in seconds, finest first"""
+        return list(self._resolutions)
+
+    def ingest(self, entity_type: str, entity_id: int, timestamp: float, values: dict) -> None:
+        """
+        Add sample values to all resolutions.  Samples must be added in time order
+        param entity_type: room or device
+        param entity_id: room or device id
+        param timestamp: unix timestamp
+        param values: dict of metric name to value, None and NaN values are skipped
+        """
+        if self._latest is None or timestamp > self._latest:
+            self._latest = timestamp
+        for metric, value in values.items():
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            key = (entity_type, entity_id, metric)
+            levels = self._series.get(key)
+            if levels is None:
+                levels = self._series[key] = [
+                    _WiserRollupLevel(size, capacity) for size, capacity in self._resolutions.items()
+                ]
+            for level in levels:
+                level.add(timestamp, value)
+
+    def attach(self, recorder) -> None:
+        """
+        Roll up every sample recorded by recorder
+        param recorder: WiserRecorder
+        """
+        self.detach()
+        self._recorder = recorder
+        recorder.add_sample_listener(self.ingest)
+
+    def detach(self) -> None:
+        """Stop rolling up samples from attached recorder"""
+        if self._recorder is not None:
+            self._recorder.remove_sample_listener(self.ingest)
+            self._recorder = None
+
+    def resolution_for(
+        self,
+        start: float,
+        end: float,
+        step: float = None,
+        max_points: int = ROLLUP_DEFAULT_MAX_POINTS,
+        now: float = None,
+    ) -> int:
+        """
+        Get the coarsest resolution that satisfies the request, from those still holding buckets back to start.
+        With step, this is the coarsest resolution with buckets no bigger than step.
+        Otherwise it is the finest resolution that returns no more than max_points buckets.
+        If no resolution satisfies the request the finest one holding start is used, and if none
+        holds start the one with the longest retention
+        param start: start unix timestamp
+        param end: end unix timestamp
+        param step: largest acceptable bucket size in seconds
+        param max_points: largest acceptable number of buckets if step is not given
+        param now: unix timestamp retention is counted back from, defaults to the latest sample ingested
+        return: bucket size in seconds
+        """
+        now = self._latest if now is None else now
+        sizes = [size for size, capacity in self._resolutions.items() if now is None or now - size * capacity <= start]
+        if not sizes:
+            sizes = [max(self._resolutions, key=lambda size: size * self._resolutions[size])]
+        return self._select(sizes, start, end, step, max_points)
+
+    @staticmethod
+    def _select(sizes: list, start: float, end: float, step: float, max_points: int) -> int:
+        if step is not None:
+            suitable = [size for size in sizes if size <= step]
+            return suitable[-1] if suitable else sizes[0]
+        suitable = [size for size in sizes if (end - start) / size <= max(1, max_points)]
+        return suitable[0] if suitable else sizes[-1]
+
+    def query(
+        self,
+        entity_type: str,
+        entity_id: int,
+        metric: str,
+        start: float,
+        end: float,
+        step: float = None,
+        max_points: int = ROLLUP_DEFAULT_MAX_POINTS,
+    ) -> dict:
+        """
+        Get aggregates of a metric over a time range
+        param entity_type: room or device
+        param entity_id: room or device id
+        param metric: metric name
+        param start: start unix timestamp
+        param end: end unix timestamp
+        param step: largest acceptable bucket size in seconds, see resolution_for
+        param max_points: largest acceptable number of buckets if step is not given
+        return: dict of resolution (bucket size in seconds) and buckets,
+        a list of (bucket start, count, min, max, mean) tuples in time order
+        """
+        levels = self._series.get((entity_type, entity_id, metric))
+        if levels is None:
+            return {"resolution": self.resolution_for(start, end, step, max_points), "buckets": []}
+        # Levels that have not yet overwritten a bucket hold all samples of the series
+        sizes = [level.size for level in levels if len(level) < level.capacity or level.oldest() <= start]
+        if not sizes:
+            sizes = [max(levels, key=lambda level: level.size * level.capacity).size]
+        resolution = self._select(sizes, start, end, step, max_points)
+        level = levels[self.resolutions.index(resolution)]
+        return {"resolution": resolution, "buckets": level.query(start, end)}
@@ -1,16 +1,15 @@
-from concurrent.futures.process import _threads_wakeups
 import enum
 import json
 import time
-from datetime import datetime, timedelta
-
-from ruamel.yaml import YAML
+from datetime import date, datetime, timedelta
 
 from . import _LOGGER
 from .const import (DEFAULT_LEVEL_SCHEDULE, SPECIAL_DAYS, SPECIAL_TIMES, TEMP_MINIMUM, TEMP_OFF, TEXT_DEGREESC,
                     TEXT_HEATING, TEXT_LEVEL, TEXT_LIGHTING, TEXT_OFF, TEXT_ON, TEXT_ONOFF, TEXT_SETPOINT, TEXT_SHUTTERS, TEXT_STATE,
                     TEXT_TEMP, TEXT_TIME, TEXT_UNKNOWN, TEXT_WEEKDAYS,
                     TEXT_WEEKENDS, WEEKDAYS, WEEKENDS)
+from .helpers.schedule_validation import _WiserScheduleValidator
+from .helpers.special_times import _WiserSunTimes, _format_time
 from .helpers.temp import _WiserTemperatureFunctions as tf
 from .rest_controller import _WiserRestController, WiserRestActionEnum
 
@@ -24,15 +23,21 @@ class WiserScheduleTypeEnum(enum.Enum):
 class _WiserSchedule(object):
     """Class representing a wiser Schedule"""
 
-    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets):
+    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets, system=None):
         self._wiser_rest_controller = wiser_rest_controller
         self._type = schedule_type
         self._schedule_data = schedule_data
         self._sunrises = sunrises
         self._sunsets = sunsets
+        self._system = system
         self._assignments = []
         self._device_ids = []
 
+    @property
+    def _sun_times(self) -> _WiserSunTimes:
+        # Read through the system so a changed timezone or daylight saving setting is used
+        return self._system.sun_times if self._system else None
+
     def _validate_schedule_type(self, schedule_data: dict) -> bool:
         return True if schedule_data.get("Type", None) == self.schedule_type or schedule_data.get("SubType", None) == self.schedule_type  else False
 
@@ -40,7 +45,7 @@ class _WiserSchedule(object):
         try:
             time.strptime(time_value, "%H:%M")
             return True
-        except ValueError:
+        except (TypeError, ValueError):
             return False
 
     def _ensure_type(self, schedule_data: dict) -> dict:
@@ -242,6 +247,7 @@ class _WiserSchedule(object):
         return: boolen - true = successfully saved, false = failed to save
         """
         try:
+            from ruamel.yaml import YAML
             yaml = YAML()
             with open(schedule_yaml_file, "w") as file:
                 yaml.dump(self._convert_from_wiser_schedule(self._schedule_data), file)
@@ -250,14 +256,26 @@ class _WiserSchedule(object):
             _LOGGER.error(f"Error saving schedule to yaml file: {ex}")
             return False
 
+    def validate_schedule(self, schedule_data: dict) -> list:
+        """
+        Validate schedule data in wiser format against hub limits without sending it
+        param schedule_data: json data respresenting a schedule
+        return: list of validation errors, empty if schedule is valid
+        """
+        return _WiserScheduleValidator.validate(self._type, schedule_data)
+
     def set_schedule(self, schedule_data: dict) -> bool:
         """
-        Set new schedule
+        Set new schedule.  Schedule is validated before it is sent to the hub.
         param scheduleData: json data respresenting a schedule
         return: boolen - true = successfully set, false = failed to set
         """
         try:
-            self._send_schedule_command("UPDATE", self._remove_schedule_elements(schedule_data))  
+            errors = self.validate_schedule(schedule_data)
+            if errors:
+                _LOGGER.error(f"Schedule not sent to hub as it failed validation: {'; '.join(errors)}")
+                return False
+            self._send_schedule_command("UPDATE", self._remove_schedule_elements(schedule_data))
             return True
         except Exception as ex:
             _LOGGER.error(f"Error copying schedule: {ex}")
@@ -274,8 +292,7 @@ class _WiserSchedule(object):
             with open(schedule_file, "r") as file:
                 schedule_data = json.load(file)
                 if self._validate_schedule_type(schedule_data):
-                    self.set_schedule(self._remove_schedule_elements(schedule_data))
-                    return True
+                    return self.set_schedule(self._remove_schedule_elements(schedule_data))
                 else:
                     _LOGGER.error(f"{schedule_data.get('Type', TEXT_UNKNOWN)} is an incorrect schedule type for this device.  It should be a {self.schedule_type} schedule.")
         except Exception as ex:
@@ -289,13 +306,13 @@ class _WiserSchedule(object):
         return: boolen - true = successfully set, false = failed to set
         """
         try:
+            from ruamel.yaml import YAML
             yaml = YAML()
             with open(schedule_yaml_file, "r") as file:
                 schedule_data = yaml.load(file)
                 if self._validate_schedule_type(schedule_data):
                     schedule = self._convert_to_wiser_schedule(schedule_data)
-                    self.set_schedule(schedule)
-                    return True
+                    return self.set_schedule(schedule)
                 else:
                     _LOGGER.error(f"This is an incorrect schedule type for this device.  It should be a {self.schedule_type} schedule.")
         except Exception as ex:
@@ -314,8 +331,7 @@ class _WiserSchedule(object):
                 for entry in schedule_data.get("ScheduleData"):
                     schedule_json.update({entry.get("day"): entry.get("slots")})
                 schedule = self._convert_to_wiser_schedule(schedule_json)
-                self.set_schedule(schedule)
-                return True
+                return self.set_schedule(schedule)
             else:
                 _LOGGER.error(f"{schedule_data.get('Type', TEXT_UNKNOWN)} is an incorrect schedule type for this device.  It should be a {self.schedule_type} schedule.")
         except Exception as ex:
@@ -324,8 +340,8 @@ class _WiserSchedule(object):
 
 class _WiserHeatingSchedule(_WiserSchedule):
     """ Class for Wiser Heating Schedule """
-    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets):
-        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets)
+    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets, system=None):
+        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets, system)
 
     def assign_schedule(self, room_ids: list, include_current: bool = True) -> bool:
         """
@@ -397,17 +413,22 @@ class _WiserHeatingSchedule(_WiserSchedule):
                     time = str(value).replace(":", "")
                     times.append(time)
                 if key.title() in [TEXT_TEMP, TEXT_SETPOINT]:
-                    temp = tf._to_wiser_temp(
-                        float(value) if str(value).title() != TEXT_OFF else TEMP_OFF
-                    )
+                    # Temps are not clamped so out of range values are reported by validation
+                    if str(value).title() == TEXT_OFF:
+                        temp = tf._to_wiser_temp(TEMP_OFF)
+                    else:
+                        try:
+                            temp = int(round(float(value) * 10))
+                        except ValueError:
+                            temp = value
                     temps.append(temp)
         return {TEXT_TIME: times, TEXT_DEGREESC: temps}
 
 
 class _WiserOnOffSchedule(_WiserSchedule):
     """ Class for Wiser OnOff Schedule """# System Object
-    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets):
-        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets)
+    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets, system=None):
+        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets, system)
         self._device_type_ids = []
 
     @property
@@ -495,17 +516,19 @@ class _WiserOnOffSchedule(_WiserSchedule):
         times = []
 
         for entry in day_schedule:
+            # Invalid entries are passed through unchanged to be reported by validation
             try:
-                if self._is_valid_time(entry.get("Time")):
+                state = str(entry.get("State", entry.get(TEXT_SETPOINT))).title()
+                if self._is_valid_time(entry.get("Time")) and state in [TEXT_ON, TEXT_OFF]:
                     time = int(str(entry.get("Time")).replace(":", ""))
                     time = time if time != 0 else 2400
+                    if state == TEXT_OFF:
+                        time = -time
                 else:
-                    time = 0
-                if entry.get("State", entry.get(TEXT_SETPOINT)).title() == TEXT_OFF:
-                    time = -abs(time) if time != 0 else -2400
+                    time = entry
             except Exception as ex:
                 _LOGGER.debug(ex)
-                time = 0
+                time = entry
             times.append(time)
         return times
 
@@ -515,8 +538,8 @@ class _WiserLevelSchedule(_WiserSchedule):
         Class for Wiser Level Schedule
         Lights and Shutters have 2 ids and need to use Light ID or Shutter ID for schedule control
     """
-    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets):
-        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets)
+    def __init__(self, wiser_rest_controller:_WiserRestController, schedule_type: str, schedule_data: dict, sunrises, sunsets, system=None):
+        super().__init__(wiser_rest_controller, schedule_type, schedule_data, sunrises, sunsets, system)
 
 
     @property
@@ -549,6 +572,31 @@ class _WiserLevelSchedule(_WiserSchedule):
         """Get schedule level type (lighting/shutters)"""
         return self.level_type
 
+    def get_levels_for_date(self, day: date) -> list:
+        """
+        Get schedule entries for a date with sunrise/sunset resolved to times.
+        Uses times calculated for the hub location if available, so can be used for any date,
+        otherwise the hub provided times for the next 7 days.
+        param day: date to get schedule entries for
+        return: list of (time, level) tuples sorted by time
+        """
+        day_name = (WEEKDAYS + WEEKENDS)[day.weekday()]
+        day_schedule = self.schedule_data.get(day_name, {TEXT_TIME: [], TEXT_LEVEL: []})
+        entries = []
+        for setting_time, level in zip(day_schedule[TEXT_TIME], day_schedule[TEXT_LEVEL]):
+            if setting_time in SPECIAL_TIMES.values():
+                if self._sun_times:
+                    setting_time = self._sun_times.resolve(setting_time, day)
+                elif setting_time == SPECIAL_TIMES.get("Sunrise"):
+                    setting_time = self._sunrises.get(day_name)
+                else:
+                    setting_time = self._sunsets.get(day_name)
+            else:
+                setting_time = _format_time(setting_time)
+            if setting_time:
+                entries.append((setting_time, level))
+        return sorted(entries)
+
     def assign_schedule(self, device_ids: list, include_current: bool = True) -> bool:
         """
         Assign schedule to devices
@@ -637,17 +685,20 @@ class _WiserLevelSchedule(_WiserSchedule):
         levels = []
         for entry in day_schedule:
             for key, value in entry.items():
+                # Invalid values are passed through unchanged to be reported by validation
                 if key.title() == TEXT_TIME:
-                    if value.title() in SPECIAL_TIMES.keys():
-                        time = SPECIAL_TIMES[value.title()]
+                    if str(value).title() in SPECIAL_TIMES.keys():
+                        time = SPECIAL_TIMES[str(value).title()]
+                    elif self._is_valid_time(value):
+                        time = str(value).replace(":", "")
                     else:
-                        if self._is_valid_time(value):
-                            time = str(value).replace(":", "")
-                        else:
-                            time = "0"
+                        time = value
                     times.append(time)
                 if key.title() in [TEXT_LEVEL, TEXT_SETPOINT]:
-                    levels.append(int(value))
+                    try:
+                        levels.append(int(value))
+                    except (TypeError, ValueError):
+                        levels.append(value)
         return {TEXT_TIME: times, TEXT_LEVEL: levels}
 
 
@@ -701,10 +752,11 @@ class _WiserScheduleNext:
 class _WiserScheduleCollection(object):
     """Class holding all wiser schedule objects"""
 
-    def __init__(self, wiser_rest_controller: _WiserRestController, schedule_data: dict, sunrises, sunsets):
+    def __init__(self, wiser_rest_controller: _WiserRestController, schedule_data: dict, sunrises, sunsets, system=None):
         self._wiser_rest_controller = wiser_rest_controller
         self._sunrises = sunrises
         self._sunsets = sunsets
+        self._system = system
         self._heating_schedules = []
         self._onoff_schedules = []
         self._level_schedules = []
@@ -715,11 +767,11 @@ class _WiserScheduleCollection(object):
         for schedule_type in schedule_data:
             for schedule in schedule_data.get(schedule_type):
                 if schedule_type == WiserScheduleTypeEnum.heating.value:
-                    self._heating_schedules.append(_WiserHeatingSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets))
+                    self._heating_schedules.append(_WiserHeatingSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets, self._system))
                 if schedule_type == WiserScheduleTypeEnum.onoff.value:
-                    self._onoff_schedules.append(_WiserOnOffSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets))
+                    self._onoff_schedules.append(_WiserOnOffSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets, self._system))
                 if schedule_type == WiserScheduleTypeEnum.level.value:
-                    self._level_schedules.append(_WiserLevelSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets))
+                    self._level_schedules.append(_WiserLevelSchedule(self._wiser_rest_controller, schedule_type, schedule, self._sunrises, self._sunsets, self._system))
 
     def _send_schedule_command(self, action: str, schedule_data: dict, id: int = 0) -> bool:
         """
@@ -0,0 +1,166 @@
+"""
+Zigbee signal monitor
+
+Tracks an exponentially weighted mean and variance of rssi and lqi for every
+device and flags devices whose signal falls sharply below its usual level.
+Each refresh is a constant amount of work per device and no history is kept.
+"""
+import math
+import time
+
+from . import _LOGGER
+from .const import (
+    SIGNAL_MONITOR_ALPHA,
+    SIGNAL_MONITOR_MIN_DEVIATION,
+    SIGNAL_MONITOR_THRESHOLD,
+    SIGNAL_MONITOR_WARMUP,
+)
+
+SIGNAL_METRICS = [
+    "device_reception_rssi",
+    "device_reception_lqi",
+    "controller_reception_rssi",
+    "controller_reception_lqi",
+]
+
+
+class _WiserSignalTrend(object):
+    """Exponentially weighted mean and variance of a signal metric"""
+
+    __slots__ = ("samples", "mean", "variance", "last", "last_timestamp", "z_score", "is_degraded")
+
+    def __init__(self):
+        self.samples = 0
+        self.mean = None
+        self.variance = 0.0
+        self.last = None
+        self.last_timestamp = None
+        self.z_score = 0.0
+        self.is_degraded = False
+
+    def __repr__(self) -> str:
+        return f"<_WiserSignalTrend last={self.last} mean={self.mean} z_score={self.z_score}>"
+
+    @property
+    def deviation(self) -> float:
+        return math.sqrt(self.variance)
+
+    def update(self, value: float, timestamp: float, alpha: float, min_deviation: float) -> None:
+        self.samples += 1
+        self.last = value
+        self.last_timestamp = timestamp
+        if self.mean is None:
+            self.mean = float(value)
+            return
+        # Score against the trend before this sample so a sudden drop is not absorbed into it
+        difference = value - self.mean
+        self.z_score = difference / max(self.deviation, min_deviation)
+        increment = alpha * difference
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance + difference * increment)
+
+
+class WiserSignalMonitor(object):
+    """
+    Monitors device signal strength and quality.
+    A metric is degraded when it is threshold deviations below its weighted mean,
+    after warmup samples, and clears once the value is back within threshold deviations.
+    """
+
+    def __init__(
+        self,
+        alpha: float = SIGNAL_MONITOR_ALPHA,
+        threshold: float = SIGNAL_MONITOR_THRESHOLD,
+        warmup: int = SIGNAL_MONITOR_WARMUP,
+        min_deviation: float = SIGNAL_MONITOR_MIN_DEVIATION,
+    ):
+        self._alpha = alpha
+        self._threshold = threshold
+        self._warmup = warmup
+        self._min_deviation = min_deviation
+        self._devices = {}
+        self._api = None
+
+    def update(self, device_id: int, values: dict, timestamp: float = None) -> list:
+        """
+        Add signal values for a device
+        param device_id: device id
+        param values: dict of metric name to value, missing or None values are skipped
+        param timestamp: unix timestamp of sample, defaults to now
+        return: list of metrics that became degraded with this sample
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        trends = self._devices.get(device_id)
+        if trends is None:
+            trends = self._devices[device_id] = {}
+
+        newly_degraded = []
+        for metric, value in values.items():
+            if value is None:
+                continue
+            trend = trends.get(metric)
+            if trend is None:
+                trend = trends[metric] = _WiserSignalTrend()
+            trend.update(value, timestamp, self._alpha, self._min_deviation)
+
+            was_degraded = trend.is_degraded
+            trend.is_degraded = trend.samples > self._warmup and trend.z_score <= -self._threshold
+            if trend.is_degraded and not was_degraded:
+                newly_degraded.append(metric)
+                _LOGGER.warning(
+                    f"Device {device_id} {metric} dropped to {value} from an average of {round(trend.mean, 1)}"
+                )
+        return newly_degraded
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add signal values for each device of api
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for device in api.devices.all if api.devices else []:
+            signal = device.signal
+            self.update(device.id, {metric: getattr(signal, metric) for metric in SIGNAL_METRICS}, timestamp)
+
+    def attach(self, api) -> None:
+        """
+        Update after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop updating from attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def trends(self, device_id: int) -> dict:
+        """Get signal trends for device keyed by metric name"""
+        return dict(self._devices.get(device_id, {}))
+
+    def trend(self, device_id: int, metric: str) -> _WiserSignalTrend:
+        """Get signal trend for device metric or None if not tracked"""
+        return self._devices.get(device_id, {}).get(metric)
+
+    @property
+    def degraded(self) -> dict:
+        """Get degraded metrics keyed by device id"""
+        return {
+            device_id: [metric for metric, trend in trends.items() if trend.is_degraded]
+            for device_id, trends in self._devices.items()
+            if any(trend.is_degraded for trend in trends.values())
+        }
+
+    def reset(self, device_id: int = None) -> None:
+        """
+        Clear trends, for example after a device is moved
+        param device_id: device to reset, or None for all devices
+        """
+        if device_id is None:
+            self._devices = {}
+        else:
+            self._devices.pop(device_id, None)
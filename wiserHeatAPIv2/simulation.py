@@ -0,0 +1,443 @@
+"""
+Heating what-if simulation
+
+Simulates the effective setpoint of each room over a number of days from compiled
+heating schedules, applying boosts, manual overrides, away mode and eco/comfort
+mode without sending anything to the hub.
+
+Times are in minutes from the start of the simulation so scenarios are cheap to
+build and run.  Use WiserHeatingSimulator.minutes_from_start to convert datetimes.
+"""
+import enum
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from .const import (
+    MAX_BOOST_INCREASE,
+    SIMULATION_COMFORT_LEAD_MINUTES,
+    SIMULATION_ECO_LEAD_MINUTES,
+    TEMP_MAXIMUM,
+    TEMP_MINIMUM,
+    TEMP_OFF,
+    TEXT_DEGREESC,
+    TEXT_TIME,
+    WEEKDAYS,
+    WEEKENDS,
+)
+
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+class WiserSimulationOriginEnum(enum.Enum):
+    schedule = "Schedule"
+    comfort = "Comfort"
+    eco = "Eco"
+    manual = "Manual"
+    override = "Override"
+    boost = "Boost"
+    away = "Away"
+    off = "Off"
+
+
+class _WiserCompiledSchedule(object):
+    """
+    Heating schedule compiled to a sorted list of minute of week transitions.
+    Minute 0 is Monday 00:00.
+    """
+
+    def __init__(self, schedule_data: dict):
+        transitions = {}
+        for day_index, day in enumerate(WEEKDAYS + WEEKENDS):
+            day_schedule = schedule_data.get(day, {})
+            for time, temp in zip(day_schedule.get(TEXT_TIME, []), day_schedule.get(TEXT_DEGREESC, [])):
+                time = int(time)
+                transitions[day_index * MINUTES_PER_DAY + (time // 100) * 60 + time % 100] = int(temp) / 10
+        self._minutes = sorted(transitions)
+        self._setpoints = [transitions[minute] for minute in self._minutes]
+
+    @property
+    def transitions(self) -> list:
+        """Get list of (minute of week, setpoint) transitions"""
+        return list(zip(self._minutes, self._setpoints))
+
+    def setpoint_at(self, minute_of_week: int) -> float:
+        """Get scheduled setpoint at minute of week"""
+        if not self._minutes:
+            return TEMP_MINIMUM
+        # Before the first entry of the week the last entry of previous week applies
+        return self._setpoints[bisect_right(self._minutes, minute_of_week % MINUTES_PER_WEEK) - 1]
+
+    def timeline(self, start_minute_of_week: int, duration: int) -> tuple:
+        """
+        Get schedule transitions over a period
+        param start_minute_of_week: minute of week the period starts
+        param duration: length of period in minutes
+        return: tuple of (times, setpoints) lists with times in minutes from start
+        """
+        times = [0]
+        setpoints = [self.setpoint_at(start_minute_of_week)]
+        if not self._minutes:
+            return times, setpoints
+        week_start = -start_minute_of_week
+        index = bisect_right(self._minutes, start_minute_of_week)
+        while True:
+            if index == len(self._minutes):
+                index = 0
+                week_start += MINUTES_PER_WEEK
+            time = week_start + self._minutes[index]
+            if time >= duration:
+                break
+            if self._setpoints[index] != setpoints[-1]:
+                times.append(time)
+                setpoints.append(self._setpoints[index])
+            index += 1
+        return times, setpoints
+
+
+class _WiserSimulationRoom(object):
+    """Room settings used by the simulator"""
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        schedule: _WiserCompiledSchedule,
+        mode: str = "Auto",
+        manual_target_temperature: float = TEMP_MINIMUM,
+        away_mode_suppressed: bool = False,
+    ):
+        self.id = id
+        self.name = name
+        self.schedule = schedule
+        self.mode = mode
+        self.manual_target_temperature = manual_target_temperature
+        self.away_mode_suppressed = away_mode_suppressed is True
+
+
+class WiserSimulationScenario(object):
+    """
+    A set of changes to simulate.  Method names follow the equivalent room and system methods.
+    All times are minutes from the start of the simulation.
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name
+        self._room_events = {}
+        self._modes = {}
+        self._away_periods = []
+        self.eco_mode_enabled = None
+        self.comfort_mode_enabled = None
+
+    def _add_event(self, room_id: int, event: tuple):
+        self._room_events.setdefault(room_id, []).append(event)
+        return self
+
+    def boost(self, room_id: int, inc_temp: float, duration: int, start: int = 0, current_temperature: float = None):
+        """
+        Boost room target temperature
+        param inc_temp: increase over current temperature (or scheduled setpoint if not given) by 0C to 5C
+        param duration: minutes
+        param start: minutes from start of simulation
+        """
+        return self._add_event(
+            room_id,
+            (start, start + duration, WiserSimulationOriginEnum.boost, min(inc_temp, MAX_BOOST_INCREASE), current_temperature)
+        )
+
+    def set_target_temperature(self, room_id: int, temp: float, start: int = 0):
+        """Override target temperature until the next scheduled change"""
+        return self._add_event(room_id, (start, None, WiserSimulationOriginEnum.override, temp, None))
+
+    def set_target_temperature_for_duration(self, room_id: int, temp: float, duration: int, start: int = 0):
+        """Override target temperature for a duration in minutes"""
+        return self._add_event(room_id, (start, start + duration, WiserSimulationOriginEnum.override, temp, None))
+
+    def set_mode(self, room_id: int, mode: str, manual_target_temperature: float = None):
+        """Set room mode (Auto, Manual or Off) for the whole simulation"""
+        self._modes[room_id] = (mode.title(), manual_target_temperature)
+        return self
+
+    def away(self, start: int = 0, end: int = None):
+        """Enable away mode between start and end (or end of simulation)"""
+        self._away_periods.append((start, end))
+        return self
+
+
+class _WiserSimulationResult(object):
+    """Simulated setpoint timelines for each room"""
+
+    def __init__(self, start: datetime, duration: int, rooms: dict, timelines: dict):
+        self._start = start
+        self._duration = duration
+        self._rooms = rooms
+        self._timelines = timelines
+
+    @property
+    def start(self) -> datetime:
+        return self._start
+
+    @property
+    def end(self) -> datetime:
+        return self._start + timedelta(minutes=self._duration)
+
+    @property
+    def room_ids(self) -> list:
+        return list(self._timelines)
+
+    def timeline(self, room_id: int) -> tuple:
+        """Get (times, setpoints, origins) lists for room with times in minutes from start"""
+        return self._timelines.get(room_id)
+
+    def setpoint_at(self, room_id: int, minute: int) -> float:
+        """Get simulated setpoint for room at minutes from start"""
+        times, setpoints, _ = self._timelines[room_id]
+        return setpoints[bisect_right(times, minute) - 1]
+
+    def segments(self, room_id: int) -> list:
+        """Get list of (start datetime, end datetime, setpoint, origin) for room"""
+        times, setpoints, origins = self._timelines[room_id]
+        ends = times[1:] + [self._duration]
+        return [
+            (self._start + timedelta(minutes=start), self._start + timedelta(minutes=end), setpoint, origin)
+            for start, end, setpoint, origin in zip(times, ends, setpoints, origins)
+        ]
+
+    def minutes_at_or_above(self, room_id: int, temp: float) -> int:
+        """Get number of minutes room setpoint is at or above temp"""
+        times, setpoints, _ = self._timelines[room_id]
+        ends = times[1:] + [self._duration]
+        return sum(end - start for start, end, setpoint in zip(times, ends, setpoints) if setpoint >= temp)
+
+
+class WiserHeatingSimulator(object):
+    """
+    Simulates room setpoints over N days from compiled schedules and a scenario of changes.
+    Create from a WiserAPI instance with from_api() to use current hub settings.
+    """
+
+    def __init__(
+        self,
+        rooms: list,
+        start: datetime = None,
+        away_mode_target_temperature: float = TEMP_MINIMUM,
+        away_mode_enabled: bool = False,
+        eco_mode_enabled: bool = False,
+        comfort_mode_enabled: bool = False,
+        comfort_lead_minutes: int = SIMULATION_COMFORT_LEAD_MINUTES,
+        eco_lead_minutes: int = SIMULATION_ECO_LEAD_MINUTES,
+    ):
+        self._rooms = {room.id: room for room in rooms}
+        self._start = (start or datetime.now()).replace(second=0, microsecond=0)
+        self._start_minute_of_week = (
+            self._start.weekday() * MINUTES_PER_DAY + self._start.hour * 60 + self._start.minute
+        )
+        self.away_mode_target_temperature = away_mode_target_temperature
+        self.away_mode_enabled = away_mode_enabled
+        self.eco_mode_enabled = eco_mode_enabled
+        self.comfort_mode_enabled = comfort_mode_enabled
+        self.comfort_lead_minutes = comfort_lead_minutes
+        self.eco_lead_minutes = eco_lead_minutes
+        self._base_timelines = {}
+
+    @classmethod
+    def from_api(cls, api, start: datetime = None, **kwargs):
+        """
+        Create simulator from current WiserAPI data
+        param api: WiserAPI instance
+        param start: start of simulation, defaults to hub time
+        """
+        rooms = [
+            _WiserSimulationRoom(
+                room.id,
+                room.name,
+                compile_schedule(room.schedule),
+                room.mode,
+                room.manual_target_temperature,
+                room.away_mode_suppressed,
+            )
+            for room in api.rooms.all
+        ]
+        system = api.system
+        return cls(
+            rooms,
+            start or system.hub_time,
+            away_mode_target_temperature=system.away_mode_target_temperature,
+            away_mode_enabled=system.away_mode_enabled,
+            eco_mode_enabled=system.eco_mode_enabled is True,
+            comfort_mode_enabled=system.comfort_mode_enabled is True,
+            **kwargs
+        )
+
+    @property
+    def rooms(self) -> list:
+        return list(self._rooms.values())
+
+    @property
+    def start(self) -> datetime:
+        return self._start
+
+    def minutes_from_start(self, when: datetime) -> int:
+        """Convert datetime to minutes from start of simulation"""
+        return int((when - self._start).total_seconds() // 60)
+
+    def _base_timeline(self, room: _WiserSimulationRoom, duration: int) -> tuple:
+        # Schedule timelines do not change between scenarios so are cached
+        key = (room.id, duration)
+        timeline = self._base_timelines.get(key)
+        if timeline is None:
+            timeline = self._base_timelines[key] = room.schedule.timeline(self._start_minute_of_week, duration)
+        return timeline
+
+    @staticmethod
+    def _apply_leads(times: list, setpoints: list, origins: list, comfort_lead: int, eco_lead: int) -> tuple:
+        """Move schedule increases earlier for comfort mode and decreases earlier for eco mode"""
+        new_times = [times[0]]
+        new_origins = [origins[0]]
+        for index in range(1, len(times)):
+            if setpoints[index] > setpoints[index - 1]:
+                lead, origin = comfort_lead, WiserSimulationOriginEnum.comfort
+            else:
+                lead, origin = eco_lead, WiserSimulationOriginEnum.eco
+            time = max(times[index] - lead, new_times[-1] + 1, 0) if lead else times[index]
+            new_times.append(time)
+            new_origins.append(origin if lead and time != times[index] else origins[index])
+        return new_times, list(setpoints), new_origins
+
+    @staticmethod
+    def _overlay(timeline: tuple, start: int, end: int, function, origin: str) -> tuple:
+        """
+        Apply function to setpoints between start and end, splitting segments as needed.
+        Origin is only changed for segments where the setpoint changes.
+        """
+        times, setpoints, origins = timeline
+        start = max(start, 0)
+        if end is not None and end <= start:
+            return timeline
+
+        start_index = bisect_right(times, start) - 1
+        end_index = len(times) if end is None else bisect_right(times, end - 1)
+        new_times = times[:start_index + 1]
+        new_setpoints = setpoints[:start_index + 1]
+        new_origins = origins[:start_index + 1]
+        if new_times[-1] != start:
+            new_times.append(start)
+            new_setpoints.append(setpoints[start_index])
+            new_origins.append(origins[start_index])
+        setpoint = function(new_setpoints[-1])
+        if setpoint != new_setpoints[-1]:
+            new_setpoints[-1] = setpoint
+            new_origins[-1] = origin
+        for index in range(start_index + 1, end_index):
+            setpoint = function(setpoints[index])
+            new_times.append(times[index])
+            new_setpoints.append(setpoint)
+            new_origins.append(origin if setpoint != setpoints[index] else origins[index])
+        if end is not None and (end_index == len(times) or times[end_index] != end):
+            new_times.append(end)
+            new_setpoints.append(setpoints[end_index - 1])
+            new_origins.append(origins[end_index - 1])
+        new_times.extend(times[end_index:])
+        new_setpoints.extend(setpoints[end_index:])
+        new_origins.extend(origins[end_index:])
+        return new_times, new_setpoints, new_origins
+
+    @staticmethod
+    def _merge(timeline: tuple, duration: int) -> tuple:
+        """Remove zero length segments and repeated setpoints"""
+        times, setpoints, origins = timeline
+        merged = ([], [], [])
+        for time, setpoint, origin in zip(times, setpoints, origins):
+            if time >= duration:
+                break
+            if merged[0] and merged[0][-1] == time:
+                merged[1][-1], merged[2][-1] = setpoint, origin
+            elif merged[0] and merged[1][-1] == setpoint and merged[2][-1] == origin:
+                continue
+            else:
+                merged[0].append(time)
+                merged[1].append(setpoint)
+                merged[2].append(origin)
+        return merged
+
+    def _simulate_room(self, room: _WiserSimulationRoom, scenario: WiserSimulationScenario, duration: int,
+                       away_periods: list, eco: bool, comfort: bool) -> tuple:
+        mode, manual_temp = scenario._modes.get(room.id, (room.mode, None))
+        if mode == "Off":
+            return [0], [TEMP_OFF], [WiserSimulationOriginEnum.off]
+        if mode == "Manual":
+            timeline = ([0], [manual_temp or room.manual_target_temperature], [WiserSimulationOriginEnum.manual])
+            schedule_times = []
+        else:
+            times, setpoints = self._base_timeline(room, duration)
+            schedule_times = times
+            timeline = (times, setpoints, [WiserSimulationOriginEnum.schedule] * len(times))
+            if comfort or eco:
+                timeline = self._apply_leads(
+                    *timeline,
+                    self.comfort_lead_minutes if comfort else 0,
+                    self.eco_lead_minutes if eco else 0
+                )
+
+        for start, end, origin, value, current_temperature in sorted(
+            scenario._room_events.get(room.id, []), key=lambda event: event[0]
+        ):
+            if end is None:
+                # Override lasts until next scheduled change
+                index = bisect_right(schedule_times, start)
+                end = schedule_times[index] if index < len(schedule_times) else None
+            if origin == WiserSimulationOriginEnum.boost:
+                timeline = self._overlay(
+                    timeline, start, end,
+                    lambda setpoint: min(
+                        TEMP_MAXIMUM,
+                        (current_temperature if current_temperature is not None else max(setpoint, TEMP_MINIMUM)) + value
+                    ),
+                    origin
+                )
+            else:
+                timeline = self._overlay(timeline, start, end, lambda setpoint: value, origin)
+
+        if not room.away_mode_suppressed:
+            away_temp = self.away_mode_target_temperature
+            for start, end in away_periods:
+                timeline = self._overlay(
+                    timeline, start, end,
+                    lambda setpoint: setpoint if setpoint == TEMP_OFF else min(setpoint, away_temp),
+                    WiserSimulationOriginEnum.away
+                )
+        return self._merge(timeline, duration)
+
+    def simulate(self, scenario: WiserSimulationScenario = None, days: int = 7) -> _WiserSimulationResult:
+        """
+        Simulate room setpoints
+        param scenario: changes to apply, current settings only if None
+        param days: number of days to simulate
+        return: _WiserSimulationResult
+        """
+        scenario = scenario or WiserSimulationScenario()
+        duration = days * MINUTES_PER_DAY
+        away_periods = list(scenario._away_periods)
+        if self.away_mode_enabled:
+            away_periods.insert(0, (0, None))
+        eco = self.eco_mode_enabled if scenario.eco_mode_enabled is None else scenario.eco_mode_enabled
+        comfort = self.comfort_mode_enabled if scenario.comfort_mode_enabled is None else scenario.comfort_mode_enabled
+
+        timelines = {
+            room.id: self._simulate_room(room, scenario, duration, away_periods, eco, comfort)
+            for room in self._rooms.values()
+        }
+        return _WiserSimulationResult(self._start, duration, self._rooms, timelines)
+
+
+def compile_schedule(schedule) -> _WiserCompiledSchedule:
+    """
+    Compile a heating schedule for simulation
+    param schedule: _WiserHeatingSchedule or heating schedule data in wiser format
+    return: _WiserCompiledSchedule
+    """
+    if schedule is None:
+        return _WiserCompiledSchedule({})
+    if isinstance(schedule, dict):
+        return _WiserCompiledSchedule(schedule)
+    return _WiserCompiledSchedule(schedule.schedule_data)
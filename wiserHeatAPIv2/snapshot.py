@@ -0,0 +1,146 @@
+"""
+Hub data snapshots
+
+Saves raw hub data to a compact binary file, so a WiserAPI can be built from it
+straight away at startup instead of waiting for the hub.  A file is a fixed
+header of magic bytes, format version, schema version, save time and crc32,
+followed by the zlib compressed, marshalled raw hub data.  Files written with a
+different format or schema version, for another hub or that fail the checksum
+are ignored.
+"""
+import marshal
+import os
+import pathlib
+import struct
+import time
+import zlib
+
+from . import _LOGGER
+from .const import SNAPSHOT_FORMAT_VERSION, SNAPSHOT_SCHEMA_VERSION
+
+SNAPSHOT_MAGIC = b"WSNP"
+SNAPSHOT_SECTIONS = ("Domain", "Network", "Schedule", "OpenTherm")
+
+# Magic, format version, schema version, save timestamp, crc32 of body
+_HEADER = struct.Struct("<4sHHdI")
+# Marshal format version, fixed so files are readable across python versions
+_MARSHAL_VERSION = 4
+
+
+class _WiserSnapshot(object):
+    """Raw hub data loaded from a snapshot file"""
+
+    def __init__(self, host: str, timestamp: float, data: dict):
+        self._host = host
+        self._timestamp = timestamp
+        self._data = data
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def timestamp(self) -> float:
+        """Get unix timestamp of when the snapshot was saved"""
+        return self._timestamp
+
+    @property
+    def age(self) -> float:
+        """Get seconds since the snapshot was saved"""
+        return time.time() - self._timestamp
+
+    @property
+    def data(self) -> dict:
+        """Get raw hub data in the same form as WiserAPI.raw_hub_data"""
+        return self._data
+
+
+def save_snapshot(snapshot_file: str, host: str, data: dict, timestamp: float = None) -> None:
+    """
+    Save raw hub data to a snapshot file.  The file is replaced atomically
+    param snapshot_file: path of file
+    param host: hub host the data was read from
+    param data: raw hub data as returned by WiserAPI.raw_hub_data
+    param timestamp: unix timestamp of data, defaults to now
+    """
+    body = zlib.compress(
+        marshal.dumps({"host": host, "data": {section: data.get(section, {}) for section in SNAPSHOT_SECTIONS}}, _MARSHAL_VERSION)
+    )
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        SNAPSHOT_SCHEMA_VERSION,
+        time.time() if timestamp is None else timestamp,
+        zlib.crc32(body),
+    )
+    path = pathlib.Path(snapshot_file)
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temp_path, path)
+
+
+class _WiserSnapshotIgnored(Exception):
+    """Reason a snapshot file cannot be used"""
+
+
+def _read_header(content: bytes) -> tuple:
+    """
+    Check the snapshot header
+    return: tuple of save timestamp and crc32 of body
+    """
+    if len(content) < _HEADER.size:
+        raise _WiserSnapshotIgnored("file is truncated")
+    magic, format_version, schema_version, timestamp, checksum = _HEADER.unpack_from(content)
+    if magic != SNAPSHOT_MAGIC:
+        raise _WiserSnapshotIgnored("not a snapshot file")
+    if format_version != SNAPSHOT_FORMAT_VERSION or schema_version != SNAPSHOT_SCHEMA_VERSION:
+        raise _WiserSnapshotIgnored(
+            f"format {format_version} schema {schema_version} is not "
+            f"format {SNAPSHOT_FORMAT_VERSION} schema {SNAPSHOT_SCHEMA_VERSION}"
+        )
+    return timestamp, checksum
+
+
+def _read_body(body: memoryview, checksum: int) -> dict:
+    """
+    Check and decode the snapshot body
+    return: dict of host and data
+    """
+    if zlib.crc32(body) != checksum:
+        raise _WiserSnapshotIgnored("checksum does not match")
+    try:
+        snapshot = marshal.loads(zlib.decompress(body))
+    except (ValueError, EOFError, TypeError, zlib.error) as ex:
+        raise _WiserSnapshotIgnored(str(ex))
+
+    data = snapshot.get("data") if isinstance(snapshot, dict) else None
+    if not isinstance(data, dict) or any(not isinstance(data.get(section), dict) for section in SNAPSHOT_SECTIONS):
+        raise _WiserSnapshotIgnored("data does not match schema")
+    return snapshot
+
+
+def load_snapshot(snapshot_file: str, host: str = None) -> _WiserSnapshot:
+    """
+    Load raw hub data from a snapshot file
+    param snapshot_file: path of file
+    param host: hub host the data must be for, or None to accept any
+    return: snapshot, or None if the file is missing, unreadable or incompatible
+    """
+    try:
+        with open(snapshot_file, "rb") as file:
+            content = file.read()
+    except OSError as ex:
+        _LOGGER.debug(f"No hub data snapshot loaded from {snapshot_file}: {ex}")
+        return None
+
+    try:
+        timestamp, checksum = _read_header(content)
+        snapshot = _read_body(memoryview(content)[_HEADER.size:], checksum)
+        if host is not None and snapshot.get("host") != host:
+            raise _WiserSnapshotIgnored(f"saved from hub {snapshot.get('host')}")
+    except _WiserSnapshotIgnored as ex:
+        _LOGGER.warning(f"Ignoring hub data snapshot {snapshot_file}: {ex}")
+        return None
+    return _WiserSnapshot(snapshot.get("host"), timestamp, snapshot["data"])
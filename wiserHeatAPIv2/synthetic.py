@@ -0,0 +1,453 @@
+"""
+Synthetic installations
+
+Generates hub data for an installation of any number of rooms and devices of
+each product type, for testing and benchmarking at sizes beyond any real house.
+The domain, schedule, network and opentherm data is internally consistent:
+device ids and zigbee node ids are unique, rooms list the devices in them,
+every room, hot water, smart plug, light and shutter has its own schedule and
+battery powered devices route through the controller or a mains powered device.
+
+Values that vary between rooms and devices, such as temperatures and signal
+strengths, come from a seeded random generator so the same arguments always
+give the same data.
+"""
+import json
+import pathlib
+import random
+
+from .const import (
+    SYNTHETIC_PRODUCT_TYPES,
+    SYNTHETIC_ROUTER_CHILDREN,
+    SYNTHETIC_ROUTER_TYPES,
+    SYNTHETIC_UFH_RELAYS,
+    WEEKDAYS,
+    WEEKENDS,
+    WISERHUBDOMAIN,
+    WISERHUBNETWORK,
+    WISERHUBOPENTHERM,
+    WISERHUBSCHEDULES,
+)
+
+# Section: file name of a recording, as read by WiserReplay
+SYNTHETIC_FILES = {
+    "Domain": "domain.json",
+    "Network": "network.json",
+    "Schedule": "schedule.json",
+    "OpenTherm": "opentherm.json",
+}
+SYNTHETIC_ENDPOINTS = {
+    "Domain": WISERHUBDOMAIN,
+    "Network": WISERHUBNETWORK,
+    "Schedule": WISERHUBSCHEDULES,
+    "OpenTherm": WISERHUBOPENTHERM,
+}
+
+# Product type: (domain collection, model identifier)
+_PRODUCTS = {
+    "iTRV": ("SmartValve", "iTRV"),
+    "RoomStat": ("RoomStat", "Thermostat"),
+    "SmartPlug": ("SmartPlug", "WSP"),
+    "HeatingActuator": ("HeatingActuator", "FLS"),
+    "UnderFloorHeating": ("UnderFloorHeating", "UFH"),
+    "Shutter": ("Shutter", "Shutter"),
+    "OnOffLight": ("Light", "OnOffLight"),
+    "DimmableLight": ("Light", "DimmableLight"),
+}
+_SIGNAL_STRENGTHS = [(200, "VeryGood"), (150, "Good"), (100, "Medium"), (0, "Poor")]
+
+
+class WiserSyntheticInstallation(object):
+    """Generated hub data for an installation of a given size"""
+
+    def __init__(self, rooms: int = 10, devices=1, seed: int = 0):
+        """
+        param rooms: number of rooms
+        param devices: number of devices of each product type, or dict of product type: number
+        param seed: seed for generated values
+        """
+        if rooms < 0:
+            raise ValueError("Number of rooms cannot be negative")
+        if isinstance(devices, dict):
+            unknown = set(devices) - set(SYNTHETIC_PRODUCT_TYPES)
+            if unknown:
+                raise ValueError(f"Unknown product types {sorted(unknown)}")
+            self._device_counts = {product_type: devices.get(product_type, 0) for product_type in SYNTHETIC_PRODUCT_TYPES}
+        else:
+            self._device_counts = {product_type: devices for product_type in SYNTHETIC_PRODUCT_TYPES}
+        self._rooms = rooms
+        self._random = random.Random(seed)
+        self._data = self._generate()
+
+    @property
+    def rooms(self) -> int:
+        return self._rooms
+
+    @property
+    def device_counts(self) -> dict:
+        """Get number of devices of each product type"""
+        return dict(self._device_counts)
+
+    @property
+    def data(self) -> dict:
+        """Get hub data as a dict of Domain, Network, Schedule and OpenTherm sections, as raw_hub_data"""
+        return self._data
+
+    @property
+    def recording(self) -> dict:
+        """Get hub data as a dict of endpoint: response bytes, for WiserReplay"""
+        return {endpoint: json.dumps(self._data[section]).encode() for section, endpoint in SYNTHETIC_ENDPOINTS.items()}
+
+    def save(self, path: str) -> None:
+        """
+        Save as a recording directory, for WiserAPI.from_files and WiserMockHub.from_path
+        param path: directory to save to
+        """
+        path = pathlib.Path(path).expanduser()
+        path.mkdir(parents=True, exist_ok=True)
+        for section, file_name in SYNTHETIC_FILES.items():
+            (path / file_name).write_text(json.dumps(self._data[section], indent=2))
+
+    def _generate(self) -> dict:
+        self._schedules = {"Heating": [], "OnOff": [], "Level": []}
+        self._next_schedule_id = 1
+        domain = {
+            "System": self._system(),
+            "Cloud": {
+                "WiserApiHost": "api-nl.wiserair.com",
+                "BootStrapApiHost": "bootstrap.gl.struxurewarecloud.com",
+                "DetailedPublishing": False,
+                "EnableDiagnosticTelemetry": False,
+            },
+            "DeviceCapabilityMatrix": {
+                "ITRV": self._device_counts["iTRV"] > 0,
+                "Roomstat": self._device_counts["RoomStat"] > 0,
+                "SmartPlug": self._device_counts["SmartPlug"] > 0,
+                "HACT": self._device_counts["HeatingActuator"] > 0,
+                "UFH": self._device_counts["UnderFloorHeating"] > 0,
+                "Light": self._device_counts["OnOffLight"] + self._device_counts["DimmableLight"] > 0,
+                "Shutter": self._device_counts["Shutter"] > 0,
+            },
+            "HeatingChannel": [],
+            "HotWater": [self._hot_water()],
+            "Room": [self._room(room_id) for room_id in range(1, self._rooms + 1)],
+            "Device": [self._controller()],
+            "Moment": [],
+            "UpgradeInfo": [],
+            "Zigbee": {"NetworkChannel": 20, "ZigbeeModuleVersion": "ZIGBEE_01", "ZigbeeEUI": "SYNTHETIC"},
+        }
+        self._add_devices(domain)
+        domain["HeatingChannel"].append(
+            {
+                "id": 1,
+                "Name": "Channel-1",
+                "RoomIds": [room["id"] for room in domain["Room"]],
+                "PercentageDemand": max([room["PercentageDemand"] for room in domain["Room"]], default=0),
+                "DemandOnOffOutput": "On" if any(room["PercentageDemand"] for room in domain["Room"]) else "Off",
+                "HeatingRelayState": "On" if any(room["PercentageDemand"] for room in domain["Room"]) else "Off",
+                "IsSmartValvePreventingDemand": False,
+            }
+        )
+        return {
+            "Domain": domain,
+            "Network": self._network(),
+            "Schedule": self._schedules,
+            "OpenTherm": {"Enabled": False, "operationalData": {}},
+        }
+
+    def _schedule_id(self) -> int:
+        schedule_id = self._next_schedule_id
+        self._next_schedule_id += 1
+        return schedule_id
+
+    def _heating_schedule(self, name: str) -> int:
+        comfort = self._random.choice([190, 200, 210])
+        schedule_id = self._schedule_id()
+        schedule = {"id": schedule_id, "Name": name, "Type": "Heating", "CurrentSetpoint": comfort}
+        schedule.update(
+            {
+                day_name: {"Time": [630, 830, 1700, 2230], "DegreesC": [comfort, 160, comfort, -200]}
+                for day_name in WEEKDAYS + WEEKENDS
+            }
+        )
+        self._schedules["Heating"].append(schedule)
+        return schedule_id
+
+    def _onoff_schedule(self, name: str) -> int:
+        schedule_id = self._schedule_id()
+        schedule = {"id": schedule_id, "Name": name, "Type": "OnOff", "CurrentState": "Off"}
+        schedule.update({day_name: [630, -830, 1700, -2230] for day_name in WEEKDAYS + WEEKENDS})
+        self._schedules["OnOff"].append(schedule)
+        return schedule_id
+
+    def _level_schedule(self, name: str, level_type: str) -> int:
+        schedule_id = self._schedule_id()
+        schedule = {"id": schedule_id, "Name": name, "Type": level_type, "CurrentLevel": 0}
+        schedule.update({day_name: {"Time": [700, 2200], "Level": [100, 0]} for day_name in WEEKDAYS + WEEKENDS})
+        self._schedules["Level"].append(schedule)
+        return schedule_id
+
+    def _system(self) -> dict:
+        return {
+            "ActiveSystemVersion": "2.26.16-6340f5b",
+            "AutomaticDaylightSaving": True,
+            "AwayModeAffectsHotWater": True,
+            "AwayModeSetPointLimit": 105,
+            "BrandName": "WiserHeat",
+            "CloudConnectionStatus": "Connected",
+            "ComfortModeEnabled": False,
+            "DegradedModeSetpointThreshold": 180,
+            "EcoModeEnabled": False,
+            "FotaEnabled": True,
+            "GeoPosition": {"Latitude": 51.5074, "Longitude": -0.1278},
+            "HardwareGeneration": 2,
+            "HeatingButtonOverrideState": "Off",
+            "HotWaterButtonOverrideState": "Off",
+            "OpenThermConnectionStatus": "Disconnected",
+            "PairingStatus": "Paired",
+            "SunriseTimes": [800] * 14,
+            "SunsetTimes": [1600] * 14,
+            "SystemMode": "Normal",
+            "TimeZoneOffset": 0,
+            "UnixTime": 1704096000,
+            "UserOverridesActive": False,
+            "ValveProtectionEnabled": False,
+        }
+
+    def _network(self) -> dict:
+        return {
+            "Station": {
+                "Enabled": True,
+                "SSID": "SYNTHETIC",
+                "Channel": 6,
+                "SecurityMode": "WPA2-PSK",
+                "MacAddress": "00:00:00:00:00:00",
+                "RSSI": {"Current": -55, "Min": -70, "Max": -40},
+                "NetworkInterface": {"HostName": "WiserHeatSYNTHETIC", "DhcpMode": "Client", "IPv4HostAddress": "0.0.0.0"},
+                "DhcpStatus": {"IPv4Address": "0.0.0.0"},
+                "DetectedAccessPoints": [],
+            }
+        }
+
+    def _hot_water(self) -> dict:
+        return {
+            "id": 2,
+            "OverrideType": "None",
+            "ScheduleId": self._onoff_schedule("HotWater"),
+            "Mode": "Auto",
+            "WaterHeatingState": "Off",
+            "HotWaterRelayState": "Off",
+            "HotWaterDescription": "FromSchedule",
+        }
+
+    def _room(self, room_id: int) -> dict:
+        name = f"Room {room_id}"
+        schedule_id = self._heating_schedule(name)
+        setpoint = self._schedules["Heating"][-1]["CurrentSetpoint"]
+        temperature = self._random.randint(150, 220)
+        demand = min(100, max(0, (setpoint - temperature) * 5))
+        return {
+            "id": room_id,
+            "Name": name,
+            "ScheduleId": schedule_id,
+            "HeatingRate": 1200,
+            "Mode": "Auto",
+            "WindowDetectionActive": False,
+            "ControlSource": "FromSchedule",
+            "ScheduledSetPoint": setpoint,
+            "CurrentSetPoint": setpoint,
+            "CalculatedTemperature": temperature,
+            "PercentageDemand": demand,
+            "ControlOutputState": "On" if demand else "Off",
+            "SetpointOrigin": "FromSchedule",
+            "DisplayedSetPoint": setpoint,
+            "ComfortModeScore": 0,
+            "DemandType": "Modulating",
+            "HeatingType": "HydronicRadiator",
+            "ControlDirection": "Heat",
+            "WindowState": "Closed",
+            "AwayModeSuppressed": False,
+        }
+
+    def _controller(self) -> dict:
+        return {
+            "id": 0,
+            "NodeId": 0,
+            "ProductType": "Controller",
+            "ProductIdentifier": "Controller",
+            "ActiveFirmwareVersion": "2.26.16",
+            "ModelIdentifier": "WT724R1S0902",
+            "DeviceLockEnabled": False,
+            "DisplayedSignalStrength": "Good",
+            "ReceptionOfController": {"Rssi": -60, "Lqi": 180},
+        }
+
+    def _add_devices(self, domain: dict) -> None:
+        """Add devices of each type, routers first so battery devices can route through them"""
+        rooms = domain["Room"]
+        routers = [0]
+        device_id = 0
+        type_ids = {}
+        product_types = SYNTHETIC_ROUTER_TYPES + [
+            product_type for product_type in SYNTHETIC_PRODUCT_TYPES if product_type not in SYNTHETIC_ROUTER_TYPES
+        ]
+        for product_type in product_types:
+            collection, model = _PRODUCTS[product_type]
+            for index in range(self._device_counts[product_type]):
+                device_id += 1
+                node_id = 0x1000 + device_id
+                if product_type in SYNTHETIC_ROUTER_TYPES:
+                    # Routers form a tree under the controller
+                    parent_node_id = routers[(len(routers) - 1) // SYNTHETIC_ROUTER_CHILDREN]
+                    routers.append(node_id)
+                else:
+                    parent_node_id = routers[index % len(routers)]
+                room = rooms[index % len(rooms)] if rooms else None
+                domain["Device"].append(self._device(device_id, node_id, parent_node_id, product_type, model))
+                type_ids[collection] = type_ids.get(collection, 0) + 1
+                domain.setdefault(collection, []).append(
+                    self._device_type_data(product_type, device_id, type_ids[collection], room)
+                )
+                self._link_room(product_type, device_id, room)
+
+    def _device(self, device_id: int, node_id: int, parent_node_id: int, product_type: str, model: str) -> dict:
+        lqi = self._random.randint(60, 255)
+        device = {
+            "id": device_id,
+            "NodeId": node_id,
+            "ProductType": product_type,
+            "ProductIdentifier": product_type,
+            "ActiveFirmwareVersion": "02000002",
+            "ModelIdentifier": model,
+            "SerialNumber": f"D0003CFFFE{device_id:06X}",
+            "ProductModel": model,
+            "DeviceLockEnabled": False,
+            "DisplayedSignalStrength": next(text for minimum, text in _SIGNAL_STRENGTHS if lqi >= minimum),
+            "ReceptionOfController": {"Rssi": -40 - (255 - lqi) // 4, "Lqi": lqi},
+            "ReceptionOfDevice": {"Rssi": -40 - (255 - lqi) // 4, "Lqi": lqi},
+            "ParentNodeId": parent_node_id,
+        }
+        if product_type in ["iTRV", "RoomStat"]:
+            device["BatteryVoltage"] = self._random.randint(24, 31)
+            device["BatteryLevel"] = "Normal" if device["BatteryVoltage"] >= 26 else "OneThird"
+        return device
+
+    def _device_type_data(self, product_type: str, device_id: int, type_id: int, room: dict) -> dict:
+        room_id = room["id"] if room else 0
+        temperature = room["CalculatedTemperature"] if room else 180
+        setpoint = room["CurrentSetPoint"] if room else 200
+        if product_type == "iTRV":
+            return {
+                "id": device_id,
+                "SetPoint": setpoint,
+                "MeasuredTemperature": temperature + self._random.randint(-5, 5),
+                "PercentageDemand": room["PercentageDemand"] if room else 0,
+                "WindowState": "Closed",
+                "MountingOrientation": "Vertical",
+            }
+        if product_type == "RoomStat":
+            return {
+                "id": device_id,
+                "SetPoint": setpoint,
+                "MeasuredTemperature": temperature,
+                "MeasuredHumidity": self._random.randint(35, 65),
+            }
+        if product_type == "SmartPlug":
+            name = f"Plug {type_id}"
+            return {
+                "id": device_id,
+                "ScheduleId": self._onoff_schedule(name),
+                "ManualState": "Off",
+                "Mode": "Auto",
+                "AwayAction": "Off",
+                "OutputState": "Off",
+                "ControlSource": "FromSchedule",
+                "ScheduledState": "Off",
+                "Name": name,
+                "InstantaneousDemand": 0,
+                "CurrentSummationDelivered": self._random.randint(0, 500000),
+            }
+        if product_type == "HeatingActuator":
+            return {
+                "id": device_id,
+                "OccupiedHeatingSetPoint": setpoint,
+                "MeasuredTemperature": temperature,
+                "OutputType": "Electric",
+                "InstantaneousDemand": 0,
+                "CurrentSummationDelivered": self._random.randint(0, 500000),
+            }
+        if product_type == "UnderFloorHeating":
+            return {
+                "id": device_id,
+                "Name": f"UFH {type_id}",
+                "MeasuredTemperature": temperature,
+                "DewDetected": False,
+                "InterlockActive": False,
+                "IsFullStrip": True,
+                "MaxHeatFloorTemperature": 270,
+                "MinHeatFloorTemperature": 50,
+                "OutputType": "HydronicUnderfloor",
+                "Relays": [
+                    {"id": relay_id, "DemandPercentage": 0, "Polarity": False}
+                    for relay_id in range(1, SYNTHETIC_UFH_RELAYS + 1)
+                ],
+            }
+        if product_type == "Shutter":
+            name = f"Shutter {type_id}"
+            return {
+                "id": type_id,
+                "DeviceId": device_id,
+                "Name": name,
+                "RoomId": room_id,
+                "ScheduleId": self._level_schedule(name, "Shutters"),
+                "Mode": "Auto",
+                "AwayAction": "NoChange",
+                "ControlSource": "FromSchedule",
+                "CurrentLift": 100,
+                "ManualLift": 100,
+                "TargetLift": 100,
+                "ScheduledLift": 100,
+                "LiftMovement": "Stopped",
+                "DriveConfig": {"LiftOpenTime": 30, "LiftCloseTime": 30},
+            }
+        name = f"Light {type_id}"
+        light = {
+            "id": type_id,
+            "DeviceId": device_id,
+            "Name": name,
+            "RoomId": room_id,
+            "ScheduleId": self._level_schedule(name, "Lighting"),
+            "Mode": "Auto",
+            "AwayAction": "NoChange",
+            "ControlSource": "FromSchedule",
+            "CurrentState": "Off",
+            "TargetState": "Off",
+            "IsDimmable": product_type == "DimmableLight",
+        }
+        if product_type == "DimmableLight":
+            light.update(
+                {
+                    "CurrentLevel": 0,
+                    "CurrentPercentage": 0,
+                    "TargetPercentage": 0,
+                    "ManualLevel": 100,
+                    "OverrideLevel": 0,
+                    "ScheduledPercentage": 0,
+                    "OutputRange": {"Minimum": 0, "Maximum": 100},
+                }
+            )
+        return light
+
+    def _link_room(self, product_type: str, device_id: int, room: dict) -> None:
+        """Add device to the ids listed by its room, rooms have at most one roomstat and ufh controller"""
+        if room is None:
+            return
+        if product_type == "iTRV":
+            room.setdefault("SmartValveIds", []).append(device_id)
+        elif product_type == "HeatingActuator":
+            room.setdefault("HeatingActuatorIds", []).append(device_id)
+        elif product_type == "RoomStat" and "RoomStatId" not in room:
+            room["RoomStatId"] = device_id
+        elif product_type == "UnderFloorHeating" and "UnderFloorHeatingId" not in room:
+            room["UnderFloorHeatingId"] = device_id
+            room["UfhRelayIds"] = list(range(1, SYNTHETIC_UFH_RELAYS + 1))
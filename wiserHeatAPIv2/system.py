@@ -9,7 +9,7 @@ from .helpers.capabilities import _WiserHubCapabilitiesInfo
 from .helpers.network import _WiserNetwork
 from .helpers.opentherm import _WiserOpentherm
 from .helpers.signal import _WiserSignalStrength
-from .helpers.special_times import sunrise_times, sunset_times
+from .helpers.special_times import _WiserSunTimes, sunrise_times, sunset_times
 from .helpers.zigbee import _WiserZigbee
 from .rest_controller import _WiserRestController
 
@@ -64,6 +64,11 @@ class _WiserSystem(object):
         self._timezone_offset = self._system_data.get("TimeZoneOffset")
         self._valve_protection_enabled = self._system_data.get("ValveProtectionEnabled")
 
+        # Sun times are only calculated on first use
+        self._sunrise_times = None
+        self._sunset_times = None
+        self._sun_times = None
+
     def _get_system_device(self, device_data: dict):
         for device in device_data:
                 # Add controller to sytem class
@@ -101,6 +106,7 @@ class _WiserSystem(object):
     def automatic_daylight_saving_enabled(self, enabled: bool):
         if self._send_command({"AutomaticDaylightSaving": str(enabled).lower()}):
             self._automatic_daylight_saving = enabled
+            self._sun_times = None
 
     @property
     def away_mode_enabled(self) -> bool:
@@ -281,15 +287,33 @@ class _WiserSystem(object):
         """Get zwave network information"""
         return self._signal
 
+    @property
+    def sun_times(self) -> _WiserSunTimes:
+        """Get sunrise/sunset calculator for the hub location for any date.  None if hub has no location"""
+        if self._sun_times is None:
+            if self.geo_position.latitude is None or self.geo_position.longitude is None:
+                return None
+            self._sun_times = _WiserSunTimes(
+                self.geo_position.latitude,
+                self.geo_position.longitude,
+                self._timezone_offset,
+                self._automatic_daylight_saving is not False
+            )
+        return self._sun_times
+
     @property
     def sunrise_times(self) -> list:
         """Get sunrise times"""
-        return sunrise_times(self._system_data.get("SunriseTimes",[]))
+        if self._sunrise_times is None:
+            self._sunrise_times = sunrise_times(self._system_data.get("SunriseTimes",[]))
+        return self._sunrise_times
 
     @property
     def sunset_times(self) -> list:
         """Get sunset times"""
-        return sunset_times(self._system_data.get("SunsetTimes",[]))
+        if self._sunset_times is None:
+            self._sunset_times = sunset_times(self._system_data.get("SunsetTimes",[]))
+        return self._sunset_times
 
     @property
     def system_mode(self) -> str:
@@ -305,6 +329,7 @@ class _WiserSystem(object):
     def timezone_offset(self, offset: int):
         if self._send_command({"TimeZoneOffset": offset}):
             self._timezone_offset = offset
+            self._sun_times = None
 
     @property
     def user_overrides_active(self) -> bool:
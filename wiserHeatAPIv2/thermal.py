@@ -0,0 +1,195 @@
+"""
+Room thermal response estimator
+
+Estimates how quickly each room heats up and cools down from recorded
+temperature and heating state.  Each room keeps running least-squares sums
+that are updated as samples arrive, so estimates are always current without
+re-reading history and the cost per sample is constant.
+
+Rates are in degrees per hour and the cooling time constant is in hours.
+"""
+import math
+import time
+
+from .const import THERMAL_MAX_SAMPLE_GAP, THERMAL_MIN_SAMPLES
+from .helpers.statistics import _WiserLeastSquares
+
+
+class _WiserThermalEstimate(object):
+    """Thermal response estimate for a room"""
+
+    def __init__(self, room_id: int, heating: _WiserLeastSquares, cooling: _WiserLeastSquares):
+        self._room_id = room_id
+        self._heating = heating
+        self._cooling = cooling
+
+    @property
+    def room_id(self) -> int:
+        return self._room_id
+
+    @property
+    def heating_samples(self) -> int:
+        """Get number of intervals used for heating rate"""
+        return self._heating.n
+
+    @property
+    def cooling_samples(self) -> int:
+        """Get number of intervals used for cooling rate and time constant"""
+        return self._cooling.n
+
+    @property
+    def heating_rate(self) -> float:
+        """Get average temperature rise while heating in degrees per hour"""
+        if self._heating.n < THERMAL_MIN_SAMPLES:
+            return None
+        return round(self._heating.mean_y, 2)
+
+    @property
+    def cooling_rate(self) -> float:
+        """Get average temperature fall while not heating in degrees per hour"""
+        if self._cooling.n < THERMAL_MIN_SAMPLES:
+            return None
+        return round(-self._cooling.mean_y, 2)
+
+    @property
+    def time_constant(self) -> float:
+        """
+        Get cooling time constant in hours, from a fit of cooling rate against room temperature.
+        None if there is not enough data or the room is not cooling towards a lower temperature
+        """
+        if self._cooling.n < THERMAL_MIN_SAMPLES:
+            return None
+        slope = self._cooling.slope
+        if slope is None or slope >= 0:
+            return None
+        return round(-1 / slope, 2)
+
+
+class _WiserThermalRoom(object):
+    """Running fit state for a room"""
+
+    __slots__ = ("last_timestamp", "last_temperature", "last_heating", "heating", "cooling")
+
+    def __init__(self):
+        self.last_timestamp = None
+        self.last_temperature = None
+        self.last_heating = None
+        self.heating = _WiserLeastSquares()
+        self.cooling = _WiserLeastSquares()
+
+
+class WiserThermalEstimator(object):
+    """
+    Estimates heating rate, cooling rate and cooling time constant for each room.
+    Each interval between samples is classed as heating or cooling by the heating
+    state at its start.  Intervals longer than max_gap seconds are ignored.
+    """
+
+    def __init__(self, max_gap: float = THERMAL_MAX_SAMPLE_GAP):
+        self._max_gap = max_gap
+        self._rooms = {}
+        self._recorder_positions = {}
+        self._api = None
+
+    @property
+    def room_ids(self) -> list:
+        """Get ids of rooms with samples"""
+        return list(self._rooms)
+
+    def add_sample(self, room_id: int, timestamp: float, temperature: float, is_heating: bool) -> None:
+        """
+        Add a room sample.  Samples for a room must be added in time order
+        param room_id: room id
+        param timestamp: unix timestamp
+        param temperature: room temperature
+        param is_heating: if the room is calling for heat
+        """
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = self._rooms[room_id] = _WiserThermalRoom()
+
+        if temperature is None or math.isnan(temperature):
+            room.last_timestamp = None
+            return
+
+        if room.last_timestamp is not None:
+            elapsed = timestamp - room.last_timestamp
+            if 0 < elapsed <= self._max_gap:
+                rate = (temperature - room.last_temperature) * 3600 / elapsed
+                if room.last_heating:
+                    room.heating.add(room.last_temperature, rate)
+                else:
+                    room.cooling.add((room.last_temperature + temperature) / 2, rate)
+
+        room.last_timestamp = timestamp
+        room.last_temperature = temperature
+        room.last_heating = bool(is_heating)
+
+    def record(self, api, timestamp: float = None) -> None:
+        """
+        Add a sample for each room of api
+        param api: WiserAPI instance
+        param timestamp: unix timestamp of sample, defaults to now
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        for room in api.rooms.all if api.rooms else []:
+            self.add_sample(room.id, timestamp, room.current_temperature, room.is_heating)
+
+    def attach(self, api) -> None:
+        """
+        Update estimates after every successful refresh of api
+        param api: WiserAPI instance
+        """
+        self.detach()
+        self._api = api
+        api.add_refresh_listener(self.record)
+
+    def detach(self) -> None:
+        """Stop updating from attached api"""
+        if self._api is not None:
+            self._api.remove_refresh_listener(self.record)
+            self._api = None
+
+    def update_from_recorder(self, recorder) -> None:
+        """
+        Add samples recorded since the last update
+        param recorder: WiserRecorder
+        """
+        for room_id in recorder.room_ids:
+            series = recorder.room(room_id)
+            start = self._recorder_positions.get(room_id)
+            timestamps = series.timestamps(start)
+            temperatures = series.window("current_temperature", start)
+            heating = series.window("is_heating", start)
+            for segment in range(2):
+                for timestamp, temperature, is_heating in zip(
+                    timestamps[segment], temperatures[segment], heating[segment]
+                ):
+                    if start is None or timestamp > start:
+                        self.add_sample(room_id, timestamp, temperature, is_heating)
+            if len(series):
+                self._recorder_positions[room_id] = series.latest_timestamp
+
+    def estimate(self, room_id: int) -> _WiserThermalEstimate:
+        """
+        Get thermal estimate for room
+        param room_id: room id
+        return: estimate or None if the room has no samples
+        """
+        room = self._rooms.get(room_id)
+        return _WiserThermalEstimate(room_id, room.heating, room.cooling) if room else None
+
+    @property
+    def estimates(self) -> dict:
+        """Get thermal estimates for all rooms keyed by room id"""
+        return {room_id: self.estimate(room_id) for room_id in self._rooms}
+
+    def reset(self, room_id: int = None) -> None:
+        """
+        Clear samples, for example after radiators or insulation are changed
+        param room_id: room to reset, or None for all rooms
+        """
+        if room_id is None:
+            self._rooms = {}
+        else:
+            self._rooms.pop(room_id, None)
@@ -15,12 +15,15 @@ This API allows you to get information from and control your wiserhub.
 # TODO: Keep objects and update instead of recreating on hub update
 # TODO: Update entity values after commend issued to get current values
 import pathlib
+import threading
+import time
 from . import _LOGGER, __VERSION__
 
 from .const import (
     DEFAULT_AWAY_MODE_TEMP,
     DEFAULT_DEGRADED_TEMP,
     MAX_BOOST_INCREASE,
+    SNAPSHOT_SAVE_INTERVAL,
     TEMP_ERROR,
     TEMP_HW_ON,
     TEMP_HW_OFF,
@@ -40,7 +43,6 @@ from .exceptions import (
     WiserHubRESTError,
 )
 
-from .cli import log_response_to_file
 from .devices import _WiserDeviceCollection
 from .heating import _WiserHeatingChannelCollection
 from .hot_water import _WiserHotwater
@@ -49,14 +51,53 @@ from .rest_controller import _WiserRestController, _WiserConnection
 from .room import _WiserRoomCollection
 from .schedule import _WiserScheduleCollection, WiserScheduleTypeEnum
 from .system import _WiserSystem
+from .helpers.zigbee import _WiserZigbeeTopology
 
 
 class WiserAPI(object):
     """
     Main api class to access all entities and attributes of wiser system
     """
-    def __init__(self, host: str, secret: str, units: WiserUnitsEnum = WiserUnitsEnum.metric):
-        
+    # Attributes holding hub data and the model built from it
+    _MODEL_ATTRIBUTES = (
+        "_domain_data",
+        "_network_data",
+        "_schedule_data",
+        "_opentherm_data",
+        "_devices",
+        "_hotwater",
+        "_heating_channels",
+        "_moments",
+        "_rooms",
+        "_schedules",
+        "_system",
+        "_zigbee_topology",
+    )
+
+    def __init__(self, host: str, secret: str, units: WiserUnitsEnum = WiserUnitsEnum.metric, snapshot_file: str = None):
+        """
+        param snapshot_file: file to save hub data to after each read.  If it holds data
+        for this hub when created, the api is built from it and the hub is read in the background
+        """
+        self._init_state(host, secret, units)
+        self._snapshot_file = snapshot_file
+
+        # Log initialisation info
+        _LOGGER.info(f"WiserHub API v{__VERSION__} Initialised - Host: {host}, Units: {self._wiser_api_connection.units.name.title()}")
+
+        # Read hub data if hub IP and secret exist
+        if (
+            self._wiser_api_connection.host is not None
+            and self._wiser_api_connection.secret is not None
+        ):
+            # Create an instance of the rest controller
+            self._wiser_rest_controller = _WiserRestController(self._wiser_api_connection)
+            if not (snapshot_file and self._warm_start()):
+                self.read_hub_data()
+        else:
+            raise WiserHubConnectionError("Missing or incomplete connection information")
+
+    def _init_state(self, host: str, secret: str, units: WiserUnitsEnum):
         # Connection variables
         self._wiser_api_connection = _WiserConnection()
         self._wiser_rest_controller = None
@@ -80,76 +121,288 @@ class WiserAPI(object):
         self._rooms = None
         self._schedules = None
         self._system = None
-
-        # Log initialisation info
-        _LOGGER.info(f"WiserHub API v{__VERSION__} Initialised - Host: {host}, Units: {self._wiser_api_connection.units.name.title()}")
-
-        # Read hub data if hub IP and secret exist
-        if (
-            self._wiser_api_connection.host is not None
-            and self._wiser_api_connection.secret is not None
-        ):
-            # Create an instance of the rest controller
-            self._wiser_rest_controller = _WiserRestController(self._wiser_api_connection)
-            self.read_hub_data()
-        else:
-            raise WiserHubConnectionError("Missing or incomplete connection information")
-
+        self._zigbee_topology = None
+
+        # Callbacks called after each successful hub data read
+        self._refresh_listeners = []
+
+        # Warm start state
+        self._snapshot_file = None
+        self._snapshot_saved = None
+        self._stale = False
+        self._warm_start_thread = None
+
+    @classmethod
+    def _without_data(cls, host: str, secret: str, units: WiserUnitsEnum = WiserUnitsEnum.metric, rest_controller=None):
+        """
+        Create an api instance without reading the hub
+        param rest_controller: controller to use, or None to create one for host and secret
+        return: WiserAPI with no hub data
+        """
+        api = cls.__new__(cls)
+        api._init_state(host, secret, units)
+        api._wiser_rest_controller = rest_controller or _WiserRestController(api._wiser_api_connection)
+        return api
+
+    @classmethod
+    def from_files(cls, source, units: WiserUnitsEnum = WiserUnitsEnum.metric):
+        """
+        Create an api from recorded hub data with no hub connection.  See replay.py
+        param source: directory of recorded json files, directory of recordings or snapshot files, or a WiserReplay
+        param units: units for temperatures
+        return: WiserAPI with data from the first recording
+        """
+        from .replay import WiserReplay, _WiserReplayController
+
+        replay = source if isinstance(source, WiserReplay) else WiserReplay.from_path(source)
+        api = cls.__new__(cls)
+        api._init_state("replay", None, units)
+        api._wiser_rest_controller = _WiserReplayController(api._wiser_api_connection, replay)
+        if not api.read_hub_data():
+            raise WiserHubRESTError(f"Recording {replay.name} does not contain domain, network and schedule data")
+        return api
+
+    def _fetch_hub_payloads(self) -> tuple:
+        """
+        Read the undecoded domain, network, schedule and opentherm responses from the hub
+        return: tuple of response bytes
+        """
+        return (
+            self._wiser_rest_controller._get_hub_payload(WISERHUBDOMAIN),
+            self._wiser_rest_controller._get_hub_payload(WISERHUBNETWORK),
+            self._wiser_rest_controller._get_hub_payload(WISERHUBSCHEDULES),
+            self._wiser_rest_controller._get_hub_payload(WISERHUBOPENTHERM, False),
+        )
 
     def read_hub_data(self):
         """Read all data from hub and populate objects"""
 
         # Read data from hub
-        self._domain_data = self._wiser_rest_controller._get_hub_data(WISERHUBDOMAIN)
-        self._network_data = self._wiser_rest_controller._get_hub_data(WISERHUBNETWORK)
-        self._schedule_data = self._wiser_rest_controller._get_hub_data(WISERHUBSCHEDULES)
-        self._opentherm_data = self._wiser_rest_controller._get_hub_data(WISERHUBOPENTHERM, False)
+        if self._build(
+            self._wiser_rest_controller._get_hub_data(WISERHUBDOMAIN),
+            self._wiser_rest_controller._get_hub_data(WISERHUBNETWORK),
+            self._wiser_rest_controller._get_hub_data(WISERHUBSCHEDULES),
+            self._wiser_rest_controller._get_hub_data(WISERHUBOPENTHERM, False),
+        ):
+            self._hub_data_read()
 
-        # Set diagnostics property
+            # If gets here with no exceptions then success and return true
+            return True
 
+        return False
 
-        if self._domain_data != {} and self._network_data != {} and self._schedule_data != {}:
+    def _hub_data_read(self):
+        """Update state after objects are built from newly read hub data"""
+        self._stale = False
+        if self._snapshot_file and (
+            self._snapshot_saved is None or time.monotonic() - self._snapshot_saved >= SNAPSHOT_SAVE_INTERVAL
+        ):
+            self.save_snapshot(self._snapshot_file)
+            self._snapshot_saved = time.monotonic()
+        self._notify_refresh_listeners()
+
+    def _warm_start(self) -> bool:
+        """
+        Build objects from the snapshot file and read the hub in the background
+        return: True if a snapshot was loaded
+        """
+        from .snapshot import load_snapshot
+
+        snapshot = load_snapshot(self._snapshot_file, self._wiser_api_connection.host)
+        if snapshot is None:
+            return False
+        data = snapshot.data
+        if not self._build(data["Domain"], data["Network"], data["Schedule"], data["OpenTherm"]):
+            return False
+
+        _LOGGER.info(f"Loaded hub data snapshot saved {snapshot.age:.0f}s ago, reading hub in background")
+        self._stale = True
+        self._warm_start_thread = threading.Thread(target=self._background_read, name="WiserAPIWarmStart", daemon=True)
+        self._warm_start_thread.start()
+        return True
+
+    def _background_read(self):
+        try:
+            self.read_hub_data()
+        except (WiserHubAuthenticationError, WiserHubConnectionError, WiserHubRESTError) as ex:
+            _LOGGER.warning(f"Error reading hub after loading snapshot, data remains stale: {ex}")
+        except Exception as ex:
+            _LOGGER.error(f"Unexpected error reading hub after loading snapshot, data remains stale: {ex}")
+
+    def save_snapshot(self, snapshot_file: str) -> bool:
+        """
+        Save current hub data to a snapshot file for a warm start
+        param snapshot_file: path of file
+        return: True if saved
+        """
+        from .snapshot import save_snapshot
+
+        try:
+            save_snapshot(snapshot_file, self._wiser_api_connection.host, self.raw_hub_data)
+            return True
+        except OSError as ex:
+            _LOGGER.error(f"Error saving hub data snapshot: {ex}")
+            return False
+
+    @property
+    def is_stale(self) -> bool:
+        """Get if data was loaded from a snapshot and has not yet been read from the hub"""
+        return self._stale
+
+    def wait_until_fresh(self, timeout: float = None) -> bool:
+        """
+        Wait for the background hub read after a warm start
+        param timeout: seconds to wait, or None to wait until finished
+        return: True if the data has been read from the hub
+        """
+        if self._warm_start_thread is not None:
+            self._warm_start_thread.join(timeout)
+        return not self._stale
+
+    def _build(self, domain_data: dict, network_data: dict, schedule_data: dict, opentherm_data: dict) -> bool:
+        """
+        Populate objects from decoded hub data
+        return: True if the data was complete and objects were built
+        """
+        model = {
+            "_domain_data": domain_data,
+            "_network_data": network_data,
+            "_schedule_data": schedule_data,
+            "_opentherm_data": opentherm_data,
+        }
 
+        if domain_data != {} and network_data != {} and schedule_data != {}:
+            # Build into locals so the model attributes are replaced together below
             # System Object
-            _device_data = self._domain_data.get("Device", [])
-            self._system = _WiserSystem(self._wiser_rest_controller, self._domain_data, self._network_data, _device_data, self._opentherm_data)
+            _device_data = domain_data.get("Device", [])
+            system = _WiserSystem(self._wiser_rest_controller, domain_data, network_data, _device_data, opentherm_data)
 
             # Schedules Collection
-            self._schedules = _WiserScheduleCollection(self._wiser_rest_controller, self._schedule_data, self._system.sunrise_times, self._system.sunset_times)
+            schedules = _WiserScheduleCollection(
+                self._wiser_rest_controller,
+                schedule_data,
+                system.sunrise_times,
+                system.sunset_times,
+                system
+            )
 
             # Devices Collection
-            self._devices = _WiserDeviceCollection(self._wiser_rest_controller, self._domain_data, self._schedules )
+            devices = _WiserDeviceCollection(self._wiser_rest_controller, domain_data, schedules)
 
             # Rooms Collection
-            room_data = self._domain_data.get("Room", [])
-            self._rooms = _WiserRoomCollection(self._wiser_rest_controller, room_data, self._schedules.get_by_type(WiserScheduleTypeEnum.heating), self._devices)
+            room_data = domain_data.get("Room", [])
+            rooms = _WiserRoomCollection(self._wiser_rest_controller, room_data, schedules.get_by_type(WiserScheduleTypeEnum.heating), devices)
 
             # Hot Water
-            if self._domain_data.get("HotWater"):
-                schedule = self._schedules.get_by_id(WiserScheduleTypeEnum.onoff, self._domain_data.get("HotWater")[0].get("ScheduleId", 0))
-                self._hotwater = _WiserHotwater(
+            hotwater = None
+            if domain_data.get("HotWater"):
+                schedule = schedules.get_by_id(WiserScheduleTypeEnum.onoff, domain_data.get("HotWater")[0].get("ScheduleId", 0))
+                hotwater = _WiserHotwater(
                     self._wiser_rest_controller,
-                    self._domain_data.get("HotWater", {})[0],
+                    domain_data.get("HotWater", {})[0],
                     schedule,
                 )
 
             # Heating Channels
-            if self._domain_data.get("HeatingChannel"):
-                self._heating_channels = _WiserHeatingChannelCollection(
-                    self._domain_data.get("HeatingChannel"),
-                    self._rooms
+            heating_channels = None
+            if domain_data.get("HeatingChannel"):
+                heating_channels = _WiserHeatingChannelCollection(
+                    domain_data.get("HeatingChannel"),
+                    rooms
                 )
 
             # Moments
-            if self._domain_data.get("Moment"):
-                self._moments = _WiserMomentCollection(self._wiser_rest_controller, self._domain_data.get("Moment"))
-
-            # If gets here with no exceptions then success and return true
+            moments = None
+            if domain_data.get("Moment"):
+                moments = _WiserMomentCollection(self._wiser_rest_controller, domain_data.get("Moment"))
+
+            model.update(
+                _system=system,
+                _schedules=schedules,
+                _devices=devices,
+                _rooms=rooms,
+                _hotwater=hotwater,
+                _heating_channels=heating_channels,
+                _moments=moments,
+                _zigbee_topology=None,
+            )
+            self._replace_model(model)
             return True
 
+        self._replace_model(model)
         return False
+
+    def _replace_model(self, model: dict):
+        """
+        Replace hub data and model attributes in one step, so a refresh on another thread,
+        such as the warm start read, never leaves a mix of old and new objects.
+        Objects already fetched from the api, such as a room, are not updated
+        param model: dict of attribute name: value, names from _MODEL_ATTRIBUTES
+        """
+        self.__dict__.update(model)
+
+    def _notify_refresh_listeners(self):
+        for listener in list(self._refresh_listeners):
+            try:
+                listener(self)
+            except Exception as ex:
+                _LOGGER.error(f"Error in refresh listener {listener}: {ex}")
+
+    def add_refresh_listener(self, listener):
+        """
+        Add a callback to be called with this api instance after each successful hub data read
+        param listener: callable taking the api instance
+        """
+        if listener not in self._refresh_listeners:
+            self._refresh_listeners.append(listener)
+
+    def remove_refresh_listener(self, listener):
+        """
+        Remove a refresh callback
+        param listener: callable previously added with add_refresh_listener
+        """
+        if listener in self._refresh_listeners:
+            self._refresh_listeners.remove(listener)
         
 
+    def add_command_listener(self, listener):
+        """
+        Add a callback to be called after each successful command sent to the hub
+        param listener: callable taking the WiserRestActionEnum action and url
+        """
+        self._wiser_rest_controller.add_command_listener(listener)
+
+    def remove_command_listener(self, listener):
+        """
+        Remove a command callback
+        param listener: callable previously added with add_command_listener
+        """
+        self._wiser_rest_controller.remove_command_listener(listener)
+
+    def add_request_listener(self, listener):
+        """
+        Add a callback to be called after each request to the hub, with the method, endpoint,
+        status, bytes sent and received, timings, retries and any error
+        param listener: callable taking a WiserRequestEvent
+        """
+        self._wiser_rest_controller.add_request_listener(listener)
+
+    def remove_request_listener(self, listener):
+        """
+        Remove a request callback
+        param listener: callable previously added with add_request_listener
+        """
+        self._wiser_rest_controller.remove_request_listener(listener)
+
+    def zigbee_topology(self) -> _WiserZigbeeTopology:
+        """
+        Get zigbee mesh topology with hop depth, child counts, weakest path quality and orphaned nodes.
+        Built on first use after each hub data read
+        """
+        if self._zigbee_topology is None:
+            self._zigbee_topology = _WiserZigbeeTopology(self._domain_data.get("Device", []))
+        return self._zigbee_topology
+
     # API properties
     @property
     def devices(self):
@@ -227,6 +480,7 @@ class WiserAPI(object):
             try:
                 if data:
                     # Write out to file
+                    from .cli import log_response_to_file
                     log_response_to_file(data, filename, False, pathlib.Path(file_path))
                     return True
             except Exception as ex: